@@ -0,0 +1,150 @@
+"""
+Content-addressed on-disk cache for Gemini image analysis results.
+Keys are built from the image bytes, the prompt and the model name, so a
+photo that was already analysed is never sent to the Vision API again.
+analyze_cas_images.py keeps one entry per photo and one per photo set.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Configuration
+CACHE_DIR = Path(os.getenv('ANALYSIS_CACHE_DIR', '.tmp/analysis_cache'))
+CACHE_MAX_MB = float(os.getenv('ANALYSIS_CACHE_MAX_MB', '50'))
+CACHE_MAX_AGE_DAYS = float(os.getenv('ANALYSIS_CACHE_MAX_AGE_DAYS', '30'))
+
+
+def file_digest(path: str) -> str:
+    """
+    SHA-256 of a file's bytes (independent of its name or location).
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(image_digests: Iterable[str], prompt: str, model_name: str, extra: str = '') -> str:
+    """
+    Build a cache key for analysing a set of images.
+
+    The image order does not matter; changing any image, the prompt, the
+    model or the preprocessing settings (extra) gives a new key.
+
+    Args:
+        image_digests: Content digests of the images
+        prompt: Analysis prompt
+        model_name: Gemini model name
+        extra: Anything else that changes the result (e.g. preprocessing settings)
+
+    Returns:
+        Hex cache key
+    """
+    key = hashlib.sha256()
+    for part in [model_name, prompt, extra, *sorted(image_digests)]:
+        key.update(part.encode('utf-8'))
+        key.update(b'\0')
+    return key.hexdigest()
+
+
+class AnalysisCache:
+    """Stores analysis results as JSON files named by their cache key."""
+
+    def __init__(
+        self,
+        cache_dir: Path = CACHE_DIR,
+        max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024),
+        max_age_seconds: float = CACHE_MAX_AGE_DAYS * 24 * 3600
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory holding the cache entries
+            max_bytes: Total size above which the least recently used entries are evicted
+            max_age_seconds: Entries older than this are treated as missing
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached result, or None if missing or expired
+        """
+        path = self._path(key)
+        try:
+            age = time.time() - path.stat().st_mtime
+            if age > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Reading counts as use for LRU eviction
+        os.utime(path, None)
+        return value
+
+    def put(self, key: str, value: Dict):
+        """
+        Store a result and evict old entries if the cache is too big.
+
+        Args:
+            key: Key from make_key()
+            value: JSON-serializable result
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        # Unique temp name so concurrent writers never clobber each other
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        if not self.cache_dir.exists():
+            return
+
+        now = time.time()
+        entries = []
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -3,86 +3,488 @@ Analyze CAS activity images using Gemini Vision API.
 Extracts context and details from photos to inform reflection generation.
 """
 
+import io
 import os
 import sys
+import time
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import json
 from dotenv import load_dotenv
-import google.generativeai as genai
-from PIL import Image
+
+from gemini_client import generate
+from prompt_builder import PromptBuilder
+from analysis_cache import AnalysisCache, file_digest, make_key
+from image_dedup import dedupe_images
+from tracing import span
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-2.5-flash')
+# Gemini model (requests go through gemini_client)
+MODEL_NAME = 'gemini-2.5-flash'
+
+# Image preprocessing (smaller uploads; detail the model needs is kept)
+IMAGE_MAX_EDGE = int(os.getenv('IMAGE_MAX_EDGE', '1024'))
+IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'JPEG').upper()  # JPEG or WEBP
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '85'))
+
+# JPEG segments that only carry metadata: APP1 (EXIF, XMP), APP13 (IPTC), COM
+METADATA_MARKERS = {0xE1, 0xED, 0xFE}
+EXIF_ORIENTATION = 0x0112
+# libjpeg's quality-50 luminance table (estimate_jpeg_quality scales against it)
+STANDARD_LUMINANCE_TABLE = [
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99
+]
+
+# Photos not analysed before are sent in chunks, analysed concurrently
+CHUNK_SIZE = int(os.getenv('IMAGE_ANALYSIS_CHUNK_SIZE', '8'))
+MAX_WORKERS = int(os.getenv('IMAGE_ANALYSIS_WORKERS', '4'))
+
+ANALYSIS_PROMPT = """Analyze these CAS (Creativity, Activity, Service) activity photos.
+
+Please provide:
+1. **Activity Type**: What activity is shown? (e.g., charity work, sports, art project)
+2. **Setting**: Where is this taking place? (indoor/outdoor, specific location if visible)
+3. **People**: How many people are involved? What are they doing?
+4. **Actions**: What specific tasks or activities are being performed?
+5. **Materials/Objects**: What items, equipment, or materials are visible?
+6. **Atmosphere**: What's the mood/energy? (collaborative, focused, energetic, etc.)
+7. **Key Details**: Any specific details that would be important for a reflection (safety concerns, organization, teamwork, challenges visible, etc.)
+
+Be specific and observational. Focus on concrete details that would help write an authentic reflection."""
+
+# Each photo gets its own analysis, so it can be cached and reused on its own
+PER_PHOTO_FORMAT = """There are {count} photos. Analyze each photo on its own, in the order given,
+using the 7 sections above.
+
+OUTPUT A JSON ARRAY OF STRINGS ONLY: exactly {count} strings, the analysis of each photo in order."""
 
+MERGE_PROMPT = """Below are separate analyses of different photos from the SAME CAS activity.
+Combine them into ONE analysis with the same 7 sections (Activity Type, Setting, People,
+Actions, Materials/Objects, Atmosphere, Key Details). Merge overlapping observations,
+keep every specific detail, and do not mention that the photos were analysed in parts."""
 
-def analyze_images(image_paths: List[str]) -> Dict:
+
+def strip_jpeg_metadata(data: bytes) -> bytes:
     """
-    Analyze CAS activity images and extract context.
+    Drop the EXIF/XMP, IPTC and comment segments of a JPEG without re-encoding it.
     
     Args:
-        image_paths: List of paths to image files
+        data: JPEG file bytes
         
     Returns:
-        Dictionary containing analysis results
+        The same image without those segments
+        
+    Raises:
+        ValueError: If the data is not a well-formed JPEG
     """
-    print(f"📸 Analyzing {len(image_paths)} images...")
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("not a JPEG")
+    
+    parts, i = [data[:2]], 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ValueError("malformed JPEG")
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: the rest is image data
+            parts.append(data[i:])
+            return b''.join(parts)
+        end = i + 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+        if marker not in METADATA_MARKERS:
+            parts.append(data[i:end])
+        i = end
+    raise ValueError("malformed JPEG")
+
+
+def estimate_jpeg_quality(img) -> Optional[int]:
+    """
+    Estimate the encoder quality (1-100) a JPEG was saved with, from its luminance table.
+    
+    Args:
+        img: Opened PIL image
+        
+    Returns:
+        Estimated quality, or None if the image is not a JPEG
+    """
+    tables = getattr(img, 'quantization', None)
+    if img.format != 'JPEG' or not tables or 0 not in tables:
+        return None
+    scale = sum(tables[0]) * 100 / sum(STANDARD_LUMINANCE_TABLE)
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(100, round(quality)))
+
+
+def prepare_image(
+    path: str,
+    max_edge: int = IMAGE_MAX_EDGE,
+    image_format: str = IMAGE_FORMAT,
+    quality: int = IMAGE_QUALITY
+) -> Dict:
+    """
+    Downscale and re-encode an image for upload to Gemini.
+    
+    JPEGs are decoded at reduced scale with Image.draft, so a multi-megapixel
+    photo is never fully decoded. EXIF orientation is applied and the rest of
+    the metadata is dropped. A JPEG is never re-encoded above its own quality
+    (that only adds bytes), and one that is already small enough (and
+    upright) is sent as its own bytes, minus the metadata, if re-encoding
+    would not make it smaller.
+    
+    Args:
+        path: Path to the image file
+        max_edge: Maximum width/height in pixels
+        image_format: Output format ("JPEG" or "WEBP")
+        quality: Encoder quality (1-100)
+        
+    Returns:
+        Inline image blob: {"mime_type": ..., "data": bytes}
+    """
+    from PIL import Image, ImageOps
+    
+    with Image.open(path) as img:
+        keep_original = (img.format == 'JPEG' == image_format.upper() and img.mode in ('RGB', 'L')
+                         and max(img.size) <= max_edge and img.getexif().get(EXIF_ORIENTATION, 1) == 1)
+        source_quality = estimate_jpeg_quality(img)
+        if source_quality:
+            quality = min(quality, source_quality)
+        
+        # Lazy, reduced-scale decode (no-op for formats other than JPEG)
+        img.draft('RGB', (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        
+        # Saving without exif= strips the metadata
+        buffer = io.BytesIO()
+        img.save(buffer, format=image_format, quality=quality, optimize=True)
+    data = buffer.getvalue()
+    
+    if keep_original:
+        try:
+            with open(path, 'rb') as f:
+                original = strip_jpeg_metadata(f.read())
+            if len(original) <= len(data):
+                data = original
+        except ValueError:
+            pass
+    
+    return {"mime_type": f"image/{image_format.lower()}", "data": data}
+
+
+def image_size(image: Dict) -> Tuple[int, int]:
+    """(width, height) of a prepared image blob (reads only its header)."""
+    from PIL import Image
+    with Image.open(io.BytesIO(image['data'])) as img:
+        return img.size
+
+
+def preprocessing_settings() -> str:
+    """Preprocessing settings that affect the analysis (part of the cache key)."""
+    return f"{IMAGE_MAX_EDGE}:{IMAGE_FORMAT}:{IMAGE_QUALITY}"
+
+
+def photo_key(digest: str) -> str:
+    """Cache key of one photo's own analysis."""
+    return make_key([digest], ANALYSIS_PROMPT + PER_PHOTO_FORMAT, MODEL_NAME, preprocessing_settings())
+
+
+def set_key(digests: List[str]) -> str:
+    """Cache key of the merged analysis of a whole photo set."""
+    return make_key(digests, ANALYSIS_PROMPT + MERGE_PROMPT, MODEL_NAME, preprocessing_settings())
+
+
+def parse_analyses(text: str, count: int) -> Optional[List[str]]:
+    """
+    Split a per-photo reply into the analysis of each photo.
     
-    # Load images
+    Args:
+        text: Model reply (a JSON array, optionally in a code fence)
+        count: Number of photos sent
+        
+    Returns:
+        One analysis per photo, or None unless the reply is exactly count strings
+    """
+    text = text.strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    try:
+        analyses = json.loads(text)
+    except ValueError:
+        return None
+    if (not isinstance(analyses, list) or len(analyses) != count
+            or not all(isinstance(a, str) and a.strip() for a in analyses)):
+        return None
+    return analyses
+
+
+def _load_images(image_paths: List[str], label: str = "") -> List[Tuple[str, Dict]]:
+    """Prepare every readable image for upload, reporting the size saved."""
     images = []
     for path in image_paths:
         try:
-            img = Image.open(path)
-            images.append(img)
-            print(f"  ✓ Loaded: {Path(path).name}")
+            with span('image.load', file=Path(path).name) as s:
+                img = prepare_image(path)
+                s.set(bytes=len(img['data']))
+            images.append((path, img))
+            original_kb = os.path.getsize(path) / 1024
+            print(f"  ✓ {label}Loaded: {Path(path).name} ({original_kb:.0f} KB → {len(img['data']) / 1024:.0f} KB)")
         except Exception as e:
-            print(f"  ✗ Error loading {path}: {e}")
+            print(f"  ✗ {label}Error loading {path}: {e}")
             continue
+    return images
+
+
+def _analyze_chunk(image_paths: List[str], label: str = "") -> Dict:
+    """
+    Analyse one group of photos with a single Gemini request, one analysis per photo.
     
-    if not images:
-        return {"error": "No images could be loaded"}
+    Args:
+        image_paths: Photos to analyse together
+        label: Prefix for log lines (e.g. "[2/5] ")
+        
+    Returns:
+        Result dict with "success", "analyses" (photo path -> analysis, None if
+        the reply could not be split per photo), "analysis" (the whole reply) /
+        "error", "num_images", "image_paths" (the photos that were loaded)
+    """
+    loaded = _load_images(image_paths, label)
+    if not loaded:
+        return {"success": False, "error": "No images could be loaded", "image_paths": image_paths}
+    paths = [path for path, _ in loaded]
+    images = [img for _, img in loaded]
     
-    # Create analysis prompt
-    prompt = """Analyze these CAS (Creativity, Activity, Service) activity photos.
+    builder = PromptBuilder('image_analysis')
+    builder.add('instructions', ANALYSIS_PROMPT, required=True)
+    builder.add('format', PER_PHOTO_FORMAT.format(count=len(images)), required=True)
+    builder.add_images('images', [image_size(img) for img in images])
+    
+    start = time.perf_counter()
+    try:
+        response = generate(MODEL_NAME, [builder.build()] + images, dedup=True)
+        builder.log_call(time.perf_counter() - start, response)
+    except Exception as e:
+        builder.log_call(time.perf_counter() - start, error=str(e))
+        print(f"  ✗ {label}Analysis failed: {e}")
+        return {"success": False, "error": str(e), "image_paths": image_paths}
+    
+    analyses = parse_analyses(response.text, len(images))
+    if analyses is None:
+        print(f"  ⚠️  {label}Reply is not one analysis per photo, using it for the whole group")
+    return {
+        "success": True,
+        "analyses": dict(zip(paths, analyses)) if analyses else None,
+        "analysis": response.text,
+        "num_images": len(images),
+        "image_paths": paths
+    }
 
-Please provide:
-1. **Activity Type**: What activity is shown? (e.g., charity work, sports, art project)
-2. **Setting**: Where is this taking place? (indoor/outdoor, specific location if visible)
-3. **People**: How many people are involved? What are they doing?
-4. **Actions**: What specific tasks or activities are being performed?
-5. **Materials/Objects**: What items, equipment, or materials are visible?
-6. **Atmosphere**: What's the mood/energy? (collaborative, focused, energetic, etc.)
-7. **Key Details**: Any specific details that would be important for a reflection (safety concerns, organization, teamwork, challenges visible, etc.)
 
-Be specific and observational. Focus on concrete details that would help write an authentic reflection."""
+def _merge_analyses(analyses: List[str], cache: AnalysisCache, use_cache: bool) -> str:
+    """
+    Combine analyses of single photos (or groups of photos) into one analysis.
+    
+    Falls back to joining the parts if the merge request fails.
+    
+    Args:
+        analyses: Analysis text of each part
+        cache: Analysis cache
+        use_cache: Look up / store the merged result in the cache
+        
+    Returns:
+        Merged analysis text
+    """
+    parts = "\n\n".join(f"--- Part {i} ---\n{text}" for i, text in enumerate(analyses, 1))
+    builder = PromptBuilder('image_merge')
+    builder.add('instructions', MERGE_PROMPT, required=True)
+    builder.add('parts', parts, priority=1)
+    prompt = builder.build()
+    
+    cache_key = make_key([], prompt, MODEL_NAME, 'merge')
+    if use_cache:
+        cached = cache.get(cache_key)
+        if cached:
+            return cached['analysis']
+    
+    start = time.perf_counter()
+    try:
+        response = generate(MODEL_NAME, prompt, dedup=True)
+        builder.log_call(time.perf_counter() - start, response)
+        merged = response.text
+    except Exception as e:
+        builder.log_call(time.perf_counter() - start, error=str(e))
+        print(f"  ⚠️  Merge failed ({e}), joining partial analyses")
+        return parts
+    
+    if use_cache:
+        cache.put(cache_key, {"analysis": merged})
+    return merged
+
 
+def _analyze_in_chunks(image_paths: List[str], chunk_size: int, max_workers: int) -> List[Dict]:
+    """Analyse photos as concurrent chunks of up to chunk_size photos (one result per chunk)."""
+    chunks = [image_paths[i:i + chunk_size] for i in range(0, len(image_paths), chunk_size)]
+    if len(chunks) == 1:
+        return [_analyze_chunk(chunks[0])]
+    
+    workers = max(1, min(max_workers, len(chunks)))
+    print(f"  🧩 Split into {len(chunks)} chunks of up to {chunk_size} photos ({workers} at a time)")
+    
+    def run(item):
+        index, chunk = item
+        return _analyze_chunk(chunk, f"[{index}/{len(chunks)}] ")
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, enumerate(chunks, 1)))
+
+
+def _digest(path: str) -> Optional[str]:
+    """Content digest of a photo, or None if it cannot be read."""
     try:
-        # Generate analysis
-        response = model.generate_content([prompt] + images)
-        analysis_text = response.text
-        
-        print("\n🔍 Analysis Complete!")
-        print("=" * 60)
-        print(analysis_text)
-        print("=" * 60)
-        
-        return {
-            "success": True,
-            "analysis": analysis_text,
-            "num_images": len(images),
-            "image_paths": image_paths
-        }
+        return file_digest(path)
+    except OSError:
+        return None
+
+
+def _analyze_photos(
+    image_paths: List[str],
+    digests: Dict[str, Optional[str]],
+    cache: AnalysisCache,
+    use_cache: bool,
+    chunk_size: int,
+    max_workers: int
+) -> Dict:
+    """
+    Analyse the photos whose own analysis is not cached, then merge every photo's analysis.
+    
+    A failed chunk is reported in "failed_chunks" instead of failing the run.
+    """
+    analyses = {}
+    for path in image_paths:
+        hit = cache.get(photo_key(digests[path])) if digests.get(path) else None
+        if hit:
+            analyses[path] = hit['analysis']
+    if analyses:
+        print(f"  ⚡ {len(analyses)}/{len(image_paths)} photos already analysed (cached)")
+    
+    missing = [path for path in image_paths if path not in analyses]
+    partials = _analyze_in_chunks(missing, chunk_size, max_workers) if missing else []
+    
+    # Replies that could not be split per photo are merged as a whole
+    groups = []
+    for partial in partials:
+        if not partial.get('success'):
+            continue
+        if not partial['analyses']:
+            groups.append(partial)
+            continue
+        for path, text in partial['analyses'].items():
+            analyses[path] = text
+            if digests.get(path):
+                cache.put(photo_key(digests[path]), {"analysis": text})
+    
+    failed = [{"image_paths": r['image_paths'], "error": r.get('error')}
+              for r in partials if not r.get('success')]
+    analysed = [path for path in image_paths if path in analyses]
+    texts = [analyses[path] for path in analysed] + [r['analysis'] for r in groups]
+    
+    if not texts:
+        error = failed[0]['error'] if failed else "No images could be loaded"
+        if len(failed) > 1:
+            error = f"All {len(failed)} chunks failed: {error}"
+        return {"success": False, "error": error, "failed_chunks": failed}
+    
+    if failed:
+        print(f"  ⚠️  {len(failed)}/{len(partials)} chunks failed, merging the rest")
+    
+    if len(texts) == 1:
+        analysis_text = texts[0]
+    else:
+        print(f"  🔗 Merging {len(texts)} analyses...")
+        analysis_text = _merge_analyses(texts, cache, use_cache)
+    
+    return {
+        "success": True,
+        "analysis": analysis_text,
+        "num_images": len(analysed) + sum(r['num_images'] for r in groups),
+        "image_paths": analysed + [path for r in groups for path in r['image_paths']],
+        "chunks": len(partials),
+        "failed_chunks": failed
+    }
+
+
+def analyze_images(
+    image_paths: List[str],
+    use_cache: bool = True,
+    dedupe: bool = True,
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: int = MAX_WORKERS
+) -> Dict:
+    """
+    Analyze CAS activity images and extract context.
+    
+    Every photo gets its own analysis, cached under the photo's content, so
+    only photos that were never analysed before are sent to Gemini (in
+    concurrent requests of up to chunk_size photos). The per-photo analyses
+    are then merged into one. The merged analysis of the whole set is cached
+    too, so a set seen before needs no request at all.
+    
+    Args:
+        image_paths: List of paths to image files
+        use_cache: Reuse cached analyses of the same photos, prompt and model
+        dedupe: Analyse only one photo per group of near-duplicates
+        chunk_size: Maximum photos per Gemini request
+        max_workers: Maximum concurrent chunk requests
         
-    except Exception as e:
-        print(f"\n❌ Error during analysis: {e}")
-        return {
-            "success": False,
-            "error": str(e)
-        }
+    Returns:
+        Dictionary containing analysis results
+    """
+    all_paths = image_paths
+    if dedupe and len(image_paths) > 1:
+        image_paths = dedupe_images(image_paths)
+        skipped = len(all_paths) - len(image_paths)
+        if skipped:
+            print(f"🧹 Skipped {skipped} near-duplicate photos")
+    
+    print(f"📸 Analyzing {len(image_paths)} images...")
+    
+    cache = AnalysisCache()
+    digests = {path: _digest(path) for path in image_paths} if use_cache else {}
+    complete = bool(digests) and all(digests.values())
+    
+    # Look everything up by image content before decoding anything
+    cached = cache.get(set_key(list(digests.values()))) if complete else None
+    if cached:
+        print("  ⚡ Using cached analysis (same photos, prompt and model)")
+        result = {**cached, "image_paths": image_paths, "cached": True}
+    else:
+        result = _analyze_photos(image_paths, digests, cache, use_cache, chunk_size, max_workers)
+        if complete and result.get('success') and result['num_images'] == len(image_paths):
+            cache.put(set_key(list(digests.values())), result)
+    
+    if not result.get('success'):
+        print(f"\n❌ Error during analysis: {result.get('error')}")
+        return result
+    
+    print("\n🔍 Analysis Complete!")
+    print("=" * 60)
+    print(result['analysis'])
+    print("=" * 60)
+    
+    return result
 
 
 def main():
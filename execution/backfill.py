@@ -0,0 +1,170 @@
+"""
+Catch-up backfill after the scheduler has been down.
+Works out every slot of the reflection cadence missed since the last
+successful run, then fills them all in one pass: the ideas come from one
+batched request, the reflections from generate_reflections_batch (shared
+training context and rate limit), and everything is submitted in a single
+browser session. Each submission is recorded with its slot, so if some
+slots fail the run is recorded as failed and the next backfill plans only
+the slots that were not submitted.
+
+Usage:
+    python execution/backfill.py [--plan] [--max-slots 10] [--headless] [--lean]
+"""
+
+import os
+import sys
+import time
+import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# Add execution directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_if_due import INTERVAL_DAYS, get_last_run, update_last_run
+from state_store import DEFAULT_STUDENT, get_store
+
+# Configuration
+BACKFILL_MAX_SLOTS = int(os.getenv('BACKFILL_MAX_SLOTS', '10'))
+BACKFILL_OUTPUT_FILE = Path(".tmp/backfill_reflections.jsonl")
+
+
+def slot_key(slot: datetime.datetime) -> str:
+    """Identifier of a slot, stored with its submission."""
+    return slot.isoformat(timespec='seconds')
+
+
+def submitted_slots(student: str = DEFAULT_STUDENT) -> Set[str]:
+    """Keys of the slots an earlier (partly failed) backfill already submitted."""
+    rows = get_store().history('submissions', student=student, status='submitted', limit=1000)
+    return {row['data']['slot'] for row in rows if row['data'].get('slot')}
+
+
+def missed_slots(last_run: float, now: Optional[float] = None, interval_days: float = INTERVAL_DAYS,
+                 max_slots: int = BACKFILL_MAX_SLOTS,
+                 submitted: Optional[Set[str]] = None) -> List[datetime.datetime]:
+    """
+    Slots of the cadence that passed without a run.
+
+    Args:
+        last_run: Timestamp of the last successful run (0 = never ran)
+        now: Current time (default: now)
+        interval_days: Days between reflections
+        max_slots: Keep at most this many (the most recent ones)
+        submitted: Slot keys to leave out (see submitted_slots)
+
+    Returns:
+        Slot times, oldest first; just [now] if there is no run history
+    """
+    now = time.time() if now is None else now
+    if not last_run:
+        return [datetime.datetime.fromtimestamp(now)]
+
+    interval = interval_days * 86400
+    count = int((now - last_run) // interval)
+    first = max(1, count - max_slots + 1)
+    slots = [datetime.datetime.fromtimestamp(last_run + k * interval) for k in range(first, count + 1)]
+    return [slot for slot in slots if slot_key(slot) not in (submitted or set())]
+
+
+def run_backfill(slots: List[datetime.datetime], headless: bool = False, lean: Optional[bool] = None,
+                 student: str = DEFAULT_STUDENT, account: Optional[Dict] = None) -> bool:
+    """
+    Generate and submit one reflection per missed slot.
+
+    Args:
+        slots: Slot times from missed_slots()
+        headless: Run the browser without a window
+        lean: Lean browser profile (None = MANAGEBAC_LEAN)
+        student: Student the run is recorded under
+        account: Roster account to submit as (None = MANAGEBAC_* credentials)
+
+    Returns:
+        True if every slot was submitted
+    """
+    if not slots:
+        print("✅ Nothing to backfill")
+        return True
+
+    from generate_idea import generate_ideas, parse_date
+    from generate_reflection import generate_reflections_batch
+    from submit_to_managebac import ManageBacAutomation
+
+    print(f"🧩 Backfilling {len(slots)} missed slot(s): "
+          f"{', '.join(slot.strftime('%Y-%m-%d') for slot in slots)}")
+
+    state = get_store()
+    run_id = state.start_run(student)
+    try:
+        # 1. All ideas in one request
+        ideas = generate_ideas([slot.date() for slot in slots])
+        if not ideas:
+            state.finish_run(run_id, False, "Idea generation failed")
+            return False
+        idea_ids = [state.add_idea(idea, run_id, student) for idea in ideas]
+
+        # 2. All reflections in one batch, each tagged with its slot
+        by_date: Dict[datetime.date, List[datetime.datetime]] = {}
+        for slot in slots:
+            by_date.setdefault(slot.date(), []).append(slot)
+        activities = [dict(idea, id=slot_key(by_date[parse_date(idea['date'])].pop(0))) for idea in ideas]
+        results = generate_reflections_batch(activities, output_file=BACKFILL_OUTPUT_FILE)
+
+        entries, reflection_ids = [], {}
+        for result in results:
+            index = result['index']
+            reflection_id = state.add_reflection(result, run_id, idea_ids[index], student)
+            if result.get('success'):
+                entries.append((result['id'], result))
+                reflection_ids[result['id']] = reflection_id
+
+        # 3. One browser session for every submission
+        submitted = 0
+        if entries:
+            automation = ManageBacAutomation(headless=headless, lean=lean, account=account)
+            for outcome in automation.submit_batch(entries):
+                state.add_submission(outcome['success'], reflection_ids.get(outcome['id']), run_id, student,
+                                     outcome.get('error'), {'slot': outcome['id']})
+                if outcome['success']:
+                    submitted += 1
+    except BaseException as e:
+        state.finish_run(run_id, False, str(e) or type(e).__name__)
+        raise
+
+    ok = submitted == len(slots)
+    state.finish_run(run_id, ok, None if ok else f"{submitted}/{len(slots)} slots submitted")
+    print(f"\n📊 Backfill: {submitted}/{len(slots)} slots submitted")
+    return ok
+
+
+def main():
+    """Plan and run a backfill from the command line."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Fill reflection slots missed since the last run')
+    parser.add_argument('--plan', action='store_true', help='Only list the missed slots')
+    parser.add_argument('--max-slots', type=int, default=BACKFILL_MAX_SLOTS, help='Most recent slots to fill')
+    parser.add_argument('--headless', action='store_true', help='Run browser in headless mode')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CAS BACKFILL")
+    print("=" * 60)
+
+    last_run = get_last_run()
+    slots = missed_slots(last_run, max_slots=max(1, args.max_slots), submitted=submitted_slots())
+    print(f"Last run: {datetime.datetime.fromtimestamp(last_run).strftime('%Y-%m-%d %H:%M:%S') if last_run else 'Never'}")
+    for slot in slots:
+        print(f"  📅 {slot.strftime('%Y-%m-%d %H:%M')}")
+    if args.plan:
+        return
+
+    ok = run_backfill(slots, headless=args.headless, lean=True if args.lean else None)
+    if ok and slots:
+        update_last_run()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Offline benchmarks for the CAS workflow.
+Runs the real workflow code against the local fake ManageBac
+(fake_managebac.py) and the scripted Gemini backend (fake_gemini.py), so no
+credentials or network are needed, and reports end-to-end and per-stage
+timings (from the tracing spans) for three modes:
+
+    single      one pipeline run: idea -> reflection -> submission
+    batch       --size reflections generated in one batch, submitted in one browser session
+    concurrent  --size students running the pipeline at the same time
+
+The workflow runs inside .tmp/benchmark/workspace/ (its own .tmp, state
+store, checkpoints, sessions and traces), so a benchmark never touches the
+real run's files. Results are saved to .tmp/benchmark/results/<timestamp>.json;
+--baseline compares with an earlier result and exits with 1 on a regression.
+
+Usage:
+    python execution/benchmark.py [--mode single batch concurrent] [--runs 3] [--size 4]
+        [--gemini-latency-ms 800] [--page-latency-ms 50] [--submit-latency-ms 300]
+        [--no-browser] [--baseline .tmp/benchmark/results/<earlier>.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import datetime
+import statistics
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add execution directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+BENCH_DIR = Path(".tmp/benchmark").resolve()
+RESULTS_DIR = BENCH_DIR / "results"
+# Working directory of the benchmarked code: every relative .tmp path lands here
+WORKSPACE_DIR = BENCH_DIR / "workspace"
+# Path settings a .env could point at the real files; reset to their defaults inside the workspace
+WORKSPACE_PATHS = {
+    'CAS_STATE_DB': '.tmp/cas_state.db',
+    'CAS_STUDENTS_DIR': '.tmp/students',
+    'WORKFLOW_CHECKPOINT_DIR': '.tmp/checkpoints',
+    'PROMPT_STATS_FILE': '.tmp/prompt_stats.jsonl',
+    'ANALYSIS_CACHE_DIR': '.tmp/analysis_cache',
+    'MANAGEBAC_SESSION_FILE': '.tmp/managebac_session.json',
+    'REFLECTION_QUEUE': '.tmp/reflection_queue',
+    'TRACE_DIR': '.tmp/traces'
+}
+MODES = ('single', 'batch', 'concurrent')
+# Slowdowns smaller than this are noise, whatever the percentage
+MIN_REGRESSION_MS = 5.0
+
+
+def configure_environment(args):
+    """
+    Point every module at the fakes and move into the benchmark workspace.
+
+    Must run before any workflow module is imported, since they read their
+    settings at import time.
+    """
+    # Inputs are read from the real tree, so resolve them before leaving it
+    training = Path(os.getenv('TRAINING_DATA_PATH', 'Resala CAS Project trainng')).resolve()
+    os.environ.update(WORKSPACE_PATHS)
+    os.environ.update({
+        'TRAINING_DATA_PATH': str(training),
+        'GEMINI_BACKEND': 'fake',
+        'GEMINI_RPM': str(args.rpm),
+        'GEMINI_FAKE_LATENCY_MS': str(args.gemini_latency_ms),
+        'GEMINI_FAKE_MS_PER_TOKEN': str(args.gemini_ms_per_token),
+        'TRACING': 'true'
+    })
+
+    shutil.rmtree(WORKSPACE_DIR / '.tmp' / 'checkpoints', ignore_errors=True)
+    os.makedirs(WORKSPACE_DIR, exist_ok=True)
+    os.chdir(WORKSPACE_DIR)
+
+
+def _activities(count: int) -> List[Dict]:
+    today = datetime.date.today()
+    return [{
+        'id': str(i),
+        'description': f"Sorted {20 + i * 5} bags of donated clothes by size",
+        'date': (today - datetime.timedelta(days=4 * i)).strftime("%B %d, %Y"),
+        'learning_outcomes': ['1', '5'],
+        'duration_hours': 3
+    } for i in range(count)]
+
+
+def run_single(site, student: str, browser: bool) -> bool:
+    """One pipeline run for one student (without the submission stage if browser is False)."""
+    from pipeline import build_stages
+    from tracing import span
+    from workflow_dag import CHECKPOINT_DIR, CheckpointStore, run_dag
+
+    stages = build_stages(headless=True, photos=[], student=student,
+                          account=site.account(student) if site else None)
+    if not browser:
+        stages = [stage for stage in stages if stage.name != 'submission']
+
+    store = CheckpointStore(CHECKPOINT_DIR / student)
+    store.clear()
+    with span('pipeline.run', student=student):
+        ok, _ = run_dag(stages, store)
+    return ok
+
+
+def run_batch(site, size: int, browser: bool) -> bool:
+    """Generate `size` reflections in one batch and submit them in one browser session."""
+    from generate_reflection import generate_reflections_batch
+    from tracing import span
+
+    with span('benchmark.batch', size=size):
+        results = generate_reflections_batch(_activities(size), output_file=None)
+        entries = [(r['id'], r) for r in results if r.get('success')]
+        if not browser:
+            return len(entries) == size
+
+        from submit_to_managebac import ManageBacAutomation
+        automation = ManageBacAutomation(headless=True, reuse_session=False, account=site.account('benchmark-batch'))
+        outcomes = automation.submit_batch(entries)
+        return len(entries) == size and all(o['success'] for o in outcomes)
+
+
+def run_concurrent(site, size: int, browser: bool) -> bool:
+    """Run the pipeline for `size` students at the same time (one thread each)."""
+    from tracing import span
+
+    with span('benchmark.concurrent', size=size):
+        with ThreadPoolExecutor(max_workers=size, thread_name_prefix='student') as pool:
+            results = list(pool.map(lambda i: run_single(site, f"benchmark-{i}", browser), range(size)))
+    return all(results)
+
+
+def mode_spans(since: float) -> List[Dict]:
+    """Spans written by this process since a given time."""
+    from tracing import trace_file
+    path = trace_file()
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        spans = [json.loads(line) for line in f if line.strip()]
+    return [s for s in spans if s['start'] >= since]
+
+
+def benchmark_mode(mode: str, site, runs: int, size: int, browser: bool, verbose: bool = False) -> Dict:
+    """
+    Run one mode several times.
+
+    Returns:
+        {"runs", "failures", "e2e_ms": {"p50", "p95", "max"}, "stages": {name: {...}}}
+    """
+    from tracing import percentile, summarize
+
+    since = time.time()
+    durations, failures = [], 0
+    for run in range(runs):
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                devnull = stack.enter_context(open(os.devnull, 'w', encoding='utf-8'))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+            try:
+                if mode == 'single':
+                    ok = run_single(site, 'benchmark-single', browser)
+                elif mode == 'batch':
+                    ok = run_batch(site, size, browser)
+                else:
+                    ok = run_concurrent(site, size, browser)
+            except Exception as e:
+                print(f"  ❌ {mode} run {run + 1}: {e}", file=sys.stderr)
+                ok = False
+        durations.append((time.perf_counter() - start) * 1000)
+        failures += 0 if ok else 1
+        print(f"  {'✓' if ok else '✗'} {mode} run {run + 1}/{runs}: {durations[-1]:.0f} ms")
+
+    stages = {row['name']: {k: round(v, 1) if isinstance(v, float) else v for k, v in row.items() if k != 'name'}
+              for row in summarize(mode_spans(since))}
+    return {
+        'runs': runs,
+        'failures': failures,
+        'e2e_ms': {
+            'p50': round(percentile(durations, 50), 1),
+            'p95': round(percentile(durations, 95), 1),
+            'max': round(max(durations), 1),
+            'mean': round(statistics.mean(durations), 1)
+        },
+        'stages': stages
+    }
+
+
+def compare(result: Dict, baseline: Dict, threshold_pct: float) -> List[str]:
+    """
+    Find timings that got slower than the baseline.
+
+    Args:
+        result: This benchmark's result
+        baseline: An earlier result
+        threshold_pct: Allowed slowdown in percent
+
+    Returns:
+        One line per regression (empty if none)
+    """
+    regressions = []
+
+    def check(label: str, new: Optional[float], old: Optional[float]):
+        if new is None or old is None:
+            return
+        if new > old * (1 + threshold_pct / 100) and new - old > MIN_REGRESSION_MS:
+            regressions.append(f"{label}: {old:.0f} ms -> {new:.0f} ms (+{(new / old - 1) * 100:.0f}%)")
+
+    for mode, data in result['modes'].items():
+        old = baseline.get('modes', {}).get(mode)
+        if not old:
+            continue
+        check(f"{mode} end-to-end p50", data['e2e_ms']['p50'], old['e2e_ms']['p50'])
+        for name, stage in data['stages'].items():
+            old_stage = old['stages'].get(name)
+            if old_stage:
+                check(f"{mode} {name} p50", stage['p50_ms'], old_stage['p50_ms'])
+    return regressions
+
+
+def print_report(result: Dict):
+    """Print end-to-end and per-stage timings of every mode."""
+    for mode, data in result['modes'].items():
+        e2e = data['e2e_ms']
+        print(f"\n📊 {mode}: p50 {e2e['p50']:.0f} ms, p95 {e2e['p95']:.0f} ms "
+              f"({data['runs']} runs, {data['failures']} failed)")
+        print(f"  {'stage':<28} {'count':>6} {'p50 ms':>10} {'p95 ms':>10}")
+        for name, stage in data['stages'].items():
+            print(f"  {name:<28} {stage['count']:>6} {stage['p50_ms']:>10.1f} {stage['p95_ms']:>10.1f}")
+
+
+def main():
+    """Run the benchmarks from the command line."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Offline CAS workflow benchmarks')
+    parser.add_argument('--mode', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--runs', type=int, default=3, help='Repetitions per mode')
+    parser.add_argument('--size', type=int, default=4, help='Reflections (batch) or students (concurrent)')
+    parser.add_argument('--gemini-latency-ms', type=float, default=800, help='Fake model time to first token')
+    parser.add_argument('--gemini-ms-per-token', type=float, default=10, help='Fake model time per output token')
+    parser.add_argument('--rpm', type=float, default=0, help='Gemini rate limit to apply (0 = none)')
+    parser.add_argument('--page-latency-ms', type=float, default=50, help='Fake ManageBac page delay')
+    parser.add_argument('--submit-latency-ms', type=float, default=300, help='Fake ManageBac "Add Entry" delay')
+    parser.add_argument('--no-browser', action='store_true', help='Skip submissions (no Chromium needed)')
+    parser.add_argument('--baseline', type=Path, help='Earlier result to compare with')
+    parser.add_argument('--threshold', type=float, default=20, help='Allowed slowdown vs the baseline, in percent')
+    parser.add_argument('--verbose', action='store_true', help='Show the workflow output')
+    args = parser.parse_args()
+    baseline = args.baseline.resolve() if args.baseline else None
+
+    configure_environment(args)
+
+    print("=" * 60)
+    print("CAS WORKFLOW BENCHMARK (offline)")
+    print("=" * 60)
+
+    browser = not args.no_browser
+    site = None
+    if browser:
+        from fake_managebac import FakeManageBac
+        site = FakeManageBac(latency_ms=args.page_latency_ms,
+                             route_latency_ms={'submit': args.submit_latency_ms}).start()
+        print(f"🧪 Fake ManageBac at {site.url}")
+
+    result = {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'settings': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        'modes': {}
+    }
+    try:
+        for mode in args.mode:
+            print(f"\n⏱️  {mode}...")
+            result['modes'][mode] = benchmark_mode(mode, site, max(1, args.runs), max(1, args.size),
+                                                   browser, args.verbose)
+    finally:
+        if site:
+            result['entries_posted'] = site.stats['entries']
+            site.stop()
+
+    print_report(result)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = RESULTS_DIR / f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"\n💾 Results saved to: {out_path}")
+
+    failed = any(data['failures'] for data in result['modes'].values())
+    if baseline:
+        with open(baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ Slower than {baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {baseline}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Lightweight ("lean") Chromium profile for headless ManageBac submissions.
+Blocks the request types the Journal form flow does not need (images,
+fonts, media, stylesheets, analytics) and turns off unused browser features.
+"""
+
+import os
+from typing import Dict, List, Optional, Set
+from urllib.parse import urlparse
+
+# Request types aborted by default; override with MANAGEBAC_LEAN_BLOCK=image,font,...
+DEFAULT_BLOCKED_TYPES = {'image', 'media', 'font', 'stylesheet'}
+
+# Third-party hosts that are never needed to fill and submit the form
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'hotjar.com',
+    'segment.io',
+    'segment.com',
+    'intercom.io',
+    'intercomcdn.com',
+    'sentry.io',
+    'newrelic.com',
+    'nr-data.net',
+    'fullstory.com',
+)
+
+# Chromium switches: no image decoding, no background traffic, minimal disk cache
+LEAN_LAUNCH_ARGS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disk-cache-size=1',
+    '--media-cache-size=1',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-extensions',
+    '--disable-sync',
+    '--mute-audio',
+    '--no-first-run',
+]
+
+
+def lean_enabled() -> bool:
+    """Check whether the lean profile is switched on via MANAGEBAC_LEAN."""
+    return os.getenv('MANAGEBAC_LEAN', '').lower() in ('1', 'true', 'yes')
+
+
+def blocked_types() -> Set[str]:
+    """Resource types to abort, from MANAGEBAC_LEAN_BLOCK or the defaults."""
+    configured = os.getenv('MANAGEBAC_LEAN_BLOCK')
+    if configured is None:
+        return set(DEFAULT_BLOCKED_TYPES)
+    return {t.strip() for t in configured.split(',') if t.strip()}
+
+
+def should_block(resource_type: str, url: str, types: Set[str]) -> bool:
+    """
+    Decide whether a request can be aborted in the lean profile.
+
+    Args:
+        resource_type: Playwright resource type (e.g. "image", "script")
+        url: Request URL
+        types: Resource types to block
+
+    Returns:
+        True if the request is not needed for the form flow
+    """
+    if resource_type in types:
+        return True
+
+    host = urlparse(url).hostname or ''
+    return any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_HOSTS)
+
+
+def launch_args(lean: bool) -> List[str]:
+    """Chromium launch arguments for the chosen profile."""
+    return list(LEAN_LAUNCH_ARGS) if lean else []
+
+
+def context_options(lean: bool) -> Dict:
+    """Extra browser.new_context() options for the chosen profile."""
+    if not lean:
+        return {}
+    return {'service_workers': 'block'}
+
+
+def install_routes(context, types: Optional[Set[str]] = None):
+    """
+    Abort unneeded requests in a sync Playwright browser context.
+
+    Args:
+        context: Playwright BrowserContext (sync API)
+        types: Resource types to block (defaults to blocked_types())
+    """
+    types = blocked_types() if types is None else types
+
+    def handle(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, types):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route('**/*', handle)
+
+
+async def install_routes_async(context, types: Optional[Set[str]] = None):
+    """
+    Abort unneeded requests in an async Playwright browser context.
+
+    Args:
+        context: Playwright BrowserContext (async API)
+        types: Resource types to block (defaults to blocked_types())
+    """
+    types = blocked_types() if types is None else types
+
+    async def handle(route):
+        request = route.request
+        if should_block(request.resource_type, request.url, types):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route('**/*', handle)
@@ -12,9 +12,9 @@ import json
 # Add execution directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from analyze_cas_images import analyze_images
+# Image analysis (Pillow) and submission (Playwright) are imported when a
+# step needs them, so the menu comes up without loading either
 from generate_reflection import generate_reflection
-from submit_to_managebac import ManageBacAutomation
 
 
 def print_header(title: str):
@@ -98,6 +98,7 @@ def run_full_workflow():
         
         if image_files:
             print(f"\n  Analyzing {len(image_files)} images...")
+            from analyze_cas_images import analyze_images
             result = analyze_images(image_files)
             
             if result.get('success'):
@@ -113,6 +114,7 @@ def run_full_workflow():
     
     print("🤖 Generating your personalized reflection...")
     print("  (This uses your training data to match your writing style)")
+    print("  (Press Ctrl+C to stop a generation that is going wrong)")
     
     reflection_result = generate_reflection(
         activity_description=activity_description,
@@ -120,7 +122,8 @@ def run_full_workflow():
         learning_outcomes=learning_outcomes,
         date=date,
         cas_strand=cas_strand,
-        duration_hours=float(duration)
+        duration_hours=float(duration),
+        stream=True
     )
     
     if not reflection_result.get('success'):
@@ -166,6 +169,7 @@ def run_full_workflow():
     print("     - Navigate to CAS section manually")
     print("     - Review and submit the form")
     
+    from submit_to_managebac import ManageBacAutomation
     automation = ManageBacAutomation(headless=False)
     automation.submit_reflection(reflection_result)
     
@@ -0,0 +1,125 @@
+"""
+Local retrieval of example reflections for the generation prompt.
+Ranks the training reflections by TF-IDF similarity to the new activity
+and keeps the top-k that fit a token budget, so the prompt stays bounded
+as the style corpus grows.
+"""
+
+import os
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from prompt_builder import estimate_tokens
+
+# Configuration
+EXAMPLES_TOP_K = int(os.getenv('REFLECTION_EXAMPLES_K', '3'))
+EXAMPLES_TOKEN_BUDGET = int(os.getenv('REFLECTION_EXAMPLES_TOKEN_BUDGET', '1500'))
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'had', 'has',
+    'have', 'he', 'her', 'his', 'i', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or',
+    'our', 'she', 'so', 'that', 'the', 'their', 'them', 'they', 'this', 'to', 'was', 'we',
+    'were', 'what', 'when', 'which', 'who', 'will', 'with', 'you', 'your'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words (Latin and Arabic letters, digits) without stopwords."""
+    words = re.findall(r'[a-z0-9\u0600-\u06ff]+', text.lower())
+    return [w for w in words if w not in STOPWORDS and len(w) > 1]
+
+
+class TfidfIndex:
+    """TF-IDF vectors for a small document collection, compared by cosine similarity."""
+
+    def __init__(self, documents: List[str]):
+        """
+        Build the index.
+
+        Args:
+            documents: Texts to index (e.g. example reflections)
+        """
+        self.documents = documents
+        tokenized = [tokenize(doc) for doc in documents]
+
+        doc_freq = Counter()
+        for tokens in tokenized:
+            doc_freq.update(set(tokens))
+
+        count = len(documents)
+        self.idf = {term: math.log((1 + count) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        self.vectors = [self._vectorize(tokens) for tokens in tokenized]
+
+    def _vectorize(self, tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(tokens)
+        vector = {term: tf * self.idf.get(term, 0.0) for term, tf in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {term: v / norm for term, v in vector.items()}
+
+    def rank(self, query: str) -> List[Tuple[int, float]]:
+        """
+        Rank documents by similarity to the query.
+
+        Args:
+            query: Query text
+
+        Returns:
+            (document index, score) pairs, most similar first
+        """
+        query_vector = self._vectorize(tokenize(query))
+        scores = []
+        for index, vector in enumerate(self.vectors):
+            score = sum(weight * vector.get(term, 0.0) for term, weight in query_vector.items())
+            scores.append((index, score))
+        # Stable on ties: earlier examples first
+        return sorted(scores, key=lambda item: (-item[1], item[0]))
+
+
+def fits_budget(documents: List[str], k: int = EXAMPLES_TOP_K,
+                token_budget: int = EXAMPLES_TOKEN_BUDGET) -> bool:
+    """Check whether every document can go into the prompt without retrieval."""
+    return len(documents) <= k and sum(estimate_tokens(d) for d in documents) <= token_budget
+
+
+def leading_within_budget(documents: List[str], token_budget: int) -> int:
+    """Number of leading documents whose combined tokens fit the budget."""
+    used = 0
+    for count, document in enumerate(documents):
+        used += estimate_tokens(document)
+        if used > token_budget:
+            return count
+    return len(documents)
+
+
+def select_examples(
+    index: TfidfIndex,
+    query: str,
+    k: int = EXAMPLES_TOP_K,
+    token_budget: int = EXAMPLES_TOKEN_BUDGET
+) -> List[int]:
+    """
+    Pick the examples most similar to the query within k and the token budget.
+
+    The best match is always included, even if it alone exceeds the budget.
+
+    Args:
+        index: Index over the example reflections
+        query: Text describing the new activity
+        k: Maximum number of examples
+        token_budget: Maximum estimated tokens for all selected examples
+
+    Returns:
+        Indices of the selected examples, in their original corpus order
+    """
+    selected, used = [], 0
+    for doc_index, _ in index.rank(query):
+        if len(selected) >= k:
+            break
+        tokens = estimate_tokens(index.documents[doc_index])
+        if selected and used + tokens > token_budget:
+            continue
+        selected.append(doc_index)
+        used += tokens
+    return sorted(selected)
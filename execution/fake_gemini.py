@@ -0,0 +1,140 @@
+"""
+Scripted stand-in for a Gemini model, for offline benchmarks.
+Answers generate_content() with replies shaped like the real ones (an idea
+JSON object, an array of ideas or of per-photo analyses, or reflection
+text) after a configurable latency, and reports token counts in
+usage_metadata.
+Select it with GEMINI_BACKEND=fake or gemini_client.set_backend(FakeModel).
+"""
+
+import os
+import re
+import json
+import time
+import random
+from typing import Callable, Dict, Iterator, List, Optional
+
+from prompt_builder import estimate_tokens
+
+# Configuration
+FAKE_LATENCY_MS = float(os.getenv('GEMINI_FAKE_LATENCY_MS', '800'))
+FAKE_JITTER_MS = float(os.getenv('GEMINI_FAKE_JITTER_MS', '200'))
+# Extra time per generated token (models stream roughly 50-150 tokens/s)
+FAKE_MS_PER_TOKEN = float(os.getenv('GEMINI_FAKE_MS_PER_TOKEN', '10'))
+FAKE_OUTPUT_TOKENS = int(os.getenv('GEMINI_FAKE_OUTPUT_TOKENS', '300'))
+
+FILLER = ("Today I helped at Resala again and I learned that small tasks matter when many "
+          "people depend on them. ").split()
+
+
+class UsageMetadata:
+    """Token counts, as in the SDK's usage_metadata."""
+
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.cached_content_token_count = 0
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeResponse:
+    """Response (or streamed chunk) with .text and .usage_metadata."""
+
+    def __init__(self, text: str, usage: Optional[UsageMetadata] = None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+def prompt_text(contents) -> str:
+    """Text parts of a prompt (image blobs are skipped)."""
+    parts = contents if isinstance(contents, list) else [contents]
+    return "\n".join(str(part) for part in parts if not isinstance(part, dict))
+
+
+def _idea(date: str, number: int) -> Dict:
+    return {
+        "description": f"Sorted {20 + number * 5} bags of donated clothes by size",
+        "date": date,
+        "duration": 3,
+        "cas_strand": "Service",
+        "learning_outcomes": ["1", "5"]
+    }
+
+
+def scripted_reply(prompt: str, output_tokens: int = FAKE_OUTPUT_TOKENS) -> str:
+    """
+    Default reply for a prompt, shaped like the real model's answer.
+
+    Args:
+        prompt: Prompt text
+        output_tokens: Approximate length of free-text replies
+
+    Returns:
+        JSON for the idea and per-photo analysis prompts, prose otherwise
+    """
+    photos = re.search(r'There are (\d+) photos', prompt)
+    if photos and 'OUTPUT A JSON ARRAY OF STRINGS' in prompt:
+        count = int(photos.group(1))
+        words = max(1, int(output_tokens * 0.75 / count))
+        return json.dumps([' '.join(FILLER[i % len(FILLER)] for i in range(words))] * count)
+    if 'OUTPUT A JSON ARRAY' in prompt:
+        sessions = re.findall(r'^\s+\d+\.\s+([A-Z][a-z]+ \d{1,2}, \d{4})\s*$', prompt, re.MULTILINE)
+        return "```json\n" + json.dumps([_idea(date.strip(), i) for i, date in enumerate(sessions)]) + "\n```"
+    if 'OUTPUT JSON ONLY' in prompt:
+        match = re.search(r'"date":\s*"([^"]*)"', prompt)
+        return json.dumps(_idea(match.group(1) if match else '', 0))
+
+    words = max(1, int(output_tokens * 0.75))
+    return ' '.join(FILLER[i % len(FILLER)] for i in range(words))
+
+
+class FakeModel:
+    """Drop-in for GenerativeModel.generate_content with scripted latency and tokens."""
+
+    def __init__(self, model_name: str, latency_ms: float = FAKE_LATENCY_MS, jitter_ms: float = FAKE_JITTER_MS,
+                 ms_per_token: float = FAKE_MS_PER_TOKEN, output_tokens: int = FAKE_OUTPUT_TOKENS,
+                 script: Optional[Callable[[str], str]] = None):
+        """
+        Create a fake model.
+
+        Args:
+            model_name: Model name (only reported)
+            latency_ms: Time to first token
+            jitter_ms: Random extra latency (0 to jitter_ms)
+            ms_per_token: Generation time per output token
+            output_tokens: Length of free-text replies
+            script: Custom reply function prompt -> text (default: scripted_reply)
+        """
+        self.model_name = model_name
+        self.cached_content = None
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_token = ms_per_token
+        self.output_tokens = output_tokens
+        self.script = script
+        self.calls = 0
+
+    def _reply(self, contents) -> FakeResponse:
+        prompt = prompt_text(contents)
+        text = self.script(prompt) if self.script else scripted_reply(prompt, self.output_tokens)
+        return FakeResponse(text, UsageMetadata(estimate_tokens(prompt), estimate_tokens(text)))
+
+    def _stream(self, response: FakeResponse, chunks: List[str]) -> Iterator[FakeResponse]:
+        per_chunk = response.usage_metadata.candidates_token_count / len(chunks)
+        for chunk in chunks:
+            time.sleep(per_chunk * self.ms_per_token / 1000)
+            yield FakeResponse(chunk, response.usage_metadata)
+
+    def generate_content(self, contents, stream: bool = False, request_options: Optional[Dict] = None, **kwargs):
+        """Sleep like a real request, then return the scripted reply (or a stream of it)."""
+        self.calls += 1
+        response = self._reply(contents)
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        if stream:
+            words = response.text.split(' ')
+            chunks = [' '.join(words[i:i + 20]) + ' ' for i in range(0, len(words), 20)]
+            return self._stream(response, chunks)
+
+        time.sleep(response.usage_metadata.candidates_token_count * self.ms_per_token / 1000)
+        return response
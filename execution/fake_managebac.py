@@ -0,0 +1,270 @@
+"""
+Local stand-in for ManageBac, for offline benchmarks.
+Serves the pages the submitter walks through - login, home with the CAS
+link, the CAS reflections page with its "Journal" button, the Journal form
+and the "Add Entry" post - with a configurable delay per kind of request,
+and keeps the posted entries in memory.
+
+Usage:
+    python execution/fake_managebac.py [--port 8765] [--latency-ms 50] [--submit-latency-ms 300]
+"""
+
+import json
+import time
+import uuid
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from submit_to_managebac import OUTCOME_MAP
+
+REFLECTIONS_PATH = '/student/ib/activity/cas/1/reflections'
+ROUTE_KINDS = ('login', 'page', 'form', 'submit')
+
+LOGIN_PAGE = """<!doctype html><html><head><title>Sign in</title></head><body>
+<h1>Sign in to ManageBac</h1>{error}
+<form method="post" action="/login">
+  <input type="email" name="username" placeholder="Email">
+  <input type="password" name="password" placeholder="Password">
+  <button type="submit">Sign in</button>
+</form></body></html>"""
+
+HOME_PAGE = """<!doctype html><html><head><title>Dashboard</title></head><body>
+<nav><a href="/student">Home</a> <a href="/student/ib/activity/cas">CAS</a></nav>
+<h1>Dashboard</h1></body></html>"""
+
+CAS_PAGE = f"""<!doctype html><html><head><title>CAS</title></head><body>
+<h1>CAS Experiences</h1><a href="{REFLECTIONS_PATH}">Resala Charity</a></body></html>"""
+
+REFLECTIONS_PAGE = f"""<!doctype html><html><head><title>Reflections</title></head><body>
+<h1>Resala Charity - Reflections</h1>
+<a href="#" id="journal">Journal</a>
+<div id="form"></div>
+<ul id="entries"></ul>
+<script>
+document.getElementById('journal').addEventListener('click', async (event) => {{
+  event.preventDefault();
+  const response = await fetch('{REFLECTIONS_PATH}/journal_form');
+  document.getElementById('form').innerHTML = await response.text();
+}});
+document.addEventListener('click', async (event) => {{
+  if (event.target.id !== 'add-entry') return;
+  const outcomes = [...document.querySelectorAll('#form input[type=checkbox]:checked')].map(el => el.value);
+  const response = await fetch('{REFLECTIONS_PATH}/entries', {{
+    method: 'POST',
+    headers: {{'Content-Type': 'application/json'}},
+    body: JSON.stringify({{text: document.getElementById('editor').innerHTML, outcomes}})
+  }});
+  if (response.ok) {{
+    document.getElementById('form').innerHTML = '';
+    document.getElementById('entries').insertAdjacentHTML('beforeend', '<li>Entry added</li>');
+  }}
+}});
+</script></body></html>"""
+
+
+def journal_form() -> str:
+    """The Journal editor with the learning outcome checkboxes and "Add Entry"."""
+    outcomes = "\n".join(f'<label><input type="checkbox" value="{number}">{text}</label><br>'
+                         for number, text in OUTCOME_MAP.items())
+    return f"""<div contenteditable="true" id="editor"></div>
+<fieldset>{outcomes}</fieldset>
+<button type="button" id="add-entry">Add Entry</button>"""
+
+
+class FakeManageBac:
+    """The fake server, running in a background thread."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0,
+                 route_latency_ms: Optional[Dict[str, float]] = None,
+                 username: Optional[str] = None, password: Optional[str] = None):
+        """
+        Configure the server.
+
+        Args:
+            host: Interface to listen on
+            port: Port (0 = pick a free one)
+            latency_ms: Delay before every response
+            route_latency_ms: Delay per kind of request ("login", "page", "form",
+                              "submit"), overriding latency_ms
+            username: Accepted username (None = any)
+            password: Accepted password (None = any)
+        """
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.route_latency_ms = dict(route_latency_ms or {})
+        self.username = username
+        self.password = password
+
+        self.entries: List[Dict] = []
+        self.sessions = set()
+        self.stats = {'requests': 0, 'logins': 0, 'entries': 0}
+        self.lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def reflections_url(self) -> str:
+        return self.url + REFLECTIONS_PATH
+
+    def account(self, name: str) -> Dict:
+        """Roster-style account pointing at this server (see multi_account_submitter.load_roster)."""
+        return {
+            'name': name,
+            'username': self.username or f"{name}@example.com",
+            'password': self.password or 'benchmark',
+            'managebac_url': self.url,
+            'reflections_url': self.reflections_url
+        }
+
+    def delay(self, kind: str):
+        """Sleep for the configured latency of a kind of request."""
+        latency = self.route_latency_ms.get(kind, self.latency_ms)
+        if latency > 0:
+            time.sleep(latency / 1000)
+
+    def start(self) -> 'FakeManageBac':
+        """Start serving in a daemon thread."""
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-managebac', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'FakeManageBac':
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+def _make_handler(site: FakeManageBac):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *_):
+            pass
+
+        def _session(self) -> Optional[str]:
+            for cookie in self.headers.get('Cookie', '').split(';'):
+                name, _, value = cookie.strip().partition('=')
+                if name == 'session' and value in site.sessions:
+                    return value
+            return None
+
+        def _send(self, status: int, body: str = '', content_type: str = 'text/html',
+                  headers: Optional[Dict[str, str]] = None):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _redirect(self, location: str, headers: Optional[Dict[str, str]] = None):
+            self._send(303, headers=dict(headers or {}, Location=location))
+
+        def do_GET(self):
+            with site.lock:
+                site.stats['requests'] += 1
+            path = self.path.split('?')[0].rstrip('/') or '/'
+
+            if path == '/__stats':
+                with site.lock:
+                    stats = dict(site.stats)
+                return self._send(200, json.dumps(stats), 'application/json')
+            if path == '/login':
+                site.delay('page')
+                return self._send(200, LOGIN_PAGE.format(error=''))
+            if not self._session():
+                return self._redirect('/login')
+
+            if path == REFLECTIONS_PATH + '/journal_form':
+                site.delay('form')
+                return self._send(200, journal_form())
+            site.delay('page')
+            pages = {'/student': HOME_PAGE, '/student/ib/activity/cas': CAS_PAGE,
+                     REFLECTIONS_PATH: REFLECTIONS_PAGE}
+            if path == '/':
+                return self._redirect('/student')
+            if path in pages:
+                return self._send(200, pages[path])
+            self._send(404, '<h1>Not found</h1>')
+
+        def do_POST(self):
+            with site.lock:
+                site.stats['requests'] += 1
+            path = self.path.split('?')[0].rstrip('/')
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0) or 0)).decode('utf-8')
+
+            if path == '/login':
+                site.delay('login')
+                form = {k: v[0] for k, v in parse_qs(body).items()}
+                if ((site.username and form.get('username') != site.username)
+                        or (site.password and form.get('password') != site.password)):
+                    return self._send(200, LOGIN_PAGE.format(error='<p>Invalid email or password</p>'))
+                token = uuid.uuid4().hex
+                with site.lock:
+                    site.sessions.add(token)
+                    site.stats['logins'] += 1
+                return self._redirect('/student', {'Set-Cookie': f'session={token}; Path=/; HttpOnly'})
+
+            if path == REFLECTIONS_PATH + '/entries':
+                if not self._session():
+                    return self._send(401, json.dumps({'error': 'not logged in'}), 'application/json')
+                site.delay('submit')
+                try:
+                    entry = json.loads(body or '{}')
+                except ValueError:
+                    return self._send(400, json.dumps({'error': 'invalid JSON'}), 'application/json')
+                with site.lock:
+                    site.entries.append(entry)
+                    site.stats['entries'] += 1
+                    entry_id = len(site.entries)
+                return self._send(201, json.dumps({'id': entry_id}), 'application/json')
+
+            self._send(404, '<h1>Not found</h1>')
+
+    return Handler
+
+
+def main():
+    """Run the fake server until Ctrl+C."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Local fake ManageBac for benchmarks')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay before every response')
+    for kind in ROUTE_KINDS:
+        parser.add_argument(f'--{kind}-latency-ms', type=float, help=f'Delay for {kind} requests')
+    args = parser.parse_args()
+
+    route_latency = {kind: getattr(args, f'{kind}_latency_ms') for kind in ROUTE_KINDS
+                     if getattr(args, f'{kind}_latency_ms') is not None}
+    site = FakeManageBac(port=args.port, latency_ms=args.latency_ms, route_latency_ms=route_latency).start()
+    print(f"🧪 Fake ManageBac running at {site.url}")
+    print(f"   MANAGEBAC_URL={site.url}")
+    print(f"   MANAGEBAC_REFLECTIONS_URL={site.reflections_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+        print(f"\n🛑 Stopped ({site.stats['entries']} entries posted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Shared Gemini client used by every script that calls the API.
+Models are created on first use; requests pass through a per-model token
+bucket, are retried with exponential backoff and jitter on 429/5xx errors,
+can opt in to sharing one call while an identical request is in flight,
+and have a per-call timeout. The SDK itself is imported on first use, so importing
+this module (and the scripts built on it) stays cheap. GEMINI_BACKEND=fake
+(or set_backend) swaps the SDK for the scripted models in fake_gemini.py.
+"""
+
+import os
+import re
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+from dotenv import load_dotenv
+from tracing import span
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+# Load environment variables
+load_dotenv()
+
+# Configuration (per-model overrides: GEMINI_RPM_<MODEL>, e.g. GEMINI_RPM_GEMINI_2_5_PRO=5)
+DEFAULT_RPM = float(os.getenv('GEMINI_RPM', '10'))
+DEFAULT_BURST = int(os.getenv('GEMINI_BURST', '2'))
+MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '4'))
+BACKOFF_SECONDS = float(os.getenv('GEMINI_BACKOFF_SECONDS', '2'))
+BACKOFF_MAX_SECONDS = float(os.getenv('GEMINI_BACKOFF_MAX_SECONDS', '60'))
+REQUEST_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT_SECONDS', '120'))
+# "genai" = the Gemini API; "fake" = fake_gemini.FakeModel (offline benchmarks)
+BACKEND = os.getenv('GEMINI_BACKEND', 'genai')
+
+# Quota, overload and server errors are worth retrying; bad requests are not.
+# google.api_core exceptions carry the HTTP status in .code
+# (ResourceExhausted 429, ServiceUnavailable 503, DeadlineExceeded 504, ...)
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = (ConnectionError, TimeoutError)
+
+_lock = threading.Lock()
+_genai = None
+_configured = False
+_models: Dict[str, 'genai.GenerativeModel'] = {}
+_buckets: Dict[str, 'TokenBucket'] = {}
+# Model factory replacing the SDK (see set_backend)
+_backend: Optional[Callable[[str], object]] = None
+# Request key -> Future of the request currently being sent
+_inflight: Dict[str, Future] = {}
+
+
+class TokenBucket:
+    """Token bucket allowing `rate_per_minute` requests with bursts up to `capacity` (thread-safe)."""
+
+    def __init__(self, rate_per_minute: float, capacity: int = DEFAULT_BURST):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent (no limit if the rate is 0)."""
+        if self.rate <= 0:
+            return
+
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def sdk():
+    """Import the Gemini SDK on first use (importing it takes about half a second)."""
+    global _genai
+    if _genai is None:
+        import google.generativeai
+        _genai = google.generativeai
+    return _genai
+
+
+def configure():
+    """Import the SDK and configure the API key (once per process)."""
+    global _configured
+    genai = sdk()
+    with _lock:
+        if not _configured:
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            _configured = True
+
+
+def set_backend(factory: Optional[Callable[[str], object]]):
+    """
+    Create models with factory(model_name) instead of the SDK (None = the SDK).
+
+    Models created so far are dropped. The factory's objects need a
+    generate_content(contents, stream=..., request_options=...) method.
+
+    Args:
+        factory: Model factory, e.g. fake_gemini.FakeModel
+    """
+    global _backend
+    with _lock:
+        _backend = factory
+        _models.clear()
+
+
+def backend() -> Optional[Callable[[str], object]]:
+    """Model factory in use instead of the SDK, or None (GEMINI_BACKEND=fake selects fake_gemini)."""
+    global _backend
+    if _backend is None and BACKEND == 'fake':
+        from fake_gemini import FakeModel
+        _backend = FakeModel
+    return _backend
+
+
+def get_model(model_name: str) -> 'genai.GenerativeModel':
+    """
+    Get the (memoized) model object, configuring the API on first use.
+
+    Args:
+        model_name: Gemini model name (e.g. "gemini-2.5-flash")
+
+    Returns:
+        GenerativeModel (or the backend's model)
+    """
+    factory = backend()
+    if factory is None:
+        configure()
+    with _lock:
+        if model_name not in _models:
+            _models[model_name] = factory(model_name) if factory else sdk().GenerativeModel(model_name)
+        return _models[model_name]
+
+
+def model_rate(model_name: str) -> float:
+    """Requests per minute allowed for a model (GEMINI_RPM_<MODEL> or GEMINI_RPM)."""
+    env_name = 'GEMINI_RPM_' + re.sub(r'[^A-Z0-9]+', '_', model_name.upper()).strip('_')
+    return float(os.getenv(env_name, DEFAULT_RPM))
+
+
+def get_bucket(model_name: str) -> TokenBucket:
+    """Get the shared rate limiter for a model."""
+    with _lock:
+        if model_name not in _buckets:
+            _buckets[model_name] = TokenBucket(model_rate(model_name))
+        return _buckets[model_name]
+
+
+def set_rate_limit(model_name: str, rate_per_minute: float, burst: int = DEFAULT_BURST):
+    """
+    Override the request rate for a model in this process.
+
+    Args:
+        model_name: Gemini model name
+        rate_per_minute: Requests per minute (0 = unlimited)
+        burst: Requests that may be sent back to back
+    """
+    with _lock:
+        _buckets[model_name] = TokenBucket(rate_per_minute, burst)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Check whether an API error is transient (quota, overload, server error, timeout)."""
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (1, 2, ...)."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * 2 ** attempt))
+
+
+def request_key(model_name: str, contents) -> str:
+    """
+    Hash a request so identical concurrent requests can share one API call.
+
+    Args:
+        model_name: Gemini model name
+        contents: Prompt text, or a list of text parts and image blobs
+
+    Returns:
+        Hex key
+    """
+    key = hashlib.sha256(model_name.encode('utf-8'))
+    parts = contents if isinstance(contents, list) else [contents]
+    for part in parts:
+        if isinstance(part, dict):
+            key.update(str(part.get('mime_type', '')).encode('utf-8'))
+            data = part.get('data', b'')
+            key.update(data if isinstance(data, bytes) else str(data).encode('utf-8'))
+        else:
+            key.update(str(part).encode('utf-8'))
+        key.update(b'\0')
+    return key.hexdigest()
+
+
+def _send(model_name: str, contents, model: Optional['genai.GenerativeModel'], stream: bool,
+          timeout: float, max_retries: int):
+    """Send one request through the rate limiter, retrying transient errors."""
+    gen_model = model or get_model(model_name)
+    bucket = get_bucket(model_name)
+
+    attempt = 0
+    while True:
+        with span('gemini.wait', model=model_name):
+            bucket.acquire()
+        try:
+            with span('gemini.request', model=model_name, attempt=attempt + 1, stream=stream) as s:
+                response = gen_model.generate_content(
+                    contents, stream=stream, request_options={'timeout': timeout}
+                )
+                usage = None if stream else getattr(response, 'usage_metadata', None)
+                if usage is not None:
+                    s.set(prompt_tokens=getattr(usage, 'prompt_token_count', None),
+                          output_tokens=getattr(usage, 'candidates_token_count', None))
+            return response
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            print(f"  ⏳ {model_name}: {type(e).__name__}, retrying in {delay:.1f}s ({attempt}/{max_retries})")
+            time.sleep(delay)
+
+
+def generate(
+    model_name: str,
+    contents,
+    model: Optional['genai.GenerativeModel'] = None,
+    stream: bool = False,
+    timeout: float = REQUEST_TIMEOUT,
+    max_retries: int = MAX_RETRIES,
+    dedup: bool = False
+):
+    """
+    Call generate_content with rate limiting, retries, optional deduplication and a timeout.
+
+    With dedup, identical non-streaming requests made at the same time (same
+    model and contents) are sent once and share the response. Only use it for
+    deterministic calls such as image analysis: creative prompts (ideas,
+    reflections) must get their own answer for each caller, even when two
+    students send the same prompt.
+
+    Args:
+        model_name: Gemini model name (selects the rate limit)
+        contents: Prompt text, or a list of text parts and image blobs
+        model: Model object to use instead of get_model(model_name)
+               (e.g. one bound to a cached context)
+        stream: Return a streaming response (only the initial request is retried)
+        timeout: Seconds before a single attempt is abandoned
+        max_retries: Retries after the first attempt for transient errors
+        dedup: Share the response with identical requests in flight
+
+    Returns:
+        Gemini response
+    """
+    if stream or not dedup:
+        return _send(model_name, contents, model, stream, timeout, max_retries)
+
+    key = request_key(model_name + (getattr(model, 'cached_content', None) or ''), contents)
+    with _lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = Future()
+            _inflight[key] = future
+
+    if not leader:
+        return future.result()
+
+    try:
+        response = _send(model_name, contents, model, stream, timeout, max_retries)
+        future.set_result(response)
+        return response
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
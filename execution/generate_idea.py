@@ -5,17 +5,27 @@ Invents plausible next sessions for the project based on training data.
 
 import os
 import json
+import time
 import datetime
 from pathlib import Path
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
+from gemini_client import generate
+from prompt_builder import PromptBuilder
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel(os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'))
+# Gemini model (requests go through gemini_client)
+MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
+IDEA_FILE = Path(".tmp/generated_idea.json")
+
+EXAMPLE_ACTIVITIES = """Examples of activities:
+    - Sorting winter clothes for distribution
+    - Packing Ramadan food boxes
+    - Organizing the warehouse shelves
+    - Labeling donation bags
+    - Coordinating with new volunteers"""
 
 def load_context() -> str:
     """Load project context from training data (optional)."""
@@ -41,28 +51,56 @@ def load_context() -> str:
     - Supporting various community outreach programs
     This project focuses on Service learning outcomes and developing organizational skills."""
 
-def generate_idea() -> dict:
-    """Generate a new valid activity idea."""
+def build_context_section() -> str:
+    """Project context section of the idea prompts."""
+    return f"""
+    CONTEXT:
+    Student is doing a CAS project:
+    {load_context()}"""
+
+def request_json(builder: PromptBuilder):
+    """
+    Send a prompt and parse the JSON in the reply.
+    
+    Args:
+        builder: Prompt to send (the call is logged to the prompt stats)
+        
+    Returns:
+        Parsed JSON (code fences around it are stripped)
+    """
+    start = time.perf_counter()
+    try:
+        response = generate(MODEL_NAME, builder.build())
+    except Exception as e:
+        builder.log_call(time.perf_counter() - start, error=str(e))
+        raise
+    builder.log_call(time.perf_counter() - start, response)
+    text = response.text.strip()
+    # Clean up json block if present
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0]
+    return json.loads(text)
+
+def generate_idea(output_file: Path = IDEA_FILE) -> dict:
+    """
+    Generate a new valid activity idea.
+    
+    Args:
+        output_file: Where the idea is saved
+    """
     print("💡 Generating new activity idea...")
     
-    context = load_context()
     today = datetime.datetime.now().strftime("%B %d, %Y")
+    context_section = build_context_section()
     
-    prompt = f"""
-    CONTEXT:
-    Student is doing a CAS project:
-    {context}
-    
+    task_section = f"""
     TASK:
     Invent a REALISTIC, SPECIFIC activity for the "next session" of this project.
     It should be something they plausibly did today ({today}).
     
-    Examples of activities:
-    - Sorting winter clothes for distribution
-    - Packing Ramadan food boxes
-    - Organizing the warehouse shelves
-    - Labeling donation bags
-    - Coordinating with new volunteers
+    {EXAMPLE_ACTIVITIES}
     
     REQUIREMENTS:
     1. "description": 1 sentence describing what was done today. Be specific (e.g., "Sorted 50 bags", "Fixed the labeling system").
@@ -80,20 +118,16 @@ def generate_idea() -> dict:
     }}
     """
     
+    # The project context can be trimmed to fit the budget; the task cannot
+    builder = PromptBuilder('idea')
+    builder.add('context', context_section, priority=1)
+    builder.add('task', task_section, required=True)
+    
     try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
-        # Clean up json block if present
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-            
-        data = json.loads(text)
+        data = request_json(builder)
         
         # Save to file
-        output_file = Path(".tmp/generated_idea.json")
-        os.makedirs(".tmp", exist_ok=True)
+        os.makedirs(output_file.parent, exist_ok=True)
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2)
             
@@ -104,5 +138,90 @@ def generate_idea() -> dict:
         print(f"❌ Error generating idea: {e}")
         return None
 
+def parse_date(value) -> Optional[datetime.date]:
+    """Parse a session date as the model writes it ("March 05, 2025" or "2025-03-05")."""
+    for fmt in ("%B %d, %Y", "%b %d, %Y", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def generate_ideas(dates: List[datetime.date]) -> List[dict]:
+    """
+    Generate one activity idea per date in a single request (for backfilling).
+    
+    Args:
+        dates: Session dates, oldest first
+        
+    Returns:
+        Ideas in date order, matched to the dates by the "date" the model
+        returned; empty on failure. Dates the model left out (or answered
+        with an unrecognised date) are missing from the list.
+    """
+    if not dates:
+        return []
+    print(f"💡 Generating {len(dates)} activity ideas in one request...")
+    
+    labels = [d.strftime("%B %d, %Y") for d in dates]
+    session_list = "\n".join(f"    {i + 1}. {label}" for i, label in enumerate(labels))
+    task_section = f"""
+    TASK:
+    Invent a REALISTIC, SPECIFIC activity for each of these sessions of the project:
+{session_list}
+    Each session should continue from the previous one; do not repeat activities.
+    
+    {EXAMPLE_ACTIVITIES}
+    
+    REQUIREMENTS (for each session):
+    1. "description": 1 sentence describing what was done that day. Be specific (e.g., "Sorted 50 bags", "Fixed the labeling system").
+    2. "duration": Number of hours (between 2 and 4).
+    3. "strand": Always "Service".
+    4. "learning_outcomes": Select 2-3 relevant outcome numbers (1-7).
+    
+    OUTPUT A JSON ARRAY ONLY, one object per session in the same order:
+    [
+        {{
+            "description": "...",
+            "date": "{labels[0]}",
+            "duration": 3,
+            "cas_strand": "Service",
+            "learning_outcomes": ["1", "4"]
+        }}
+    ]
+    """
+    
+    builder = PromptBuilder('ideas_batch')
+    builder.add('context', build_context_section(), priority=1)
+    builder.add('task', task_section, required=True)
+    
+    try:
+        data = request_json(builder)
+    except Exception as e:
+        print(f"❌ Error generating ideas: {e}")
+        return []
+    
+    if not isinstance(data, list):
+        print("❌ Error generating ideas: expected a JSON array")
+        return []
+    
+    # Match by the returned date, not by position: a dropped entry must not
+    # shift every later idea onto the wrong session
+    by_date: Dict[datetime.date, List[dict]] = {}
+    for idea in data:
+        if isinstance(idea, dict) and idea.get('description'):
+            day = parse_date(idea.get('date'))
+            if day is not None:
+                by_date.setdefault(day, []).append(idea)
+    
+    ideas = []
+    for day, label in zip(dates, labels):
+        if by_date.get(day):
+            idea = by_date[day].pop(0)
+            idea['date'] = label
+            ideas.append(idea)
+    print(f"✅ {len(ideas)}/{len(dates)} ideas generated")
+    return ideas
+
 if __name__ == "__main__":
     generate_idea()
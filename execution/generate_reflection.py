@@ -5,86 +5,111 @@ Learns from past reflections and creates personalized, authentic reflections.
 
 import os
 import json
+import time
+import datetime
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from gemini_client import backend, configure, generate, sdk, set_rate_limit
+from prompt_builder import PromptBuilder, estimate_tokens
+from example_retrieval import TfidfIndex, fits_budget, leading_within_budget, select_examples
+from training_corpus import get_corpus
+from tracing import span
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel(os.getenv('GEMINI_MODEL', 'gemini-2.5-pro'))
+# Gemini model (requests go through gemini_client)
+MODEL_NAME = os.getenv('GEMINI_MODEL', 'gemini-2.5-pro')
+
+# Context caching: the training block (description, outcomes and as many
+# examples as fit TRAINING_CONTEXT_CACHE_MAX_TOKENS) is uploaded once and
+# reused by later calls; examples beyond the cap are retrieved per call. It
+# only turns on once that block reaches the minimum size below; smaller
+# corpora are sent in the prompt (all examples if they fit the example
+# budget, else the retrieved ones)
+CONTEXT_CACHE_ENABLED = os.getenv('TRAINING_CONTEXT_CACHE', 'true').lower() in ('1', 'true', 'yes')
+CONTEXT_CACHE_TTL_MINUTES = int(os.getenv('TRAINING_CONTEXT_CACHE_TTL_MINUTES', '60'))
+# Gemini rejects cached contents below a model-specific minimum size
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv('TRAINING_CONTEXT_CACHE_MIN_TOKENS', '4096'))
+# The cached block stays bounded however large the corpus grows
+CONTEXT_CACHE_MAX_TOKENS = int(os.getenv('TRAINING_CONTEXT_CACHE_MAX_TOKENS', '8192'))
+CONTEXT_CACHE_FILE = Path(".tmp/training_context_cache.json")
+
+# Batch generation: concurrent requests (the request rate is limited by gemini_client)
+BATCH_WORKERS = int(os.getenv('REFLECTION_BATCH_WORKERS', '4'))
+BATCH_OUTPUT_FILE = Path(".tmp/generated_reflections.jsonl")
+
+# Artifacts shared with the other scripts
+IMAGE_ANALYSIS_FILE = Path(".tmp/image_analysis.json")
+REFLECTION_FILE = Path(".tmp/generated_reflection.json")
+REFLECTION_TEXT_FILE = Path(".tmp/generated_reflection.txt")
+
+# Learning outcome names, used to find examples that practised the same outcomes
+LEARNING_OUTCOME_NAMES = {
+    '1': "strengths growth",
+    '2': "challenges new skills",
+    '3': "initiate plan",
+    '4': "commitment perseverance",
+    '5': "collaboration teamwork working together",
+    '6': "global significance community",
+    '7': "ethics choices actions"
+}
+
+EXAMPLES_HEADER = "EXAMPLE REFLECTIONS (learn the writing style):\n"
+
+# In-process memo: fingerprint -> training context (see get_training_context)
+_training_context_memo: Dict[str, Dict] = {}
+# In-process memo: fingerprint -> model bound to the cached context (None = caching unavailable)
+_cached_models: Dict[str, Optional['genai.GenerativeModel']] = {}
+
+
+def get_training_path() -> Path:
+    """Folder holding the text training files."""
+    return Path(os.getenv('TRAINING_DATA_PATH', 'Resala CAS Project trainng')) / 'Text training'
 
 
 def load_training_data() -> Dict:
-    """Load training data from the Resala CAS Project folder."""
-    training_path = Path(os.getenv('TRAINING_DATA_PATH', 'Resala CAS Project trainng'))
-    text_path = training_path / 'Text training'
-    
-    training_data = {
-        'description': '',
-        'reflections': [],
-        'learning_outcomes': ''
-    }
-    
-    # Load description
-    desc_file = text_path / 'Description and goals.txt'
-    if desc_file.exists():
-        with open(desc_file, 'r', encoding='utf-8') as f:
-            training_data['description'] = f.read()
-    
-    # Load reflections
-    for i in range(1, 10):  # Try reflection 1-9
-        ref_file = text_path / f'Reflection {i}.txt'
-        ref_file_lower = text_path / f'reflection {i}.txt'
-        
-        if ref_file.exists():
-            with open(ref_file, 'r', encoding='utf-8') as f:
-                training_data['reflections'].append(f.read())
-        elif ref_file_lower.exists():
-            with open(ref_file_lower, 'r', encoding='utf-8') as f:
-                training_data['reflections'].append(f.read())
-    
-    # Load learning outcomes
-    lo_file = text_path / 'learning outcomes.txt'
-    if lo_file.exists():
-        with open(lo_file, 'r', encoding='utf-8') as f:
-            training_data['learning_outcomes'] = f.read()
+    """
+    Load training data from the Resala CAS Project folder.
     
-    return training_data
+    Files are discovered by glob (any number of "Reflection N.txt" files)
+    and only files changed since the last call are re-read.
+    """
+    return get_corpus(get_training_path()).load()
 
 
-def generate_reflection(
-    activity_description: str,
-    image_analysis: Optional[str] = None,
-    learning_outcomes: Optional[List[str]] = None,
-    date: Optional[str] = None,
-    cas_strand: str = "Service",
-    duration_hours: Optional[float] = None
-) -> Dict:
+def training_fingerprint() -> str:
     """
-    Generate a CAS reflection based on activity details.
+    Fingerprint of the training corpus (file names + content hashes).
     
-    Args:
-        activity_description: Brief description of what you did
-        image_analysis: Optional analysis from analyze_cas_images.py
-        learning_outcomes: List of learning outcome numbers (e.g., ["1", "2", "5"])
-        date: Date of activity (e.g., "November 20, 2025")
-        cas_strand: "Creativity", "Activity", or "Service"
-        duration_hours: How many hours spent
-        
-    Returns:
-        Dictionary with generated reflection
+    Changes whenever a training file is added, removed or edited, which
+    invalidates the memoized context and the server-side cache.
     """
-    print("🤖 Generating CAS reflection...")
-    
-    # Load training data
-    training_data = load_training_data()
-    print(f"📚 Loaded {len(training_data['reflections'])} example reflections")
+    return get_corpus(get_training_path()).fingerprint()
+
+
+def format_examples(reflections: List[str]) -> str:
+    """Format example reflections for the prompt."""
+    text = EXAMPLES_HEADER
+    for i, reflection in enumerate(reflections, 1):
+        text += f"\n--- Example {i} ---\n{reflection}\n"
+    return text
+
+
+def build_training_context(training_data: Dict, include_examples: bool = True,
+                           max_examples: Optional[int] = None) -> str:
+    """
+    Build the static training block shared by every reflection prompt.
     
-    # Build context from training data
+    max_examples keeps only the first examples (None = all of them).
+    """
     training_context = f"""
 TRAINING DATA - Learn from these examples:
 
@@ -94,37 +119,165 @@ PROJECT DESCRIPTION:
 LEARNING OUTCOMES:
 {training_data['learning_outcomes']}
 
-EXAMPLE REFLECTIONS (learn the writing style):
 """
     
-    for i, reflection in enumerate(training_data['reflections'], 1):
-        training_context += f"\n--- Example {i} ---\n{reflection}\n"
+    if include_examples:
+        training_context += format_examples(training_data['reflections'][:max_examples])
     
-    # Build the generation prompt
-    prompt = f"""{training_context}
+    return training_context
 
----
 
-Now, write a NEW CAS reflection based on this activity:
+def get_training_context() -> Dict:
+    """
+    Load the training block, reusing it while the training files are unchanged.
+    
+    "context" is the block sent without a cache: every example when they all
+    fit the example budget, otherwise only the description and outcomes, with
+    examples retrieved per activity from "index". "cache_context" is what gets
+    context-cached: the same block plus the first "cached_examples" examples
+    that fit CONTEXT_CACHE_MAX_TOKENS.
+    
+    Returns:
+        {"fingerprint", "context", "cache_context", "cached_examples", "reflections",
+         "index" (TfidfIndex or None)}
+    """
+    fingerprint = training_fingerprint()
+    if fingerprint not in _training_context_memo:
+        with span('training.load') as s:
+            training_data = load_training_data()
+            reflections = training_data['reflections']
+            static_examples = fits_budget(reflections)
+            base_tokens = estimate_tokens(build_training_context(training_data, include_examples=False))
+            cached_examples = len(reflections) if static_examples else leading_within_budget(
+                reflections, CONTEXT_CACHE_MAX_TOKENS - base_tokens)
+            
+            _training_context_memo.clear()
+            _training_context_memo[fingerprint] = {
+                'fingerprint': fingerprint,
+                'context': build_training_context(training_data, include_examples=static_examples),
+                'cache_context': build_training_context(training_data, include_examples=cached_examples > 0,
+                                                        max_examples=cached_examples),
+                'cached_examples': cached_examples,
+                'reflections': reflections,
+                'index': None if static_examples else TfidfIndex(reflections)
+            }
+            s.set(reflections=len(reflections))
+    
+    return _training_context_memo[fingerprint]
 
-ACTIVITY DETAILS:
-- Description: {activity_description}
-- Date: {date or 'Recent'}
-- CAS Strand: {cas_strand}
-- Duration: {duration_hours or 'N/A'} hours
-- Learning Outcomes: {', '.join(learning_outcomes) if learning_outcomes else 'To be determined'}
 
-"""
+def retrieve_examples(
+    training: Dict,
+    activity_description: str,
+    image_analysis: Optional[str] = None,
+    learning_outcomes: Optional[List[str]] = None,
+    cached_examples: int = 0
+) -> str:
+    """
+    Pick the example reflections closest to this activity.
     
-    if image_analysis:
-        prompt += f"""
-IMAGE ANALYSIS:
-{image_analysis}
+    Args:
+        training: Result of get_training_context()
+        activity_description: Brief description of what you did
+        image_analysis: Optional analysis from analyze_cas_images.py
+        learning_outcomes: List of learning outcome numbers
+        cached_examples: The first examples are already in the cached context (not repeated)
+        
+    Returns:
+        Formatted examples block ('' if every selected example is cached)
+    """
+    outcome_names = [LEARNING_OUTCOME_NAMES.get(str(lo), '') for lo in learning_outcomes or []]
+    query = ' '.join([activity_description, *outcome_names, image_analysis or ''])
+    
+    chosen = select_examples(training['index'], query)
+    new = [i for i in chosen if i >= cached_examples]
+    print(f"📚 Selected {len(chosen)} of {len(training['reflections'])} example reflections"
+          + (f" ({len(chosen) - len(new)} already cached)" if cached_examples else ""))
+    return format_examples([training['reflections'][i] for i in new]) if new else ''
 
-"""
+
+def _load_cache_record() -> Dict:
+    """Read the record of the server-side cache created by an earlier run."""
+    try:
+        with open(CONTEXT_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_cached_model(fingerprint: str, training_context: str) -> Optional['genai.GenerativeModel']:
+    """
+    Get a model whose prompt prefix is the cached training block.
+    
+    Reuses the cache created by an earlier run while it is alive and the
+    training files are unchanged; otherwise creates a new one. Returns None
+    (send the full prompt) when caching is disabled, a fake backend is in use,
+    the block is below the model's minimum cache size, or the API refuses.
+    
+    Args:
+        fingerprint: Fingerprint of the training files
+        training_context: The capped training block ("cache_context")
+        
+    Returns:
+        GenerativeModel bound to the cached content, or None
+    """
+    if not CONTEXT_CACHE_ENABLED or backend() is not None:
+        return None
+    if fingerprint in _cached_models:
+        return _cached_models[fingerprint]
     
-    prompt += """
-INSTRUCTIONS:
+    # A rough estimate avoids a request that would be rejected
+    if estimate_tokens(training_context) < CONTEXT_CACHE_MIN_TOKENS:
+        _cached_models[fingerprint] = None
+        return None
+    
+    configure()
+    from google.generativeai import caching
+    cached_content = None
+    record = _load_cache_record()
+    
+    try:
+        if record.get('fingerprint') == fingerprint and record.get('model') == MODEL_NAME:
+            expires = datetime.datetime.fromisoformat(record['expire_time'])
+            if expires.tzinfo is None:
+                expires = expires.replace(tzinfo=datetime.timezone.utc)
+            if expires > datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=1):
+                cached_content = caching.CachedContent.get(record['name'])
+                print("⚡ Reusing cached training context")
+        elif record.get('name'):
+            # Training files changed: drop the stale cache so it stops costing storage
+            try:
+                caching.CachedContent.get(record['name']).delete()
+            except Exception:
+                pass
+        
+        if cached_content is None:
+            cached_content = caching.CachedContent.create(
+                model=MODEL_NAME,
+                display_name=f"cas-training-{fingerprint[:12]}",
+                contents=[training_context],
+                ttl=datetime.timedelta(minutes=CONTEXT_CACHE_TTL_MINUTES)
+            )
+            os.makedirs(CONTEXT_CACHE_FILE.parent, exist_ok=True)
+            with open(CONTEXT_CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'fingerprint': fingerprint,
+                    'model': MODEL_NAME,
+                    'name': cached_content.name,
+                    'expire_time': cached_content.expire_time.isoformat()
+                }, f, indent=2)
+            print("⚡ Cached training context for later calls")
+        
+        cached_model = sdk().GenerativeModel.from_cached_content(cached_content)
+    except Exception as e:
+        print(f"⚠️  Context caching unavailable ({e}), sending full prompt")
+        cached_model = None
+    
+    _cached_models[fingerprint] = cached_model
+    return cached_model
+
+
+REFLECTION_INSTRUCTIONS = """INSTRUCTIONS:
 
 1. Write in the SAME STYLE as the example reflections above
 2. Match the tone, vocabulary level, and structure
@@ -141,15 +294,171 @@ INSTRUCTIONS:
 
 Write the reflection now:"""
 
+
+def build_reflection_prompt(
+    training: Dict,
+    examples: str,
+    activity_description: str,
+    image_analysis: Optional[str] = None,
+    learning_outcomes: Optional[List[str]] = None,
+    date: Optional[str] = None,
+    cas_strand: str = "Service",
+    duration_hours: Optional[float] = None,
+    cached: bool = False
+) -> PromptBuilder:
+    """
+    Assemble the reflection prompt from its sections.
+    
+    Trimming order under the token budget: image analysis, then retrieved
+    examples, then the training block. Activity details and instructions
+    are never trimmed.
+    
+    Args:
+        training: Result of get_training_context()
+        examples: Retrieved examples block ('' when the examples are in the training block)
+        cached: The capped training block is already in a server-side context cache
+        (other args as in generate_reflection)
+        
+    Returns:
+        PromptBuilder ready to build()
+    """
+    activity = f"""---
+
+Now, write a NEW CAS reflection based on this activity:
+
+ACTIVITY DETAILS:
+- Description: {activity_description}
+- Date: {date or 'Recent'}
+- CAS Strand: {cas_strand}
+- Duration: {duration_hours or 'N/A'} hours
+- Learning Outcomes: {', '.join(learning_outcomes) if learning_outcomes else 'To be determined'}"""
+    
+    builder = PromptBuilder('reflection')
+    builder.add('training', training['cache_context'] if cached else training['context'], priority=3, cached=cached)
+    builder.add('examples', examples, priority=2)
+    builder.add('activity', activity, required=True)
+    if image_analysis:
+        builder.add('image_analysis', f"IMAGE ANALYSIS:\n{image_analysis}", priority=1)
+    builder.add('instructions', REFLECTION_INSTRUCTIONS, required=True)
+    return builder
+
+
+def _request_reflection(builder: PromptBuilder, stream: bool = False,
+                        cached_model: Optional['genai.GenerativeModel'] = None) -> str:
+    """
+    Send the reflection prompt and log the call.
+    
+    Args:
+        builder: Prompt sections
+        stream: Print the text as it arrives instead of waiting for the whole response
+        cached_model: Model bound to the cached training context (None = plain model)
+        
+    Returns:
+        Reflection text
+    """
+    prompt = builder.build()
+    start = time.perf_counter()
     try:
-        # Generate reflection
-        response = model.generate_content(prompt)
-        reflection_text = response.text.strip()
+        if not stream:
+            response = generate(MODEL_NAME, prompt, model=cached_model)
+            text = response.text
+        else:
+            response = generate(MODEL_NAME, prompt, model=cached_model, stream=True)
+            print("\n✨ Reflection (streaming, Ctrl+C to stop):")
+            print("=" * 60)
+            parts = []
+            for chunk in response:
+                try:
+                    part = chunk.text
+                except ValueError:
+                    # Chunk without text (e.g. only the finish reason)
+                    continue
+                parts.append(part)
+                print(part, end='', flush=True)
+            print()
+            print("=" * 60)
+            text = ''.join(parts)
+    except BaseException as e:
+        # Also logs Ctrl+C, which stops the stream (and the billing) early
+        if stream:
+            print()
+        builder.log_call(time.perf_counter() - start, error=str(e) or type(e).__name__)
+        raise
+    
+    builder.log_call(time.perf_counter() - start, response)
+    return text.strip()
+
+
+def generate_reflection(
+    activity_description: str,
+    image_analysis: Optional[str] = None,
+    learning_outcomes: Optional[List[str]] = None,
+    date: Optional[str] = None,
+    cas_strand: str = "Service",
+    duration_hours: Optional[float] = None,
+    verbose: bool = True,
+    stream: bool = False
+) -> Dict:
+    """
+    Generate a CAS reflection based on activity details.
+    
+    Args:
+        activity_description: Brief description of what you did
+        image_analysis: Optional analysis from analyze_cas_images.py
+        learning_outcomes: List of learning outcome numbers (e.g., ["1", "2", "5"])
+        date: Date of activity (e.g., "November 20, 2025")
+        cas_strand: "Creativity", "Activity", or "Service"
+        duration_hours: How many hours spent
+        verbose: Print progress and the generated reflection
+        stream: Print the reflection as it is generated (Ctrl+C stops it early)
+        
+    Returns:
+        Dictionary with generated reflection
+    """
+    if verbose:
+        print("🤖 Generating CAS reflection...")
+    
+    # Load training data (memoized until a training file changes)
+    training = get_training_context()
+    fingerprint = training['fingerprint']
+    activity_args = (activity_description, image_analysis, learning_outcomes, date, cas_strand, duration_hours)
+    
+    try:
+        # Generate reflection (cached training prefix when available)
+        reflection_text = None
+        cached_model = get_cached_model(fingerprint, training['cache_context'])
+        if cached_model is not None:
+            cached_examples = training['cached_examples']
+            if verbose:
+                print(f"📚 {cached_examples} of {len(training['reflections'])} example reflections are cached")
+            examples = ''
+            if cached_examples < len(training['reflections']):
+                # Examples beyond the cap are retrieved as without a cache
+                examples = retrieve_examples(training, activity_description, image_analysis,
+                                             learning_outcomes, cached_examples)
+            builder = build_reflection_prompt(training, examples, *activity_args, cached=True)
+            try:
+                reflection_text = _request_reflection(builder, stream, cached_model)
+            except Exception as e:
+                print(f"⚠️  Cached context failed ({e}), sending full prompt")
+                _cached_models[fingerprint] = None
         
-        print("\n✨ Reflection Generated!")
-        print("=" * 60)
-        print(reflection_text)
-        print("=" * 60)
+        if reflection_text is None:
+            if training['index'] is None:
+                examples = ''
+                if verbose:
+                    print(f"📚 Loaded {len(training['reflections'])} example reflections")
+            else:
+                # Corpus too big for the prompt: send only the most similar examples
+                examples = retrieve_examples(training, activity_description, image_analysis, learning_outcomes)
+            builder = build_reflection_prompt(training, examples, *activity_args)
+            reflection_text = _request_reflection(builder, stream)
+        
+        if verbose and not stream:
+            print("\n✨ Reflection Generated!")
+            print("=" * 60)
+            print(reflection_text)
+            print("=" * 60)
         
         return {
             "success": True,
@@ -161,6 +470,12 @@ Write the reflection now:"""
             "duration_hours": duration_hours
         }
         
+    except KeyboardInterrupt:
+        print("\n⏹️  Generation stopped")
+        return {
+            "success": False,
+            "error": "Generation cancelled by user"
+        }
     except Exception as e:
         print(f"\n❌ Error generating reflection: {e}")
         return {
@@ -169,17 +484,209 @@ Write the reflection now:"""
         }
 
 
+def activity_arguments(activity: Dict) -> Dict:
+    """
+    Map an activity record to generate_reflection() arguments.
+    
+    Accepts the format written by generate_idea.py ("description", "date",
+    "cas_strand", "duration", "learning_outcomes") plus an optional
+    "image_analysis".
+    
+    Args:
+        activity: Activity record
+        
+    Returns:
+        Keyword arguments for generate_reflection()
+    """
+    description = activity.get('description') or activity.get('activity_description')
+    if not description:
+        raise ValueError("missing description")
+    
+    duration = activity.get('duration_hours', activity.get('duration'))
+    outcomes = [str(lo) for lo in activity.get('learning_outcomes') or []]
+    return {
+        'activity_description': description,
+        'image_analysis': activity.get('image_analysis'),
+        'learning_outcomes': outcomes or None,
+        'date': activity.get('date'),
+        'cas_strand': activity.get('cas_strand', 'Service'),
+        'duration_hours': float(duration) if duration not in (None, '') else None
+    }
+
+
+def generate_reflections_batch(
+    activities: List[Dict],
+    output_file: Optional[Path] = BATCH_OUTPUT_FILE,
+    max_workers: int = BATCH_WORKERS,
+    requests_per_minute: Optional[float] = None
+) -> List[Dict]:
+    """
+    Generate reflections for many activities in one pass.
+    
+    The training context (and its Gemini context cache) is loaded once and
+    shared; requests run concurrently under the shared Gemini rate limit, and
+    each result is appended to output_file as soon as it finishes.
+    
+    Args:
+        activities: Activity records (see activity_arguments)
+        output_file: JSONL file for the results (None = don't write)
+        max_workers: Concurrent Gemini requests
+        requests_per_minute: Override the model's rate limit (None = GEMINI_RPM settings, 0 = unlimited)
+        
+    Returns:
+        One result per activity, in input order, each with its "index"
+        (and the activity's "id" if it had one)
+    """
+    if not activities:
+        return []
+    
+    if requests_per_minute is not None:
+        set_rate_limit(MODEL_NAME, requests_per_minute)
+    print(f"🤖 Generating {len(activities)} reflections ({max_workers} workers)...")
+    
+    # Load once before the workers start so they all share it
+    training = get_training_context()
+    get_cached_model(training['fingerprint'], training['cache_context'])
+    print(f"📚 Loaded {len(training['reflections'])} example reflections")
+    
+    def run(index: int, activity: Dict) -> Dict:
+        # A JSONL line can hold any JSON value; only objects are activities
+        if not isinstance(activity, dict):
+            return {"index": index, "success": False,
+                    "error": f"Invalid activity: expected a JSON object, got {type(activity).__name__}"}
+        try:
+            kwargs = activity_arguments(activity)
+        except (AttributeError, TypeError, ValueError) as e:
+            result = {"success": False, "error": f"Invalid activity: {e}"}
+        else:
+            result = generate_reflection(**kwargs, verbose=False)
+        
+        result = {"index": index, **result}
+        if 'id' in activity:
+            result['id'] = activity['id']
+        return result
+    
+    results = []
+    out = None
+    if output_file:
+        os.makedirs(Path(output_file).parent, exist_ok=True)
+        out = open(output_file, 'w', encoding='utf-8')
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            # Each worker runs in a copy of the caller's context so its spans nest under the caller's
+            futures = [executor.submit(contextvars.copy_context().run, run, i, activity)
+                       for i, activity in enumerate(activities)]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                
+                if out:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+                
+                status = "✓" if result.get('success') else f"✗ {result.get('error')}"
+                print(f"  [{done}/{len(activities)}] #{result['index']} {status}")
+    finally:
+        if out:
+            out.close()
+    
+    succeeded = sum(1 for r in results if r.get('success'))
+    print(f"\n✅ {succeeded}/{len(activities)} reflections generated")
+    if output_file:
+        print(f"💾 Results saved to: {output_file}")
+    
+    return sorted(results, key=lambda r: r['index'])
+
+
+def load_activities(path: Path) -> List[Dict]:
+    """
+    Read activity records from a JSONL file (one JSON object per line).
+    
+    Args:
+        path: JSONL file
+        
+    Returns:
+        Activity records (blank lines are skipped)
+    """
+    activities = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                activities.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: {e}")
+    return activities
+
+
+def load_image_analysis(analysis_file: Path = IMAGE_ANALYSIS_FILE) -> Optional[str]:
+    """
+    Read the analysis saved by analyze_cas_images.py, if there is a successful one.
+    
+    Args:
+        analysis_file: Image analysis JSON
+        
+    Returns:
+        Analysis text, or None
+    """
+    if not analysis_file.exists():
+        return None
+    try:
+        with open(analysis_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data.get('analysis') if data.get('success') else None
+
+
+def save_reflection(result: Dict, out_dir: Optional[Path] = None):
+    """
+    Save a generated reflection as generated_reflection.json and .txt.
+    
+    Args:
+        result: Successful result of generate_reflection()
+        out_dir: Folder to save in (default: .tmp)
+    """
+    json_file = Path(out_dir) / REFLECTION_FILE.name if out_dir else REFLECTION_FILE
+    text_file = Path(out_dir) / REFLECTION_TEXT_FILE.name if out_dir else REFLECTION_TEXT_FILE
+    os.makedirs(json_file.parent, exist_ok=True)
+    
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reflection saved to: {json_file}")
+    
+    # Also save as text file
+    with open(text_file, 'w', encoding='utf-8') as f:
+        f.write(result['reflection'])
+    print(f"💾 Text version saved to: {text_file}")
+
+
 def main():
     """Interactive CLI for generating reflections."""
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument('--auto', action='store_true', help='Run in auto mode using generated idea')
+    parser.add_argument('--stream', action='store_true', help='Print the reflection as it is generated')
+    parser.add_argument('--batch', metavar='ACTIVITIES_JSONL', help='Generate a reflection for every activity in a JSONL file')
+    parser.add_argument('--output', default=str(BATCH_OUTPUT_FILE), help='Results file for --batch (JSONL)')
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help='Concurrent requests for --batch')
+    parser.add_argument('--rpm', type=float, help='Max requests per minute for --batch (default: GEMINI_RPM)')
     args = parser.parse_args()
 
     print("=" * 60)
     print("CAS REFLECTION GENERATOR")
     print("=" * 60)
     
+    if args.batch:
+        try:
+            activities = load_activities(Path(args.batch))
+        except (OSError, ValueError) as e:
+            print(f"❌ Could not read activities: {e}")
+            return None
+        return generate_reflections_batch(activities, Path(args.output), args.workers, args.rpm)
+    
     if args.auto:
         print("🤖 Running in AUTO mode...")
         idea_file = Path(".tmp/generated_idea.json")
@@ -221,8 +728,7 @@ def main():
     
     # Check for image analysis
     image_analysis = None
-    analysis_file = Path(".tmp/image_analysis.json")
-    if analysis_file.exists():
+    if IMAGE_ANALYSIS_FILE.exists():
         if args.auto:
              # In auto mode, use images if available without asking
              use_images = 'y'
@@ -230,11 +736,9 @@ def main():
             use_images = input("\n📸 Found image analysis. Use it? (y/n) [y]: ") or "y"
             
         if use_images.lower() == 'y':
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if data.get('success'):
-                    image_analysis = data.get('analysis')
-                    print("✓ Using image analysis")
+            image_analysis = load_image_analysis()
+            if image_analysis:
+                print("✓ Using image analysis")
     
     # Generate reflection
     result = generate_reflection(
@@ -243,24 +747,13 @@ def main():
         learning_outcomes=learning_outcomes,
         date=date,
         cas_strand=cas_strand,
-        duration_hours=float(duration)
+        duration_hours=float(duration),
+        stream=args.stream
     )
     
     # Save result
     if result.get('success'):
-        output_file = ".tmp/generated_reflection.json"
-        os.makedirs(".tmp", exist_ok=True)
-        
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
-        
-        print(f"\n💾 Reflection saved to: {output_file}")
-        
-        # Also save as text file
-        text_file = ".tmp/generated_reflection.txt"
-        with open(text_file, 'w', encoding='utf-8') as f:
-            f.write(result['reflection'])
-        print(f"💾 Text version saved to: {text_file}")
+        save_reflection(result)
     
     return result
 
@@ -0,0 +1,144 @@
+"""
+Perceptual near-duplicate detection for CAS photos.
+Groups copies and near-identical shots (e.g. "... (1).jpeg", "... - Copy.jpeg")
+with a difference hash (dHash) so only one photo per group is analysed.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Maximum Hamming distance (out of 64 bits) for two photos to count as duplicates
+DEDUP_THRESHOLD = int(os.getenv('IMAGE_DEDUP_THRESHOLD', '4'))
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+
+def dhash(path: str, hash_size: int = HASH_SIZE) -> int:
+    """
+    Compute the difference hash of an image.
+
+    The image is shrunk to (hash_size + 1) x hash_size greyscale pixels and
+    each bit records whether a pixel is brighter than its right neighbour.
+    Re-encoding, resizing and small edits barely change the hash.
+
+    Args:
+        path: Path to the image file
+        hash_size: Hash is hash_size * hash_size bits
+
+    Returns:
+        Hash as an integer
+    """
+    from PIL import Image
+    
+    with Image.open(path) as img:
+        # Reduced-scale decode: only a tiny thumbnail is needed
+        img.draft('L', (hash_size * 4, hash_size * 4))
+        small = img.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class HashIndex:
+    """
+    Finds stored hashes within a Hamming distance without comparing against all of them.
+
+    The 64-bit hash is split into threshold + 1 bands. Two hashes that differ
+    in at most `threshold` bits must agree exactly on at least one band
+    (pigeonhole), so only entries sharing a band are compared.
+    """
+
+    def __init__(self, threshold: int = DEDUP_THRESHOLD, bits: int = HASH_BITS):
+        self.threshold = threshold
+        self.bits = bits
+        num_bands = min(threshold + 1, bits)
+        width = -(-bits // num_bands)
+        self.bands = [(start, min(width, bits - start)) for start in range(0, bits, width)]
+        self.buckets: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+
+    def _band_keys(self, value: int) -> List[Tuple[int, int]]:
+        return [(i, (value >> start) & ((1 << width) - 1)) for i, (start, width) in enumerate(self.bands)]
+
+    def add(self, value: int, key: str):
+        """Store a hash under a key (e.g. the file path)."""
+        for band_key in self._band_keys(value):
+            self.buckets.setdefault(band_key, []).append((value, key))
+
+    def find(self, value: int) -> Optional[str]:
+        """
+        Find the closest stored key within the threshold.
+
+        Returns:
+            Key of the nearest match, or None
+        """
+        best_key, best_distance = None, self.threshold + 1
+        for band_key in self._band_keys(value):
+            for other, key in self.buckets.get(band_key, []):
+                distance = hamming(value, other)
+                if distance < best_distance:
+                    best_key, best_distance = key, distance
+        return best_key
+
+
+def group_near_duplicates(image_paths: List[str], threshold: int = DEDUP_THRESHOLD) -> List[List[str]]:
+    """
+    Group images that are near-identical.
+
+    The first path of each group is its representative: the shortest file
+    name wins, so "photo.jpeg" is kept over "photo (1).jpeg" or "photo - Copy.jpeg".
+
+    Args:
+        image_paths: Paths to image files
+        threshold: Maximum Hamming distance between duplicates
+
+    Returns:
+        List of groups, each a list of paths
+    """
+    index = HashIndex(threshold)
+    groups: Dict[str, List[str]] = {}
+
+    for path in sorted(image_paths, key=lambda p: (len(Path(p).name), Path(p).name)):
+        try:
+            value = dhash(path)
+        except Exception as e:
+            # Unreadable files are left for the caller to report
+            print(f"  ⚠️  Could not hash {Path(path).name}: {e}")
+            groups[path] = [path]
+            continue
+
+        representative = index.find(value)
+        if representative is None:
+            index.add(value, path)
+            groups[path] = [path]
+        else:
+            groups[representative].append(path)
+
+    return list(groups.values())
+
+
+def dedupe_images(image_paths: List[str], threshold: int = DEDUP_THRESHOLD) -> List[str]:
+    """
+    Keep one representative per group of near-duplicate images.
+
+    Args:
+        image_paths: Paths to image files
+        threshold: Maximum Hamming distance between duplicates
+
+    Returns:
+        Representative paths, in the original order
+    """
+    representatives = {group[0] for group in group_near_duplicates(image_paths, threshold)}
+    return [path for path in image_paths if path in representatives]
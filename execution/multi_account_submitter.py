@@ -0,0 +1,354 @@
+"""
+Submit queued CAS reflections for a whole cohort of students.
+Shares one Chromium instance across isolated browser contexts (one per
+student) and runs them concurrently with asyncio.
+"""
+
+import os
+import sys
+import json
+import asyncio
+import datetime
+from pathlib import Path
+from typing import Dict, List
+from dotenv import load_dotenv
+from playwright.async_api import (
+    async_playwright, Browser, BrowserContext, Page, Response, TimeoutError as PlaywrightTimeoutError
+)
+
+from state_store import get_store
+from browser_profile import context_options, install_routes_async, launch_args, lean_enabled
+from page_readiness import (
+    EDITOR_SELECTOR, OUTCOME_CHECKBOX_SELECTOR, form_response_matcher, get_timeout, outcome_locators
+)
+from submit_to_managebac import (
+    LOGIN_BUTTON_SELECTORS,
+    OUTCOME_MAP,
+    PASSWORD_SELECTORS,
+    SESSIONS_DIR,
+    USERNAME_SELECTORS,
+    finish_queue,
+    load_queue,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Configuration
+ROSTER_FILE = Path(os.getenv('CAS_ROSTER_FILE', 'roster.json'))
+RESULTS_FILE = Path(".tmp/multi_account_results.json")
+DEFAULT_CONCURRENCY = int(os.getenv('MULTI_ACCOUNT_CONCURRENCY', '4'))
+
+
+def load_roster(roster_path: Path = ROSTER_FILE) -> List[Dict]:
+    """
+    Load student accounts from a JSON roster file.
+
+    Each entry needs "name", "username", "reflections_url" (the student's own
+    CAS experience reflections page) and either "password" or "password_env"
+    (name of an environment variable holding the password). "managebac_url"
+    and "queue" are optional and default to MANAGEBAC_URL and
+    .tmp/queues/<name>.
+    "schedule" (optional) holds the student's run schedule for
+    tenant_scheduler.py.
+
+    Args:
+        roster_path: Path to the roster file
+
+    Returns:
+        List of account dictionaries with resolved credentials
+    """
+    with open(roster_path, 'r', encoding='utf-8') as f:
+        roster = json.load(f)
+
+    accounts = []
+    for entry in roster:
+        name = entry.get('name')
+        password = entry.get('password') or os.getenv(entry.get('password_env', ''), '')
+        managebac_url = entry.get('managebac_url') or os.getenv('MANAGEBAC_URL')
+
+        if not all([name, entry.get('username'), password, managebac_url]):
+            raise ValueError(f"Incomplete roster entry: {name or entry}")
+        # MANAGEBAC_REFLECTIONS_URL is one student's experience page, never a default for others
+        if not entry.get('reflections_url'):
+            raise ValueError(f"Roster entry {name} has no reflections_url")
+
+        accounts.append({
+            'name': name,
+            'username': entry['username'],
+            'password': password,
+            'managebac_url': managebac_url,
+            'reflections_url': entry['reflections_url'],
+            'queue': Path(entry.get('queue', f".tmp/queues/{name}")),
+            'schedule': entry.get('schedule', {})
+        })
+
+    return accounts
+
+
+def _on_login_page(page: Page) -> bool:
+    """Check whether the page is (still) showing the login screen."""
+    url = page.url.lower()
+    return 'login' in url or 'signin' in url
+
+
+async def _fill_first(page: Page, selectors: List[str], value: str) -> bool:
+    """Fill the first selector that exists on the page."""
+    for selector in selectors:
+        if await page.locator(selector).count() > 0:
+            await page.fill(selector, value)
+            return True
+    return False
+
+
+async def login(page: Page, account: Dict) -> bool:
+    """
+    Log one account into ManageBac.
+
+    Args:
+        page: Playwright page object
+        account: Account dictionary from the roster
+
+    Returns:
+        True if login successful
+    """
+    await page.goto(account['managebac_url'], wait_until='domcontentloaded')
+    await page.wait_for_selector(', '.join(PASSWORD_SELECTORS), timeout=get_timeout())
+
+    await _fill_first(page, USERNAME_SELECTORS, account['username'])
+    await _fill_first(page, PASSWORD_SELECTORS, account['password'])
+
+    for selector in LOGIN_BUTTON_SELECTORS:
+        if await page.locator(selector).count() > 0:
+            await page.click(selector)
+            break
+
+    try:
+        await page.wait_for_url(
+            lambda url: 'login' not in url.lower() and 'signin' not in url.lower(),
+            timeout=get_timeout(), wait_until='domcontentloaded'
+        )
+    except PlaywrightTimeoutError:
+        pass
+
+    return not _on_login_page(page)
+
+
+async def ensure_logged_in(page: Page, context: BrowserContext, account: Dict, session_file: Path) -> bool:
+    """
+    Reuse the account's saved session if it is still valid, otherwise log in.
+
+    Args:
+        page: Playwright page object
+        context: Browser context of the account
+        account: Account dictionary from the roster
+        session_file: Where this account's storage_state is saved
+
+    Returns:
+        True if logged in
+    """
+    if session_file.exists():
+        await page.goto(account['managebac_url'], wait_until='domcontentloaded')
+        if not _on_login_page(page) and await page.locator('input[type="password"]').count() == 0:
+            return True
+        await context.clear_cookies()
+
+    if not await login(page, account):
+        return False
+
+    os.makedirs(session_file.parent, exist_ok=True)
+    await context.storage_state(path=str(session_file))
+    return True
+
+
+async def create_reflection(page: Page, reflection_data: dict, reflections_url: str, name: str = '') -> bool:
+    """
+    Fill and submit one Journal entry (async version of create_new_reflection).
+
+    Like the sync flow, a learning outcome that cannot be selected is only
+    reported; the entry is still submitted.
+
+    Args:
+        page: Playwright page object
+        reflection_data: Dictionary with reflection details
+        reflections_url: The account's CAS reflections page
+        name: Account name for log lines
+
+    Returns:
+        True if ManageBac accepted the entry
+    """
+    if page.url != reflections_url:
+        await page.goto(reflections_url, wait_until='domcontentloaded')
+
+    await page.get_by_role("link", name="Journal").click()
+    editor = page.locator(EDITOR_SELECTOR).first
+    await editor.wait_for(state='attached', timeout=get_timeout())
+    await editor.evaluate('(el, text) => { el.innerHTML = text; }', reflection_data.get('reflection', ''))
+
+    outcomes = reflection_data.get('learning_outcomes') or []
+    if outcomes:
+        try:
+            await page.locator(OUTCOME_CHECKBOX_SELECTOR).first.wait_for(state='visible', timeout=get_timeout())
+        except PlaywrightTimeoutError:
+            print(f"  ⚠️ [{name}] Learning outcome checkboxes did not appear")
+        for lo_num in outcomes:
+            lo_text = OUTCOME_MAP.get(str(lo_num))
+            if lo_text:
+                # Exact match first, then a partial match
+                for locator in outcome_locators(page, lo_text):
+                    try:
+                        await locator.click()
+                        break
+                    except Exception:
+                        continue
+                else:
+                    print(f"  ⚠️ [{name}] Could not select LO {lo_num}")
+
+    async with page.expect_response(form_response_matcher(reflections_url), timeout=get_timeout()) as response_info:
+        await page.get_by_role("button", name="Add Entry").click()
+    response: Response = await response_info.value
+    await page.wait_for_load_state('domcontentloaded')
+
+    return response.status < 400
+
+
+async def submit_account(browser: Browser, account: Dict, semaphore: asyncio.Semaphore,
+                         lean: bool = False) -> Dict:
+    """
+    Submit every queued reflection of one account in its own browser context.
+
+    Args:
+        browser: Shared Chromium instance
+        account: Account dictionary from the roster
+        semaphore: Limits how many accounts run at once
+        lean: Use the lean profile (block images, fonts, styles, analytics)
+
+    Returns:
+        Summary dict: {"name", "success", "submitted", "failed", "entries"}
+    """
+    name = account['name']
+    entries = [(entry_id, data) for entry_id, data in load_queue(account['queue'])
+               if data.get('success', True) and data.get('reflection')]
+    summary = {"name": name, "success": True, "submitted": 0, "failed": 0, "entries": []}
+
+    if not entries:
+        print(f"  📭 [{name}] Queue is empty")
+        return summary
+
+    async with semaphore:
+        session_file = SESSIONS_DIR / f"{name}.json"
+        context = await browser.new_context(
+            storage_state=str(session_file) if session_file.exists() else None,
+            **context_options(lean)
+        )
+        if lean:
+            await install_routes_async(context)
+        page = await context.new_page()
+
+        try:
+            print(f"  🔐 [{name}] Logging in...")
+            if not await ensure_logged_in(page, context, account, session_file):
+                print(f"  ❌ [{name}] Login failed")
+                summary.update(success=False, error="Login failed", failed=len(entries))
+                return summary
+
+            for entry_id, reflection_data in entries:
+                try:
+                    success = await create_reflection(page, reflection_data, account['reflections_url'], name)
+                except Exception as e:
+                    print(f"  ❌ [{name}] {entry_id}: {e}")
+                    success = False
+                    await page.goto(account['reflections_url'], wait_until='domcontentloaded')
+
+                summary["entries"].append({
+                    "id": entry_id,
+                    "success": success,
+                    "submitted_at": datetime.datetime.now().isoformat(timespec='seconds')
+                })
+                get_store().add_submission(success, student=name, data={"id": entry_id})
+                summary["submitted" if success else "failed"] += 1
+
+            print(f"  ✅ [{name}] {summary['submitted']}/{len(entries)} submitted")
+
+        except Exception as e:
+            print(f"  ❌ [{name}] Error: {e}")
+            summary.update(error=str(e))
+
+        finally:
+            await context.close()
+
+    finish_queue(account['queue'], summary["entries"], account['queue'].parent / f"{name}_results.json")
+    summary["success"] = summary["failed"] == 0 and "error" not in summary
+    return summary
+
+
+async def submit_all(accounts: List[Dict], concurrency: int = DEFAULT_CONCURRENCY,
+                     headless: bool = True, lean: bool = False) -> List[Dict]:
+    """
+    Submit the queues of all accounts, sharing one browser.
+
+    Args:
+        accounts: Accounts from load_roster()
+        concurrency: Maximum number of accounts processed at the same time
+        headless: Run browser in headless mode
+        lean: Use the lean profile for every context
+
+    Returns:
+        One summary dict per account
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async with async_playwright() as p:
+        print(f"\n🌐 Launching shared browser (headless={headless}, concurrency={concurrency})...")
+        browser = await p.chromium.launch(headless=headless, args=launch_args(lean))
+        try:
+            return await asyncio.gather(
+                *(submit_account(browser, account, semaphore, lean) for account in accounts)
+            )
+        finally:
+            await browser.close()
+
+
+def main():
+    """Main function for command-line usage."""
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--roster', default=str(ROSTER_FILE), help='Roster JSON file with student accounts')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum number of accounts processed at once')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("MANAGEBAC MULTI-ACCOUNT SUBMITTER")
+    print("=" * 60)
+
+    roster_path = Path(args.roster)
+    if not roster_path.exists():
+        print(f"\n❌ Roster not found: {roster_path}")
+        return None
+
+    try:
+        accounts = load_roster(roster_path)
+    except (OSError, ValueError) as e:
+        print(f"\n❌ Could not load roster: {e}")
+        sys.exit(1)
+    print(f"\n👥 Loaded {len(accounts)} accounts from {roster_path}")
+
+    results = asyncio.run(submit_all(accounts, args.concurrency, headless=not args.headed,
+                                     lean=args.lean or lean_enabled()))
+
+    os.makedirs(RESULTS_FILE.parent, exist_ok=True)
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    succeeded = sum(1 for r in results if r['success'])
+    print(f"\n📊 {succeeded}/{len(results)} accounts completed without errors")
+    print(f"💾 Results saved to: {RESULTS_FILE}")
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Event-driven readiness waits for the ManageBac submission flow.
+Waits on concrete page signals instead of fixed sleeps, so fast pages
+continue immediately and slow pages still get the full timeout.
+"""
+
+import os
+from typing import Callable, List, Optional
+from urllib.parse import urlsplit
+from playwright.sync_api import Page, Locator, Response, TimeoutError as PlaywrightTimeoutError
+
+# Selectors for the Journal form
+EDITOR_SELECTOR = 'div[contenteditable="true"]'
+OUTCOME_CHECKBOX_SELECTOR = 'input[type="checkbox"]'
+
+# Methods that mean "the form was sent" rather than "an asset was fetched"
+WRITE_METHODS = {'POST', 'PUT', 'PATCH'}
+
+
+def get_timeout(timeout: Optional[float] = None) -> float:
+    """
+    Resolve a wait timeout in milliseconds.
+
+    Args:
+        timeout: Explicit timeout in ms, or None to use MANAGEBAC_WAIT_TIMEOUT_MS
+
+    Returns:
+        Timeout in milliseconds
+    """
+    if timeout is not None:
+        return timeout
+    return float(os.getenv('MANAGEBAC_WAIT_TIMEOUT_MS', '15000'))
+
+
+def wait_for_page_ready(page: Page, timeout: Optional[float] = None):
+    """Wait until the current document has been parsed (DOMContentLoaded)."""
+    page.wait_for_load_state('domcontentloaded', timeout=get_timeout(timeout))
+
+
+def wait_for_editor(page: Page, timeout: Optional[float] = None) -> Locator:
+    """
+    Wait for the reflection rich-text editor to be attached.
+
+    Args:
+        page: Playwright page object
+        timeout: Timeout in ms
+
+    Returns:
+        Locator for the editor
+    """
+    editor = page.locator(EDITOR_SELECTOR).first
+    editor.wait_for(state='attached', timeout=get_timeout(timeout))
+    return editor
+
+
+def wait_for_outcomes(page: Page, timeout: Optional[float] = None) -> bool:
+    """
+    Wait for the learning-outcome checkboxes to become visible.
+
+    Args:
+        page: Playwright page object
+        timeout: Timeout in ms
+
+    Returns:
+        True if the checkboxes are visible
+    """
+    try:
+        page.locator(OUTCOME_CHECKBOX_SELECTOR).first.wait_for(
+            state='visible', timeout=get_timeout(timeout)
+        )
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def outcome_locators(page: Page, label: str) -> List[Locator]:
+    """
+    Locators for a learning-outcome checkbox label, to try in order.
+
+    The exact text match comes first, then a partial match for labels whose
+    text differs slightly (extra whitespace, a suffix). Works for sync and
+    async pages alike (building a locator does not touch the page).
+
+    Args:
+        page: Playwright page object
+        label: Outcome label (see OUTCOME_MAP)
+
+    Returns:
+        Locators, most specific first
+    """
+    return [page.get_by_text(label, exact=True), page.locator(f'text={label}').first]
+
+
+def wait_for_logged_in(page: Page, timeout: Optional[float] = None) -> bool:
+    """
+    Wait for the browser to leave the login/sign-in page.
+
+    Args:
+        page: Playwright page object
+        timeout: Timeout in ms
+
+    Returns:
+        True if the page navigated away from login
+    """
+    def left_login(url: str) -> bool:
+        url = url.lower()
+        return 'login' not in url and 'signin' not in url
+
+    try:
+        page.wait_for_url(left_login, timeout=get_timeout(timeout), wait_until='domcontentloaded')
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def wait_for_url_change(page: Page, previous_url: str, timeout: Optional[float] = None) -> bool:
+    """
+    Wait for the page URL to differ from previous_url.
+
+    Args:
+        page: Playwright page object
+        previous_url: URL before the action
+        timeout: Timeout in ms
+
+    Returns:
+        True if the URL changed before the timeout
+    """
+    try:
+        page.wait_for_url(lambda url: url != previous_url, timeout=get_timeout(timeout),
+                          wait_until='domcontentloaded')
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def form_response_matcher(page_url: str) -> Callable[[Response], bool]:
+    """
+    Build a predicate for the form submission of a ManageBac page.
+
+    Only write requests to the page's own origin count, so an analytics
+    beacon fired on the same click (Sentry, GA, Intercom, ...) is never
+    taken for the form being accepted.
+
+    Args:
+        page_url: URL of the page with the form (e.g. the reflections page)
+
+    Returns:
+        Function response -> True for the form's submission response
+    """
+    origin = _origin(page_url)
+
+    def is_form_response(response: Response) -> bool:
+        return response.request.method in WRITE_METHODS and _origin(response.url) == origin
+    return is_form_response
+
+
+def click_and_wait_for_response(
+    page: Page,
+    target: Locator,
+    predicate: Optional[Callable[[Response], bool]] = None,
+    timeout: Optional[float] = None
+) -> Optional[Response]:
+    """
+    Click an element and wait for the request it triggers to be answered.
+
+    Args:
+        page: Playwright page object
+        target: Element to click (e.g. the "Add Entry" button)
+        predicate: Picks the response that confirms the action
+                   (default: form_response_matcher for the current page)
+        timeout: Timeout in ms
+
+    Returns:
+        The matching response, or None if none arrived in time
+    """
+    try:
+        predicate = predicate or form_response_matcher(page.url)
+        with page.expect_response(predicate, timeout=get_timeout(timeout)) as response_info:
+            target.click()
+        return response_info.value
+    except PlaywrightTimeoutError:
+        return None
@@ -0,0 +1,260 @@
+"""
+In-process CAS pipeline: idea -> image analysis -> reflection -> ManageBac submission.
+Runs the stages in one interpreter as a checkpointed DAG (see workflow_dag.py):
+if a run fails, the next one reuses the completed stages and resumes at the
+failed one. Each run and its idea, analysis, reflection and submission are
+recorded in the state store (state_store.py); the usual .tmp artifacts
+(generated_idea.json, generated_reflection.json/.txt,
+submission_screenshot.png) are still written for CI upload, in
+.tmp/students/<name>/ for roster students so concurrent runs stay apart.
+"""
+
+import os
+import sys
+import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add execution directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from state_store import DEFAULT_STUDENT, StateStore, artifact_dir, get_store
+from tracing import span
+from workflow_dag import CHECKPOINT_DIR, CheckpointStore, Stage, run_dag
+
+# Optional folder of photos for the default student's runs
+# (otherwise .tmp/image_analysis.json is used if present)
+PHOTOS_DIR = os.getenv('PIPELINE_PHOTOS_DIR')
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+
+
+def photo_files(directory: Optional[str] = PHOTOS_DIR) -> List[str]:
+    """Image files in the photos folder, sorted (empty if no folder is configured)."""
+    if not directory or not Path(directory).is_dir():
+        return []
+    return sorted(str(f) for f in Path(directory).iterdir() if f.suffix.lower() in IMAGE_EXTENSIONS)
+
+
+def analysis_salt(photos: List[str], saved_analysis: bool = True) -> str:
+    """Fingerprint of the analysis inputs, so new photos invalidate the checkpoint."""
+    from analysis_cache import file_digest
+    if photos:
+        return ','.join(file_digest(path) for path in photos)
+    if not saved_analysis:
+        return ''
+
+    from generate_reflection import IMAGE_ANALYSIS_FILE
+    return file_digest(str(IMAGE_ANALYSIS_FILE)) if IMAGE_ANALYSIS_FILE.exists() else ''
+
+
+def make_idea_stage(out_dir: Path):
+    """
+    Idea stage writing generated_idea.json to out_dir.
+
+    An idea the reflection stage could not use (e.g. "duration": "2-3") is
+    treated as a failure, so it is never checkpointed and the next run asks
+    for a new one instead of failing on it forever.
+    """
+    def idea_stage(inputs: Dict[str, Dict]) -> Optional[Dict]:
+        print("\n[1/4] Generating Idea...")
+        from generate_idea import IDEA_FILE, generate_idea
+        from generate_reflection import activity_arguments
+        idea = generate_idea(out_dir / IDEA_FILE.name)
+        if idea is None:
+            return None
+        try:
+            activity_arguments(idea)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"❌ Generated idea is unusable: {e}")
+            return None
+        return idea
+    return idea_stage
+
+
+def make_analysis_stage(photos: List[str], saved_analysis: bool = True):
+    """
+    Analysis stage for the given photos.
+
+    Without photos it uses the saved .tmp/image_analysis.json if
+    saved_analysis is set (the default student only: that file is not tied
+    to any student).
+    """
+    def analysis_stage(inputs: Dict[str, Dict]) -> Optional[Dict]:
+        print("\n[2/4] Image Analysis...")
+        if photos:
+            from analyze_cas_images import analyze_images
+            result = analyze_images(photos)
+            if not result.get('success'):
+                print(f"⚠️  Image analysis failed ({result.get('error')}), continuing without it")
+            return {'analysis': result.get('analysis') if result.get('success') else None}
+        if not saved_analysis:
+            print("  No photos for this run")
+            return {'analysis': None}
+
+        from generate_reflection import load_image_analysis
+        analysis = load_image_analysis()
+        print("✓ Using saved image analysis" if analysis else "  No photos for this run")
+        return {'analysis': analysis}
+    return analysis_stage
+
+
+def make_reflection_stage(out_dir: Path):
+    """Reflection stage writing generated_reflection.json/.txt to out_dir."""
+    def reflection_stage(inputs: Dict[str, Dict]) -> Optional[Dict]:
+        print("\n[3/4] Generating Reflection...")
+        from generate_reflection import activity_arguments, generate_reflection, save_reflection
+
+        try:
+            kwargs = activity_arguments(inputs['idea'])
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"❌ Generated idea is unusable: {e}")
+            return None
+        if inputs['analysis'].get('analysis'):
+            kwargs['image_analysis'] = inputs['analysis']['analysis']
+
+        reflection = generate_reflection(**kwargs)
+        if not reflection.get('success'):
+            print(f"❌ Reflection generation failed: {reflection.get('error')}")
+            return None
+        save_reflection(reflection, out_dir)
+        return reflection
+    return reflection_stage
+
+
+def make_submission_stage(headless: bool, lean: Optional[bool], state: Optional[StateStore] = None,
+                          run_id: Optional[int] = None, student: str = DEFAULT_STUDENT, browser=None,
+                          account: Optional[Dict] = None):
+    """Submission stage with the given browser options (attempts are recorded in the state store)."""
+    def submission_stage(inputs: Dict[str, Dict]) -> Optional[Dict]:
+        print("\n[4/4] Submitting to ManageBac...")
+        from submit_to_managebac import ManageBacAutomation
+        error = None
+        try:
+            automation = ManageBacAutomation(headless=headless, lean=lean, browser=browser, account=account)
+            submitted = automation.submit_reflection(inputs['reflection'])
+        except Exception as e:
+            submitted, error = False, str(e)
+
+        if state:
+            # The reflection being submitted is the student's latest (possibly from a resumed run)
+            reflection = state.latest('reflections', student)
+            state.add_submission(submitted, reflection['id'] if reflection else None, run_id, student, error)
+
+        if not submitted:
+            print(f"❌ Submission failed{f': {error}' if error else ''}")
+            return None
+        return {'submitted_at': datetime.datetime.now().isoformat(timespec='seconds')}
+    return submission_stage
+
+
+def make_recorder(state: StateStore, run_id: int, student: str = DEFAULT_STUDENT):
+    """Callback that stores each newly produced stage output in the state store."""
+    def record(stage: str, output: Dict):
+        if stage == 'idea':
+            state.add_idea(output, run_id, student)
+        elif stage == 'analysis' and output.get('analysis'):
+            state.add_analysis({'success': True, 'analysis': output['analysis']}, run_id, student)
+        elif stage == 'reflection':
+            idea = state.latest('ideas', student)
+            state.add_reflection(output, run_id, idea['id'] if idea else None, student)
+    return record
+
+
+def build_stages(headless: bool = False, lean: Optional[bool] = None,
+                 photos: Optional[List[str]] = None, state: Optional[StateStore] = None,
+                 run_id: Optional[int] = None, student: str = DEFAULT_STUDENT, browser=None,
+                 account: Optional[Dict] = None) -> List[Stage]:
+    """
+    Define the workflow DAG.
+
+    Args:
+        headless: Run the browser without a window (always on in CI)
+        lean: Lean browser profile (None = MANAGEBAC_LEAN / CI default)
+        photos: Photos to analyse (default: PIPELINE_PHOTOS_DIR for the default
+                student, none for roster students)
+        state: Store that records submission attempts (None = not recorded)
+        run_id: Current run in the state store
+        student: Student the run belongs to
+        browser: Running Playwright browser to submit with (None = launch one)
+        account: Roster account to submit as (None = MANAGEBAC_* credentials)
+
+    Returns:
+        Stages: idea, analysis -> reflection -> submission
+    """
+    # The shared photos folder and saved analysis belong to the default student;
+    # a roster student only ever gets their own photos
+    shared = student == DEFAULT_STUDENT
+    if photos is None:
+        photos = photo_files() if shared else []
+    out_dir = artifact_dir(student)
+    return [
+        # The salt drops idea checkpoints written before ideas were validated
+        Stage('idea', make_idea_stage(out_dir), salt='validated'),
+        Stage('analysis', make_analysis_stage(photos, shared), salt=analysis_salt(photos, shared)),
+        Stage('reflection', make_reflection_stage(out_dir), deps=['idea', 'analysis']),
+        Stage('submission', make_submission_stage(headless, lean, state, run_id, student, browser, account),
+              deps=['reflection'])
+    ]
+
+
+def run_pipeline(headless: bool = False, lean: Optional[bool] = None, fresh: bool = False,
+                 student: str = DEFAULT_STUDENT, browser=None, account: Optional[Dict] = None,
+                 photos: Optional[List[str]] = None) -> bool:
+    """
+    Generate an idea, write its reflection and submit it.
+
+    Each stage's module is imported when the stage runs, so reused or
+    failed stages never pay for loading the later ones.
+
+    Args:
+        headless: Run the browser without a window (always on in CI)
+        lean: Lean browser profile (None = MANAGEBAC_LEAN / CI default)
+        fresh: Discard checkpoints from an earlier failed run first
+        student: Student the run is recorded under
+        browser: Running Playwright browser to submit with (None = launch one)
+        account: Roster account to submit as (None = MANAGEBAC_* credentials)
+        photos: Photos to analyse (default: PIPELINE_PHOTOS_DIR for the default
+                student, none for roster students)
+
+    Returns:
+        True if the reflection was submitted
+    """
+    print("🚀 Starting Autopilot Workflow...")
+
+    # Students get their own checkpoints so concurrent runs cannot resume each other's stages
+    store = CheckpointStore() if student == DEFAULT_STUDENT else CheckpointStore(CHECKPOINT_DIR / student)
+    if fresh:
+        store.clear()
+
+    state = get_store()
+    run_id = state.start_run(student)
+    try:
+        with span('pipeline.run', student=student, run_id=run_id) as s:
+            stages = build_stages(headless, lean, photos, state, run_id, student, browser, account)
+            ok, _ = run_dag(stages, store, on_complete=make_recorder(state, run_id, student))
+            s.set(success=ok)
+    except BaseException as e:
+        state.finish_run(run_id, False, str(e) or type(e).__name__)
+        raise
+    state.finish_run(run_id, ok, None if ok else "Stage failed")
+
+    if ok:
+        print("\n✅ Workflow Complete!")
+    return ok
+
+
+def main():
+    """Run the pipeline once from the command line."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate and submit one CAS reflection')
+    parser.add_argument('--headless', action='store_true', help='Run browser in headless mode')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics (headless/CI)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore checkpoints from an earlier failed run')
+    args = parser.parse_args()
+
+    ok = run_pipeline(headless=args.headless, lean=True if args.lean else None, fresh=args.fresh)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Shared prompt builder with per-section token accounting.
+Every Gemini call site assembles its prompt from named sections, so the
+size of each part is known, a token budget can be enforced by trimming the
+lowest-priority sections, and token counts are logged next to latency.
+"""
+
+import os
+import json
+import math
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Configuration
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '30000'))
+PROMPT_STATS_FILE = Path(os.getenv('PROMPT_STATS_FILE', '.tmp/prompt_stats.jsonl'))
+
+# Gemini bills an inline image per tile: 258 tokens if both sides are at most
+# 384px, otherwise 258 tokens for each 768x768 tile it is cut into
+IMAGE_TOKENS = 258
+IMAGE_SMALL_EDGE = 384
+IMAGE_TILE_EDGE = 768
+
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def image_tokens(width: int, height: int) -> int:
+    """Tokens Gemini bills for one inline image of the given size."""
+    if width <= IMAGE_SMALL_EDGE and height <= IMAGE_SMALL_EDGE:
+        return IMAGE_TOKENS
+    return math.ceil(width / IMAGE_TILE_EDGE) * math.ceil(height / IMAGE_TILE_EDGE) * IMAGE_TOKENS
+
+
+class PromptBuilder:
+    """Builds a prompt from named, prioritized sections."""
+
+    def __init__(self, site: str, budget: Optional[int] = None, separator: str = "\n\n"):
+        """
+        Initialize the builder.
+
+        Args:
+            site: Call site name used in logs (e.g. "reflection", "idea")
+            budget: Maximum prompt tokens sent, cached sections excluded
+                (defaults to PROMPT_TOKEN_BUDGET; 0 = no limit)
+            separator: Text placed between sections
+        """
+        self.site = site
+        self.budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+        self.separator = separator
+        self.sections: List[Dict] = []
+        self.trimmed: Dict[str, int] = {}
+
+    def add(self, name: str, text: str, priority: int = 0, required: bool = False,
+            cached: bool = False) -> 'PromptBuilder':
+        """
+        Add a text section.
+
+        Args:
+            name: Section name (e.g. "training", "activity", "instructions")
+            text: Section text; empty sections are ignored
+            priority: Higher priority sections are trimmed last
+            required: Never trim this section
+            cached: Already held in a server-side context cache (counted, not sent)
+
+        Returns:
+            The builder, for chaining
+        """
+        if text:
+            self.sections.append({
+                'name': name, 'text': text, 'priority': priority,
+                'required': required, 'cached': cached, 'tokens': estimate_tokens(text)
+            })
+        return self
+
+    def add_images(self, name: str, sizes: List[Tuple[int, int]]) -> 'PromptBuilder':
+        """
+        Account for inline images sent alongside the text.
+
+        Args:
+            name: Section name (e.g. "images")
+            sizes: (width, height) of each image as uploaded
+
+        Returns:
+            The builder, for chaining
+        """
+        if sizes:
+            self.sections.append({
+                'name': name, 'text': '', 'priority': 0, 'required': True,
+                'cached': False, 'tokens': sum(image_tokens(w, h) for w, h in sizes)
+            })
+        return self
+
+    def token_counts(self) -> Dict[str, int]:
+        """Estimated tokens per section."""
+        counts: Dict[str, int] = {}
+        for section in self.sections:
+            counts[section['name']] = counts.get(section['name'], 0) + section['tokens']
+        return counts
+
+    def total_tokens(self) -> int:
+        """Estimated tokens for the whole prompt, including cached sections."""
+        return sum(section['tokens'] for section in self.sections)
+
+    def _enforce_budget(self):
+        """Trim the lowest-priority sections until the prompt fits the budget."""
+        if not self.budget:
+            return
+
+        # Cached sections cannot be trimmed, so they must not push out the rest
+        excess = sum(s['tokens'] for s in self.sections if not s['cached']) - self.budget
+        trimmable = sorted(
+            (s for s in self.sections if not s['required'] and not s['cached']),
+            key=lambda s: s['priority']
+        )
+
+        for section in trimmable:
+            if excess <= 0:
+                break
+            keep_tokens = max(0, section['tokens'] - excess)
+            text = section['text'][:keep_tokens * 4] if keep_tokens else ''
+            # Prefer cutting at a line break (or at least a space) so the model
+            # never sees half a word, unless that would drop most of what is kept
+            for boundary in ('\n', ' '):
+                cut = text.rfind(boundary)
+                if cut > len(text) // 2:
+                    text = text[:cut]
+                    break
+            removed = section['tokens'] - (estimate_tokens(text) if text else 0)
+            section['text'] = text
+            section['tokens'] -= removed
+            self.trimmed[section['name']] = self.trimmed.get(section['name'], 0) + removed
+            excess -= removed
+
+        if self.trimmed:
+            print(f"✂️  {self.site}: trimmed {self.trimmed} to fit {self.budget} tokens")
+
+    def build(self) -> str:
+        """
+        Assemble the prompt text (cached sections are left out).
+
+        Returns:
+            Prompt text within the token budget where possible
+        """
+        self._enforce_budget()
+        return self.separator.join(
+            s['text'] for s in self.sections if s['text'] and not s['cached']
+        )
+
+    def log_call(self, latency_seconds: float, response=None, error: Optional[str] = None):
+        """
+        Log token counts and latency of a Gemini call.
+
+        Prints one line and appends a record to PROMPT_STATS_FILE. Actual
+        token usage is taken from the response when the API reports it.
+
+        Args:
+            latency_seconds: Wall-clock time of the request
+            response: Gemini response (for usage_metadata), if any
+            error: Error message if the call failed
+        """
+        record = {
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'site': self.site,
+            'sections': self.token_counts(),
+            'estimated_tokens': self.total_tokens(),
+            'budget': self.budget,
+            'trimmed': self.trimmed,
+            'latency_ms': round(latency_seconds * 1000),
+            'success': error is None
+        }
+
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            record['prompt_tokens'] = getattr(usage, 'prompt_token_count', None)
+            record['output_tokens'] = getattr(usage, 'candidates_token_count', None)
+            record['cached_tokens'] = getattr(usage, 'cached_content_token_count', None)
+        if error:
+            record['error'] = error
+
+        tokens = record.get('prompt_tokens') or record['estimated_tokens']
+        print(f"📏 {self.site}: {tokens} prompt tokens {record['sections']} in {latency_seconds:.1f}s")
+
+        try:
+            with _stats_lock:
+                os.makedirs(PROMPT_STATS_FILE.parent, exist_ok=True)
+                with open(PROMPT_STATS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+        except OSError:
+            pass
+
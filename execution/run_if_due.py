@@ -1,22 +1,35 @@
 """
 Smart Catch-up Scheduler.
 Checks if a reflection is due (every 4 days) and runs the workflow if needed.
+With SCHEDULE_BACKFILL=true, a longer outage fills every missed slot at once
+(see backfill.py).
+Run history is kept in the state store (.tmp/cas_state.db); last_run.json is
+still written for CI upload.
 """
 
 import os
 import json
 import time
 import datetime
-import subprocess
 from pathlib import Path
+from typing import Optional
 
 # Configuration
-INTERVAL_DAYS = 4
+INTERVAL_DAYS = float(os.getenv('SCHEDULE_INTERVAL_DAYS', '4'))
+# Fill every missed slot (backfill.py) instead of running once after an outage
+BACKFILL = os.getenv('SCHEDULE_BACKFILL', 'false').lower() == 'true'
 LAST_RUN_FILE = Path(".tmp/last_run.json")
 
-def get_last_run() -> float:
-    """Get timestamp of last run."""
-    if not LAST_RUN_FILE.exists():
+def get_last_run(student: Optional[str] = None) -> float:
+    """Get timestamp of last successful run (of one student, default CAS_STUDENT)."""
+    from state_store import DEFAULT_STUDENT, get_store
+    student = student or DEFAULT_STUDENT
+    run = get_store().last_run(student)
+    if run:
+        return datetime.datetime.fromisoformat(run['finished_at'] or run['started_at']).timestamp()
+    
+    # No history yet: fall back to the legacy file (single-student setups only)
+    if student != DEFAULT_STUDENT or not LAST_RUN_FILE.exists():
         return 0
     try:
         with open(LAST_RUN_FILE, 'r') as f:
@@ -35,35 +48,10 @@ def update_last_run():
         }, f, indent=2)
 
 def run_workflow():
-    """Run the full CAS automation workflow."""
-    print("🚀 Starting Autopilot Workflow...")
-    
-    # 1. Generate Idea
-    print("\n[1/3] Generating Idea...")
-    result = subprocess.run(["python", "execution/generate_idea.py"], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Idea generation failed: {result.stderr}")
-        return False
-    print(result.stdout)
-    
-    # 2. Generate Reflection
-    print("\n[2/3] Generating Reflection...")
-    result = subprocess.run(["python", "execution/generate_reflection.py", "--auto"], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Reflection generation failed: {result.stderr}")
-        return False
-    print(result.stdout)
-    
-    # 3. Submit to ManageBac
-    print("\n[3/3] Submitting to ManageBac...")
-    result = subprocess.run(["python", "execution/submit_to_managebac.py", "--auto"], capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"❌ Submission failed: {result.stderr}")
-        return False
-    print(result.stdout)
-    
-    print("\n✅ Workflow Complete!")
-    return True
+    """Run the full CAS automation workflow (in this process, see pipeline.py)."""
+    # Imported here so the usual "not due" check never loads the SDKs
+    from pipeline import run_pipeline
+    return run_pipeline()
 
 def main():
     print("=" * 60)
@@ -77,11 +65,17 @@ def main():
     
     print(f"Last run: {datetime.datetime.fromtimestamp(last_run).strftime('%Y-%m-%d %H:%M:%S') if last_run > 0 else 'Never'}")
     print(f"Time since: {days_since:.2f} days")
-    print(f"Interval: {INTERVAL_DAYS} days")
+    print(f"Interval: {INTERVAL_DAYS:g} days")
     
     if days_since >= INTERVAL_DAYS:
-        print("\n✅ DUE FOR UPDATE! Running workflow...")
-        if run_workflow():
+        if BACKFILL and last_run > 0 and days_since >= 2 * INTERVAL_DAYS:
+            print("\n✅ SEVERAL SLOTS MISSED! Backfilling...")
+            from backfill import missed_slots, run_backfill, submitted_slots
+            ok = run_backfill(missed_slots(last_run, now, submitted=submitted_slots()))
+        else:
+            print("\n✅ DUE FOR UPDATE! Running workflow...")
+            ok = run_workflow()
+        if ok:
             update_last_run()
             print(f"📅 Next run due after: {(datetime.datetime.now() + datetime.timedelta(days=INTERVAL_DAYS)).strftime('%Y-%m-%d')}")
         else:
@@ -0,0 +1,277 @@
+"""
+Resident scheduler for the CAS workflow.
+Keeps one interpreter, the Gemini client and Chromium warm between runs,
+tracks when each job is next due in a heap persisted to
+.tmp/scheduler_heap.json, and sleeps until the earliest job is due.
+
+Usage:
+    python execution/scheduler_daemon.py [--once] [--no-browser] [--headed] [--lean]
+    python execution/scheduler_daemon.py --status
+"""
+
+import os
+import sys
+import json
+import time
+import heapq
+import signal
+import datetime
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Add execution directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_if_due import INTERVAL_DAYS, get_last_run, update_last_run
+
+# Configuration
+HEAP_FILE = Path(os.getenv('SCHEDULER_HEAP_FILE', '.tmp/scheduler_heap.json'))
+RETRY_MINUTES = float(os.getenv('SCHEDULER_RETRY_MINUTES', '60'))
+# Wake up at least this often, so a suspended machine or clock change is noticed
+MAX_SLEEP_SECONDS = 900
+
+REFLECTION_JOB = 'reflection'
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class JobHeap:
+    """Min-heap of (due timestamp, job name), saved to disk after every change."""
+
+    def __init__(self, path: Path = HEAP_FILE):
+        self.path = Path(path)
+        self.heap: List[Tuple[float, str]] = []
+        self.load()
+
+    def load(self):
+        """Read the saved heap (a missing or corrupt file gives an empty heap)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.heap = [(float(job['due']), job['job']) for job in json.load(f)]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.heap = []
+        heapq.heapify(self.heap)
+
+    def save(self):
+        """Write the heap atomically."""
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([{'due': due, 'job': job, 'due_at': _format_time(due)}
+                       for due, job in sorted(self.heap)], f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def push(self, due: float, job: str, replace: bool = True):
+        """
+        Schedule a job.
+
+        Args:
+            due: When the job is due (Unix timestamp)
+            job: Job name
+            replace: Drop any pending entry for the job first (skip when the
+                     caller knows it was popped, to avoid the O(n) scan)
+        """
+        if replace:
+            self.heap = [(d, j) for d, j in self.heap if j != job]
+            heapq.heapify(self.heap)
+        heapq.heappush(self.heap, (due, job))
+        self.save()
+
+    def peek(self) -> Optional[Tuple[float, str]]:
+        """Earliest (due, job), or None if nothing is scheduled."""
+        return self.heap[0] if self.heap else None
+
+    def pop(self) -> Tuple[float, str]:
+        """Remove and return the earliest job."""
+        item = heapq.heappop(self.heap)
+        self.save()
+        return item
+
+    def jobs(self) -> List[str]:
+        return [job for _, job in self.heap]
+
+
+class SchedulerDaemon:
+    """Runs due jobs in one long-lived process."""
+
+    def __init__(self, headless: bool = True, lean: Optional[bool] = None, warm_browser: bool = True,
+                 heap: Optional[JobHeap] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            headless: Run the browser without a window
+            lean: Lean browser profile (None = MANAGEBAC_LEAN)
+            warm_browser: Keep Chromium running between jobs
+            heap: Job heap (default: HEAP_FILE)
+        """
+        self.headless = headless
+        self.lean = lean
+        self.warm_browser = warm_browser
+        self.heap = heap or JobHeap()
+        self.stop_event = threading.Event()
+        self._playwright = None
+        self._browser = None
+
+    # Warm resources
+
+    def warm_up(self):
+        """Load the SDKs and models once, and start Chromium if requested."""
+        print("🔥 Warming up...")
+        import gemini_client
+        import generate_idea
+        import generate_reflection
+        gemini_client.get_model(generate_idea.MODEL_NAME)
+        gemini_client.get_model(generate_reflection.MODEL_NAME)
+        generate_reflection.get_training_context()
+        if self.warm_browser:
+            self.browser()
+
+    def browser(self):
+        """The warm Chromium instance, (re)launched if it is not running."""
+        if not self.warm_browser:
+            return None
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+
+        from playwright.sync_api import sync_playwright
+        from browser_profile import launch_args, lean_enabled
+        lean = lean_enabled() if self.lean is None else self.lean
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        print(f"🌐 Launching warm browser (headless={self.headless}, lean={lean})...")
+        self._browser = self._playwright.chromium.launch(headless=self.headless, args=launch_args(lean))
+        return self._browser
+
+    def close(self):
+        """Shut down the browser and Playwright."""
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    # Jobs
+
+    def seed(self):
+        """Schedule the reflection job from the run history if it is not in the heap yet."""
+        if REFLECTION_JOB not in self.heap.jobs():
+            last_run = get_last_run()
+            due = last_run + INTERVAL_DAYS * 86400 if last_run else time.time()
+            self.heap.push(due, REFLECTION_JOB)
+
+    def run_job(self, job: str) -> bool:
+        """
+        Run one job.
+
+        Args:
+            job: Job name
+
+        Returns:
+            True if it succeeded
+        """
+        if job != REFLECTION_JOB:
+            print(f"⚠️  Unknown job '{job}', dropping it")
+            return True
+
+        from pipeline import run_pipeline
+        try:
+            ok = run_pipeline(headless=self.headless, lean=self.lean, browser=self.browser())
+        except Exception as e:
+            print(f"❌ Job {job} crashed: {e}")
+            ok = False
+        if ok:
+            update_last_run()
+        return ok
+
+    def run_due(self) -> int:
+        """Run every job that is due now and reschedule it; returns how many ran."""
+        ran = 0
+        while not self.stop_event.is_set():
+            item = self.heap.peek()
+            if item is None or item[0] > time.time():
+                break
+            _, job = self.heap.pop()
+            print(f"\n⏰ {_format_time(time.time())}: running {job}")
+            ok = self.run_job(job)
+            ran += 1
+
+            next_due = time.time() + (INTERVAL_DAYS * 86400 if ok else RETRY_MINUTES * 60)
+            self.heap.push(next_due, job)
+            status = "✅ done" if ok else "❌ failed, retrying"
+            print(f"{status} - next {job} run at {_format_time(next_due)}")
+        return ran
+
+    def run_forever(self, once: bool = False):
+        """
+        Sleep until the earliest job is due, run it, repeat.
+
+        Args:
+            once: Run whatever is due now and return (for cron-style use)
+        """
+        self.seed()
+        if once:
+            self.run_due()
+            return
+
+        self.warm_up()
+        while not self.stop_event.is_set():
+            self.run_due()
+            item = self.heap.peek()
+            if item is None:
+                print("📭 Nothing scheduled")
+                break
+            wait = min(max(0.0, item[0] - time.time()), MAX_SLEEP_SECONDS)
+            if wait > 0:
+                print(f"💤 Next: {item[1]} at {_format_time(item[0])}")
+                self.stop_event.wait(wait)
+
+    def stop(self, *_):
+        """Ask the loop to exit after the current job (signal handler)."""
+        print("\n🛑 Stopping scheduler...")
+        self.stop_event.set()
+
+
+def main():
+    """Run the scheduler from the command line."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Resident CAS scheduler')
+    parser.add_argument('--once', action='store_true', help='Run due jobs and exit (no warm-up)')
+    parser.add_argument('--status', action='store_true', help='Show the schedule and exit')
+    parser.add_argument('--no-browser', action='store_true', help='Launch Chromium per run instead of keeping it warm')
+    parser.add_argument('--headed', action='store_true', help='Show the browser window')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CAS SCHEDULER")
+    print("=" * 60)
+
+    if args.status:
+        heap = JobHeap()
+        if not heap.heap:
+            print("📭 Nothing scheduled")
+        for due, job in sorted(heap.heap):
+            print(f"  {_format_time(due)}  {job}")
+        return
+
+    daemon = SchedulerDaemon(headless=not args.headed, lean=True if args.lean else None,
+                             warm_browser=not args.no_browser and not args.once)
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+
+    try:
+        daemon.run_forever(once=args.once)
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Checks dependencies and configuration.
 
 import sys
 import os
+import importlib.util
 from pathlib import Path
 
 
@@ -34,10 +35,15 @@ def check_dependencies():
     missing = []
     
     for module, package in required.items():
+        # Locate the package without importing it (the SDKs are slow to import)
         try:
-            __import__(module)
-            print(f"  ✅ {package}")
+            found = importlib.util.find_spec(module) is not None
         except ImportError:
+            found = False
+        
+        if found:
+            print(f"  ✅ {package}")
+        else:
             print(f"  ❌ {package} (missing)")
             missing.append(package)
     
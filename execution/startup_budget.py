@@ -0,0 +1,105 @@
+"""
+Startup time budget for the command-line entry points.
+Imports each entry module in a fresh interpreter, reports the median import
+time (on top of bare interpreter startup) and fails if a module goes over
+its budget or loads one of the heavy SDKs at import time.
+
+Usage:
+    python execution/startup_budget.py [--runs 5]
+"""
+
+import sys
+import subprocess
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+EXECUTION_DIR = Path(__file__).parent
+
+# Import-time budget per entry point, in milliseconds above bare `python -c pass`
+BUDGETS_MS = {
+    'run_if_due': 50,
+    'setup_check': 50,
+    'cas_workflow_orchestrator': 100,
+    'scheduler_daemon': 50,
+    'tenant_scheduler': 50
+}
+
+# Packages that must only be imported when a step actually needs them
+HEAVY_MODULES = ['google.generativeai', 'playwright', 'PIL']
+
+
+def _time_command(code: str, runs: int) -> float:
+    """Median wall time (ms) of running `python -c code` in a fresh interpreter."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=EXECUTION_DIR, capture_output=True, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def heavy_imports(module: str) -> List[str]:
+    """Heavy packages that end up in sys.modules after importing a module."""
+    code = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=EXECUTION_DIR,
+                            capture_output=True, text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(',') if m] if output else []
+
+
+def measure(runs: int = 5) -> List[Dict]:
+    """
+    Measure every entry point against its budget.
+
+    Args:
+        runs: Fresh interpreters per module (the median is reported)
+
+    Returns:
+        One dict per module: module, import_ms, budget_ms, heavy, ok
+    """
+    baseline = _time_command('pass', runs)
+    results = []
+    for module, budget in BUDGETS_MS.items():
+        import_ms = max(0.0, _time_command(f'import {module}', runs) - baseline)
+        heavy = heavy_imports(module)
+        results.append({
+            'module': module,
+            'import_ms': round(import_ms),
+            'budget_ms': budget,
+            'heavy': heavy,
+            'ok': import_ms <= budget and not heavy
+        })
+    return results
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Check CLI startup time against the budget')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("STARTUP BUDGET")
+    print("=" * 60)
+
+    results = measure(max(1, args.runs))
+    for r in results:
+        status = "✅" if r['ok'] else "❌"
+        heavy = f"  (imports {', '.join(r['heavy'])})" if r['heavy'] else ""
+        print(f"  {status} {r['module']:<28} {r['import_ms']:>5} ms / {r['budget_ms']} ms{heavy}")
+
+    if all(r['ok'] for r in results):
+        print("\n✅ All entry points within budget")
+        return 0
+
+    print("\n❌ Over budget - check for module-level SDK imports (python -X importtime)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
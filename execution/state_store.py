@@ -0,0 +1,349 @@
+"""
+SQLite state store for CAS automation history.
+Keeps every run, idea, image analysis, reflection and submission (per
+student) in one embedded database in WAL mode, so history can be queried
+and several students can be processed at once without racing on JSON files.
+The legacy .tmp JSON files can still be exported from it.
+
+Usage:
+    python execution/state_store.py history [--student NAME] [--table reflections]
+    python execution/state_store.py export [--student NAME]
+"""
+
+import os
+import json
+import sqlite3
+import sys
+import datetime
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Configuration
+STATE_DB = Path(os.getenv('CAS_STATE_DB', '.tmp/cas_state.db'))
+DEFAULT_STUDENT = os.getenv('CAS_STUDENT', 'default')
+LEGACY_DIR = Path(".tmp")
+# Roster students' .tmp artifacts (generated_idea.json, screenshots, ...) go in STUDENTS_DIR/<name>/
+STUDENTS_DIR = Path(os.getenv('CAS_STUDENTS_DIR', '.tmp/students'))
+
+TABLES = ('runs', 'ideas', 'analyses', 'reflections', 'submissions')
+# Tables with a status column (ideas have none)
+STATUS_TABLES = ('runs', 'analyses', 'reflections', 'submissions')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    student TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL DEFAULT 'running',
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS ideas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    student TEXT NOT NULL,
+    date TEXT,
+    created_at TEXT NOT NULL,
+    description TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    student TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    num_images INTEGER,
+    analysis TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reflections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    idea_id INTEGER REFERENCES ideas(id),
+    student TEXT NOT NULL,
+    date TEXT,
+    created_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'generated',
+    reflection TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER REFERENCES runs(id),
+    reflection_id INTEGER REFERENCES reflections(id),
+    student TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_student ON runs(student, started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+CREATE INDEX IF NOT EXISTS idx_ideas_student ON ideas(student, date);
+CREATE INDEX IF NOT EXISTS idx_analyses_student ON analyses(student, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses(status);
+CREATE INDEX IF NOT EXISTS idx_reflections_student ON reflections(student, date);
+CREATE INDEX IF NOT EXISTS idx_reflections_status ON reflections(status);
+CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions(student, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_submissions_status ON submissions(status);
+"""
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class StateStore:
+    """Run history in SQLite (one connection per thread, WAL journal)."""
+
+    def __init__(self, db_path: Path = STATE_DB):
+        """
+        Open (and if needed create) the database.
+
+        Args:
+            db_path: SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.db_path.parent, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            # WAL lets readers and one writer work at the same time
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _insert(self, table: str, values: Dict) -> int:
+        conn = self._connect()
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        with conn:
+            cursor = conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                                  list(values.values()))
+        return cursor.lastrowid
+
+    # Writes
+
+    def start_run(self, student: str = DEFAULT_STUDENT) -> int:
+        """Record the start of a workflow run and return its id."""
+        return self._insert('runs', {'student': student, 'started_at': _now(), 'status': 'running'})
+
+    def finish_run(self, run_id: int, success: bool, error: Optional[str] = None):
+        """Mark a run as succeeded or failed."""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE runs SET finished_at = ?, status = ?, error = ? WHERE id = ?",
+                         (_now(), 'success' if success else 'failed', error, run_id))
+
+    def add_idea(self, idea: Dict, run_id: Optional[int] = None, student: str = DEFAULT_STUDENT) -> int:
+        """Store a generated idea (generated_idea.json format)."""
+        return self._insert('ideas', {
+            'run_id': run_id, 'student': student, 'date': idea.get('date'),
+            'created_at': _now(), 'description': idea.get('description'),
+            'data': json.dumps(idea, ensure_ascii=False)
+        })
+
+    def add_analysis(self, result: Dict, run_id: Optional[int] = None, student: str = DEFAULT_STUDENT) -> int:
+        """Store an image analysis result (analyze_images() format)."""
+        return self._insert('analyses', {
+            'run_id': run_id, 'student': student, 'created_at': _now(),
+            'status': 'success' if result.get('success') else 'failed',
+            'num_images': result.get('num_images'), 'analysis': result.get('analysis'),
+            'data': json.dumps(result, ensure_ascii=False)
+        })
+
+    def add_reflection(self, result: Dict, run_id: Optional[int] = None, idea_id: Optional[int] = None,
+                       student: str = DEFAULT_STUDENT) -> int:
+        """Store a generated reflection (generate_reflection() format)."""
+        return self._insert('reflections', {
+            'run_id': run_id, 'idea_id': idea_id, 'student': student, 'date': result.get('date'),
+            'created_at': _now(), 'status': 'generated' if result.get('success') else 'failed',
+            'reflection': result.get('reflection'), 'data': json.dumps(result, ensure_ascii=False)
+        })
+
+    def add_submission(self, success: bool, reflection_id: Optional[int] = None, run_id: Optional[int] = None,
+                       student: str = DEFAULT_STUDENT, error: Optional[str] = None,
+                       data: Optional[Dict] = None) -> int:
+        """Store a submission attempt and update the reflection's status."""
+        submission_id = self._insert('submissions', {
+            'run_id': run_id, 'reflection_id': reflection_id, 'student': student,
+            'submitted_at': _now(), 'status': 'submitted' if success else 'failed',
+            'error': error, 'data': json.dumps(data or {}, ensure_ascii=False)
+        })
+        if reflection_id is not None:
+            conn = self._connect()
+            with conn:
+                conn.execute("UPDATE reflections SET status = ? WHERE id = ?",
+                             ('submitted' if success else 'submit_failed', reflection_id))
+        return submission_id
+
+    # Reads
+
+    def last_run(self, student: str = DEFAULT_STUDENT, status: Optional[str] = 'success') -> Optional[Dict]:
+        """Most recent run of a student (with the given status, or any if None)."""
+        query = "SELECT * FROM runs WHERE student = ?"
+        params: List = [student]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        row = self._connect().execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        return dict(row) if row else None
+
+    def latest(self, table: str, student: str = DEFAULT_STUDENT) -> Optional[Dict]:
+        """Most recent row of a table for a student, with its JSON data decoded."""
+        rows = self.history(table, student=student, limit=1)
+        return rows[0] if rows else None
+
+    def history(self, table: str, student: Optional[str] = None, status: Optional[str] = None,
+                limit: int = 50) -> List[Dict]:
+        """
+        Recent rows of a table, newest first.
+
+        Args:
+            table: One of TABLES
+            student: Only this student's rows (None = everyone)
+            status: Only rows with this status (not for ideas)
+            limit: Maximum rows
+
+        Returns:
+            Rows as dicts; the "data" column is decoded from JSON
+
+        Raises:
+            ValueError: If the table is unknown, or status is given for a table without one
+        """
+        if table not in TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if status and table not in STATUS_TABLES:
+            raise ValueError(f"The {table} table has no status column")
+
+        query, params = f"SELECT * FROM {table} WHERE 1 = 1", []
+        if student:
+            query += " AND student = ?"
+            params.append(student)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        rows = []
+        for row in self._connect().execute(query, params):
+            item = dict(row)
+            if 'data' in item:
+                item['data'] = json.loads(item['data'])
+            rows.append(item)
+        return rows
+
+    # Legacy files
+
+    def export_legacy(self, student: str = DEFAULT_STUDENT, out_dir: Optional[Path] = None) -> List[Path]:
+        """
+        Write the legacy JSON files from the latest stored state.
+
+        Writes last_run.json, generated_idea.json, image_analysis.json and
+        generated_reflection.json (each only if there is something to write).
+
+        Args:
+            student: Student whose state is exported
+            out_dir: Target folder (default: the student's artifact_dir)
+
+        Returns:
+            Paths written
+        """
+        out_dir = artifact_dir(student) if out_dir is None else out_dir
+        os.makedirs(out_dir, exist_ok=True)
+        written = []
+
+        def write(name: str, value: Dict):
+            path = Path(out_dir) / name
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(value, f, indent=2, ensure_ascii=False)
+            written.append(path)
+
+        run = self.last_run(student)
+        if run:
+            finished = datetime.datetime.fromisoformat(run['finished_at'] or run['started_at'])
+            write('last_run.json', {
+                'timestamp': finished.timestamp(),
+                'date': finished.strftime("%Y-%m-%d %H:%M:%S")
+            })
+        for table, name in (('ideas', 'generated_idea.json'), ('analyses', 'image_analysis.json'),
+                            ('reflections', 'generated_reflection.json')):
+            row = self.latest(table, student)
+            if row:
+                write(name, row['data'])
+        return written
+
+
+def artifact_dir(student: str = DEFAULT_STUDENT) -> Path:
+    """Folder for a student's .tmp artifacts (.tmp itself for the default student)."""
+    return LEGACY_DIR if student == DEFAULT_STUDENT else STUDENTS_DIR / student
+
+
+_stores: Dict[str, StateStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path: Path = STATE_DB) -> StateStore:
+    """
+    Get the (memoized) store for a database file.
+
+    Args:
+        db_path: SQLite database file
+
+    Returns:
+        StateStore
+    """
+    key = str(Path(db_path).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = StateStore(db_path)
+        return _stores[key]
+
+
+def main():
+    """Query history or export the legacy JSON files."""
+    import argparse
+    parser = argparse.ArgumentParser(description='CAS automation state store')
+    parser.add_argument('command', choices=['history', 'export'])
+    parser.add_argument('--student', default=DEFAULT_STUDENT, help='Student name (history: "all" for everyone)')
+    parser.add_argument('--table', default='runs', choices=TABLES, help='Table for history')
+    parser.add_argument('--status', help='Only rows with this status')
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    store = get_store()
+
+    if args.command == 'export':
+        for path in store.export_legacy(args.student):
+            print(f"💾 {path}")
+        return
+
+    student = None if args.student == 'all' else args.student
+    try:
+        rows = store.history(args.table, student=student, status=args.status, limit=args.limit)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    for row in rows:
+        row.pop('data', None)
+        text = row.get('reflection') or row.get('analysis') or row.get('description') or ''
+        for column in ('reflection', 'analysis', 'description'):
+            row.pop(column, None)
+        fields = '  '.join(f"{k}={v}" for k, v in row.items() if v is not None)
+        print(f"{fields}  {text[:60]}")
+
+
+if __name__ == "__main__":
+    main()
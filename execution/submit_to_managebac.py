@@ -4,40 +4,226 @@ Logs in, fills forms, uploads evidence, and submits reflections.
 """
 
 import os
+import sys
 import json
-import time
+import shutil
+import datetime
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright, Page, Browser
+from playwright.sync_api import sync_playwright, Page, Browser, BrowserContext
+
+from browser_profile import context_options, install_routes, launch_args, lean_enabled
+from state_store import artifact_dir
+from tracing import span
+from page_readiness import (
+    click_and_wait_for_response,
+    form_response_matcher,
+    outcome_locators,
+    wait_for_editor,
+    wait_for_logged_in,
+    wait_for_outcomes,
+    wait_for_page_ready,
+    wait_for_url_change,
+)
 
 # Load environment variables
 load_dotenv()
 
+# Saved browser session (cookies + local storage) reused between runs
+SESSION_FILE = Path(os.getenv('MANAGEBAC_SESSION_FILE', '.tmp/managebac_session.json'))
+# Per-student sessions when submitting for a roster account
+SESSIONS_DIR = Path(".tmp/sessions")
+SCREENSHOT_FILE = Path(".tmp/submission_screenshot.png")
+
+# CAS experience reflections page (the Journal form lives here)
+REFLECTIONS_URL = os.getenv(
+    'MANAGEBAC_REFLECTIONS_URL',
+    "https://eiszayed.managebac.com/student/ib/activity/cas/26158447/reflections"
+)
+
+# Pending reflections for --batch: a directory of .json files or a .jsonl file
+QUEUE_PATH = Path(os.getenv('REFLECTION_QUEUE', '.tmp/reflection_queue'))
+BATCH_RESULTS_FILE = Path(".tmp/batch_results.json")
+
+# Login form selectors (tried in order; schools use different login pages)
+USERNAME_SELECTORS = [
+    'input[type="email"]',
+    'input[name="username"]',
+    'input[id="username"]',
+    'input[name="email"]',
+    'input[id="email"]'
+]
+PASSWORD_SELECTORS = [
+    'input[type="password"]',
+    'input[name="password"]',
+    'input[id="password"]'
+]
+LOGIN_BUTTON_SELECTORS = [
+    'button[type="submit"]',
+    'input[type="submit"]',
+    'button:has-text("Sign in")',
+    'button:has-text("Log in")',
+    'button:has-text("Login")'
+]
+
+# Learning outcome number -> checkbox label on the Journal form
+OUTCOME_MAP = {
+    '1': "Identify own strengths and develop areas for growth",
+    '2': "Demonstrate that challenges have been undertaken",
+    '3': "Demonstrate how to initiate and plan a CAS experience",
+    '4': "Show commitment to and perseverance in CAS experiences",
+    '5': "Demonstrate the skills and recognize the benefits of working collaboratively",
+    '6': "Demonstrate engagement with issues of global significance",
+    '7': "Recognize and consider the ethics of choices and actions"
+}
+
 
 class ManageBacAutomation:
     """Automates ManageBac CAS reflection submission."""
     
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, reuse_session: bool = True, lean: Optional[bool] = None,
+                 browser: Optional[Browser] = None, account: Optional[Dict] = None):
         """
         Initialize the automation.
         
         Args:
             headless: Run browser in headless mode (no visible window)
+            reuse_session: Reuse the saved login session instead of logging in every run
+            lean: Block images/fonts/styles/analytics (defaults to MANAGEBAC_LEAN)
+            browser: Already running browser to open contexts on (kept open afterwards);
+                     None launches a new one per submission
+            account: Roster account (see multi_account_submitter.load_roster) to submit
+                     as instead of the MANAGEBAC_* credentials; its session is kept
+                     in .tmp/sessions/<name>.json and its screenshot in .tmp/students/<name>/
         """
         # Force headless in CI environments (GitHub Actions, etc.)
         is_ci = os.getenv('CI') == 'true' or os.getenv('GITHUB_ACTIONS') == 'true'
         self.headless = headless or is_ci
+        self.reuse_session = reuse_session
+        self.lean = lean_enabled() if lean is None else lean
+        self.browser = browser
         
         if is_ci:
             print("🤖 CI environment detected - running in headless mode")
         
-        self.managebac_url = os.getenv('MANAGEBAC_URL')
-        self.username = os.getenv('MANAGEBAC_USERNAME')
-        self.password = os.getenv('MANAGEBAC_PASSWORD')
+        if account:
+            self.managebac_url = account.get('managebac_url')
+            self.username = account.get('username')
+            self.password = account.get('password')
+            self.reflections_url = account.get('reflections_url')
+            self.session_file = SESSIONS_DIR / f"{account.get('name')}.json"
+            self.screenshot_file = artifact_dir(account.get('name')) / SCREENSHOT_FILE.name
+        else:
+            self.managebac_url = os.getenv('MANAGEBAC_URL')
+            self.username = os.getenv('MANAGEBAC_USERNAME')
+            self.password = os.getenv('MANAGEBAC_PASSWORD')
+            self.reflections_url = REFLECTIONS_URL
+            self.session_file = SESSION_FILE
+            self.screenshot_file = SCREENSHOT_FILE
         
         if not all([self.managebac_url, self.username, self.password]):
+            if account:
+                raise ValueError(f"Missing ManageBac credentials for {account.get('name')}")
             raise ValueError("Missing ManageBac credentials in .env file")
+        if not self.reflections_url:
+            if account:
+                # Never fall back to MANAGEBAC_REFLECTIONS_URL: it is another student's page
+                raise ValueError(f"Missing reflections_url for {account.get('name')}")
+            raise ValueError("Missing MANAGEBAC_REFLECTIONS_URL in .env file")
+    
+    @staticmethod
+    def _on_login_page(page: Page) -> bool:
+        """Check whether the page is (still) showing the login screen."""
+        url = page.url.lower()
+        return 'login' in url or 'signin' in url
+    
+    def new_context(self, browser: Browser) -> BrowserContext:
+        """
+        Create a browser context, restoring the saved session if there is one.
+        
+        Args:
+            browser: Playwright browser object
+            
+        Returns:
+            New browser context
+        """
+        options = context_options(self.lean)
+        context = None
+        
+        if self.reuse_session and self.session_file.exists():
+            try:
+                context = browser.new_context(storage_state=str(self.session_file), **options)
+            except Exception as e:
+                print(f"  ⚠️  Could not load saved session ({e}), starting fresh")
+        
+        if context is None:
+            context = browser.new_context(**options)
+        
+        if self.lean:
+            install_routes(context)
+        return context
+    
+    def is_session_valid(self, page: Page) -> bool:
+        """
+        Cheaply check whether the restored session is still logged in.
+        
+        Loads the ManageBac home page without waiting for network idle;
+        an expired session is redirected to the login screen.
+        
+        Args:
+            page: Playwright page object
+            
+        Returns:
+            True if the session is still valid
+        """
+        try:
+            page.goto(self.managebac_url, wait_until='domcontentloaded')
+        except Exception as e:
+            print(f"  ⚠️  Session check failed: {e}")
+            return False
+        
+        if self._on_login_page(page):
+            return False
+        return page.locator('input[type="password"]').count() == 0
+    
+    def save_session(self, context: BrowserContext):
+        """Save cookies and local storage so the next run can skip login."""
+        try:
+            os.makedirs(self.session_file.parent, exist_ok=True)
+            context.storage_state(path=str(self.session_file))
+            print(f"  💾 Session saved: {self.session_file}")
+        except Exception as e:
+            print(f"  ⚠️  Could not save session: {e}")
+    
+    def ensure_logged_in(self, page: Page, context: BrowserContext) -> bool:
+        """
+        Make sure the page is logged in, reusing the saved session when possible.
+        
+        Args:
+            page: Playwright page object
+            context: Browser context the page belongs to
+            
+        Returns:
+            True if logged in
+        """
+        if self.reuse_session and self.session_file.exists():
+            print("🔑 Checking saved session...")
+            if self.is_session_valid(page):
+                print("  ✅ Saved session still valid, skipping login")
+                return True
+            
+            print("  ⌛ Saved session expired, logging in again")
+            context.clear_cookies()
+            self.session_file.unlink(missing_ok=True)
+        
+        if not self.login(page):
+            return False
+        
+        if self.reuse_session:
+            self.save_session(context)
+        return True
     
     def login(self, page: Page) -> bool:
         """
@@ -53,8 +239,7 @@ class ManageBacAutomation:
         
         try:
             # Navigate to ManageBac
-            page.goto(self.managebac_url)
-            page.wait_for_load_state('networkidle')
+            page.goto(self.managebac_url, wait_until='domcontentloaded')
             
             # Wait for login form
             print("  ⏳ Waiting for login form...")
@@ -64,15 +249,7 @@ class ManageBacAutomation:
             print("  📝 Entering credentials...")
             
             # Try different possible selectors for username/email
-            username_selectors = [
-                'input[type="email"]',
-                'input[name="username"]',
-                'input[id="username"]',
-                'input[name="email"]',
-                'input[id="email"]'
-            ]
-            
-            for selector in username_selectors:
+            for selector in USERNAME_SELECTORS:
                 try:
                     if page.locator(selector).count() > 0:
                         page.fill(selector, self.username)
@@ -82,13 +259,7 @@ class ManageBacAutomation:
                     continue
             
             # Fill password
-            password_selectors = [
-                'input[type="password"]',
-                'input[name="password"]',
-                'input[id="password"]'
-            ]
-            
-            for selector in password_selectors:
+            for selector in PASSWORD_SELECTORS:
                 try:
                     if page.locator(selector).count() > 0:
                         page.fill(selector, self.password)
@@ -98,15 +269,7 @@ class ManageBacAutomation:
                     continue
             
             # Click login button
-            login_button_selectors = [
-                'button[type="submit"]',
-                'input[type="submit"]',
-                'button:has-text("Sign in")',
-                'button:has-text("Log in")',
-                'button:has-text("Login")'
-            ]
-            
-            for selector in login_button_selectors:
+            for selector in LOGIN_BUTTON_SELECTORS:
                 try:
                     if page.locator(selector).count() > 0:
                         page.click(selector)
@@ -115,12 +278,11 @@ class ManageBacAutomation:
                 except:
                     continue
             
-            # Wait for navigation
-            page.wait_for_load_state('networkidle', timeout=15000)
-            time.sleep(2)
+            # Wait for the redirect away from the login page
+            wait_for_logged_in(page)
             
             # Check if login was successful
-            if 'login' not in page.url.lower() and 'signin' not in page.url.lower():
+            if not self._on_login_page(page):
                 print("  ✅ Login successful!")
                 return True
             else:
@@ -155,10 +317,11 @@ class ManageBacAutomation:
             for selector in cas_selectors:
                 try:
                     if page.locator(selector).count() > 0:
+                        previous_url = page.url
                         page.click(selector)
                         print("  ✓ Clicked CAS link")
-                        page.wait_for_load_state('networkidle')
-                        time.sleep(1)
+                        if not wait_for_url_change(page, previous_url):
+                            wait_for_page_ready(page)
                         return True
                 except:
                     continue
@@ -185,131 +348,349 @@ class ManageBacAutomation:
         print("\n✍️  Creating new CAS reflection...")
         
         try:
-            # 1. Navigate directly to reflections page (more reliable than finding buttons)
-            # Note: This URL might need to be dynamic if the ID changes, but for now it's fixed
-            reflections_url = "https://eiszayed.managebac.com/student/ib/activity/cas/26158447/reflections"
-            if page.url != reflections_url:
-                print(f"  📍 Navigating directly to: {reflections_url}")
-                page.goto(reflections_url)
-                time.sleep(3)
+            with span('managebac.open_reflections'):
+                # 1. Navigate directly to reflections page (more reliable than finding buttons)
+                # Note: Set MANAGEBAC_REFLECTIONS_URL if the experience ID changes
+                reflections_url = self.reflections_url
+                if page.url != reflections_url:
+                    print(f"  📍 Navigating directly to: {reflections_url}")
+                    page.goto(reflections_url, wait_until='domcontentloaded')
             
-            # 2. Click "Journal" button
-            print("  ✍️ Clicking 'Journal' button...")
-            try:
-                page.get_by_role("link", name="Journal").click()
-                time.sleep(2)
-            except Exception as e:
-                print(f"  ⚠️ Error clicking Journal: {e}")
-                return False
+            with span('managebac.form_fill', outcomes=len(reflection_data.get('learning_outcomes') or [])):
+                # 2. Click "Journal" button and wait for the editor to appear
+                print("  ✍️ Clicking 'Journal' button...")
+                try:
+                    page.get_by_role("link", name="Journal").click()
+                    editor = wait_for_editor(page)
+                except Exception as e:
+                    print(f"  ⚠️ Error clicking Journal: {e}")
+                    return False
 
-            # 3. Fill in reflection text using JS injection (faster/more reliable)
-            print("  📝 Filling reflection text...")
-            reflection_text = reflection_data.get('reflection', '')
-            
-            # Escape for JS
-            reflection_escaped = reflection_text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-            
-            page.evaluate(f'''
-                const editor = document.querySelector('div[contenteditable="true"]');
-                if (editor) {{
-                    editor.innerHTML = "{reflection_escaped}";
-                }}
-            ''')
-            time.sleep(1)
-            
-            # 4. Select learning outcomes
-            if reflection_data.get('learning_outcomes'):
-                outcomes = reflection_data['learning_outcomes']
-                print(f"  🎯 Selecting learning outcomes: {outcomes}")
+                # 3. Fill in reflection text using JS injection (faster/more reliable)
+                print("  📝 Filling reflection text...")
+                reflection_text = reflection_data.get('reflection', '')
                 
-                outcome_map = {
-                    '1': "Identify own strengths and develop areas for growth",
-                    '2': "Demonstrate that challenges have been undertaken",
-                    '3': "Demonstrate how to initiate and plan a CAS experience",
-                    '4': "Show commitment to and perseverance in CAS experiences",
-                    '5': "Demonstrate the skills and recognize the benefits of working collaboratively",
-                    '6': "Demonstrate engagement with issues of global significance",
-                    '7': "Recognize and consider the ethics of choices and actions"
-                }
+                # Text is passed as an argument, so no manual JS escaping is needed
+                editor.evaluate('(el, text) => { el.innerHTML = text; }', reflection_text)
                 
-                for lo_num in outcomes:
-                    lo_text = outcome_map.get(str(lo_num))
-                    if lo_text:
-                        try:
-                            # Try exact match first
-                            page.get_by_text(lo_text, exact=True).click()
-                            time.sleep(0.5)
-                        except:
-                            # Try partial match if exact fails
-                            try:
-                                page.locator(f'text={lo_text}').first.click()
-                            except:
+                # 4. Select learning outcomes
+                if reflection_data.get('learning_outcomes'):
+                    outcomes = reflection_data['learning_outcomes']
+                    print(f"  🎯 Selecting learning outcomes: {outcomes}")
+                    if not wait_for_outcomes(page):
+                        print("  ⚠️ Learning outcome checkboxes did not appear")
+                
+                    for lo_num in outcomes:
+                        lo_text = OUTCOME_MAP.get(str(lo_num))
+                        if lo_text:
+                            # Exact match first, then a partial match
+                            for locator in outcome_locators(page, lo_text):
+                                try:
+                                    locator.click()
+                                    break
+                                except Exception:
+                                    continue
+                            else:
                                 print(f"  ⚠️ Could not select LO {lo_num}")
             
-            # 5. Submit
-            print("  ✅ Clicking 'Add Entry'...")
-            page.get_by_role("button", name="Add Entry").click()
-            time.sleep(3)
-            
-            # Verify submission (check for success message or URL change)
-            print("  ✅ Submission complete!")
-            return True
+            with span('managebac.submit') as s:
+                # 5. Submit
+                print("  ✅ Clicking 'Add Entry'...")
+                previous_url = page.url
+                response = click_and_wait_for_response(page, page.get_by_role("button", name="Add Entry"),
+                                                       form_response_matcher(self.reflections_url))
+                
+                # Verify submission (server accepted the form, then the page moved on)
+                if response is None:
+                    print("  ❌ No response to 'Add Entry' (timed out)")
+                    return False
+                s.set(status=response.status)
+                if response.status >= 400:
+                    print(f"  ❌ Submission rejected: HTTP {response.status}")
+                    return False
+                
+                # A classic form post navigates away; an XHR post updates in place
+                if response.request.is_navigation_request():
+                    wait_for_url_change(page, previous_url)
+                wait_for_page_ready(page)
+                print("  ✅ Submission complete!")
+                return True
             
         except Exception as e:
             print(f"  ❌ Form filling error: {e}")
             return False
     
-    def submit_reflection(self, reflection_data: dict, evidence_files: Optional[List[str]] = None):
+    def submit_reflection(self, reflection_data: dict, evidence_files: Optional[List[str]] = None) -> bool:
         """
         Main method to submit a CAS reflection.
         
         Args:
             reflection_data: Dictionary with reflection details
             evidence_files: Optional list of file paths to upload as evidence
+            
+        Returns:
+            True if the reflection was submitted
         """
         print("=" * 60)
         print("MANAGEBAC CAS AUTOMATION")
         print("=" * 60)
         
-        with sync_playwright() as p:
-            # Launch browser
-            print(f"\n🌐 Launching browser (headless={self.headless})...")
-            browser = p.chromium.launch(headless=self.headless)
-            context = browser.new_context()
-            page = context.new_page()
+        with self._browser_page() as (context, page):
+            submitted = False
             
             try:
-                # Login
-                if not self.login(page):
+                # Login (or reuse the saved session)
+                with span('managebac.login') as s:
+                    logged_in = self.ensure_logged_in(page, context)
+                    s.set(success=logged_in)
+                if not logged_in:
                     print("\n❌ Login failed. Please check credentials.")
-                    browser.close()
-                    return
+                    return False
                 
                 # Navigate to CAS
-                if not self.navigate_to_cas(page):
+                with span('managebac.navigate') as s:
+                    navigated = self.navigate_to_cas(page)
+                    s.set(success=navigated)
+                if not navigated:
                     print("\n⚠️  Could not auto-navigate to CAS.")
                     print("  Please navigate to CAS manually in the browser window.")
                     input("  Press Enter when you're on the CAS page...")
                 
                 # Create reflection
-                self.create_new_reflection(page, reflection_data)
+                submitted = self.create_new_reflection(page, reflection_data)
                 
                 print("\n✅ Process complete!")
                 print("  💾 Taking screenshot...")
                 
                 # Take screenshot
-                screenshot_path = ".tmp/submission_screenshot.png"
-                os.makedirs(".tmp", exist_ok=True)
-                page.screenshot(path=screenshot_path)
-                print(f"  📸 Screenshot saved: {screenshot_path}")
+                os.makedirs(self.screenshot_file.parent, exist_ok=True)
+                page.screenshot(path=str(self.screenshot_file))
+                print(f"  📸 Screenshot saved: {self.screenshot_file}")
                 
             except Exception as e:
                 print(f"\n❌ Error during automation: {e}")
+        
+        return submitted
+    
+    def submit_batch(self, entries: List[Tuple[str, dict]]) -> List[Dict]:
+        """
+        Submit several queued reflections in one browser session.
+        
+        Logs in once, opens the reflections page once, then posts every
+        entry in turn. A failed entry does not stop the rest of the batch.
+        
+        Args:
+            entries: List of (entry_id, reflection_data) pairs
+            
+        Returns:
+            One result dict per entry: {"id", "success", "submitted_at"}
+        """
+        print("=" * 60)
+        print(f"MANAGEBAC BATCH SUBMISSION ({len(entries)} reflections)")
+        print("=" * 60)
+        
+        results = []
+        
+        with self._browser_page() as (context, page):
+            try:
+                with span('managebac.login') as s:
+                    logged_in = self.ensure_logged_in(page, context)
+                    s.set(success=logged_in)
+                if not logged_in:
+                    print("\n❌ Login failed. Please check credentials.")
+                    return [{"id": entry_id, "success": False, "error": "Login failed"}
+                            for entry_id, _ in entries]
+                
+                page.goto(self.reflections_url, wait_until='domcontentloaded')
+                
+                for index, (entry_id, reflection_data) in enumerate(entries, 1):
+                    print(f"\n[{index}/{len(entries)}] {entry_id}")
+                    try:
+                        success = self.create_new_reflection(page, reflection_data)
+                    except Exception as e:
+                        print(f"  ❌ Error: {e}")
+                        success = False
+                    
+                    results.append({
+                        "id": entry_id,
+                        "success": success,
+                        "submitted_at": datetime.datetime.now().isoformat(timespec='seconds')
+                    })
+                    
+                    if not success:
+                        # Start the next entry from a clean reflections page
+                        page.goto(self.reflections_url, wait_until='domcontentloaded')
                 
+                os.makedirs(self.screenshot_file.parent, exist_ok=True)
+                page.screenshot(path=str(self.screenshot_file))
+                print(f"\n  📸 Screenshot saved: {self.screenshot_file}")
+                
+            except Exception as e:
+                print(f"\n❌ Error during batch: {e}")
+                done = {r["id"] for r in results}
+                results.extend({"id": entry_id, "success": False, "error": str(e)}
+                               for entry_id, _ in entries if entry_id not in done)
+        
+        succeeded = sum(1 for r in results if r["success"])
+        print(f"\n📊 Batch complete: {succeeded}/{len(entries)} submitted")
+        return results
+    
+    @contextmanager
+    def _browser_page(self):
+        """
+        Open a page for one submission run.
+        
+        Uses the shared browser when one was given (only the context is
+        closed afterwards); otherwise launches Chromium and closes it at the end.
+        
+        Yields:
+            (context, page)
+        """
+        if self.browser is not None and self.browser.is_connected():
+            print(f"\n🌐 Using running browser (lean={self.lean})...")
+            with span('browser.context', shared=True):
+                context = self.new_context(self.browser)
+                page = context.new_page()
+            try:
+                yield context, page
             finally:
-                print("\n  Closing browser in 5 seconds...")
-                time.sleep(5)
+                context.close()
+            return
+        
+        with sync_playwright() as p:
+            browser, context, page = self._open_browser(p)
+            try:
+                yield context, page
+            finally:
+                print("\n  Closing browser...")
                 browser.close()
+    
+    def _open_browser(self, p) -> Tuple[Browser, BrowserContext, Page]:
+        """Launch Chromium and open a page in a (possibly restored) context."""
+        print(f"\n🌐 Launching browser (headless={self.headless}, lean={self.lean})...")
+        with span('browser.launch', headless=self.headless, lean=self.lean):
+            browser = p.chromium.launch(headless=self.headless, args=launch_args(self.lean))
+        with span('browser.context'):
+            context = self.new_context(browser)
+            page = context.new_page()
+        return browser, context, page
+
+
+def enqueue_reflection(reflection_data: dict, queue_path: Path = QUEUE_PATH) -> str:
+    """
+    Add a generated reflection to the pending queue.
+    
+    Args:
+        reflection_data: Reflection dictionary (as saved by generate_reflection.py)
+        queue_path: Queue directory or .jsonl file
+        
+    Returns:
+        ID of the queued entry
+    """
+    entry_id = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    
+    if queue_path.suffix == '.jsonl':
+        os.makedirs(queue_path.parent, exist_ok=True)
+        with open(queue_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"id": entry_id, **reflection_data}, ensure_ascii=False) + "\n")
+    else:
+        os.makedirs(queue_path, exist_ok=True)
+        with open(queue_path / f"{entry_id}.json", 'w', encoding='utf-8') as f:
+            json.dump(reflection_data, f, indent=2, ensure_ascii=False)
+    
+    return entry_id
+
+
+def load_queue(queue_path: Path = QUEUE_PATH) -> List[Tuple[str, dict]]:
+    """
+    Load pending reflections from the queue.
+    
+    Args:
+        queue_path: Queue directory or .jsonl file
+        
+    Returns:
+        List of (entry_id, reflection_data) pairs in queue order
+    """
+    entries = []
+    
+    if not queue_path.exists():
+        return entries
+    
+    if queue_path.suffix == '.jsonl':
+        with open(queue_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    data = json.loads(line)
+                    entries.append((str(data.get('id', line_no)), data))
+    else:
+        for file in sorted(queue_path.glob('*.json')):
+            with open(file, 'r', encoding='utf-8') as f:
+                entries.append((file.stem, json.load(f)))
+    
+    return entries
+
+
+def finish_queue(queue_path: Path, results: List[Dict], results_file: Path = BATCH_RESULTS_FILE):
+    """
+    Remove submitted entries from the queue; failed entries stay for the next run.
+    
+    Args:
+        queue_path: Queue directory or .jsonl file
+        results: Results returned by ManageBacAutomation.submit_batch
+        results_file: Where to save the per-entry results
+    """
+    submitted = {r["id"] for r in results if r["success"]}
+    
+    if queue_path.suffix == '.jsonl':
+        remaining, done = [], []
+        for entry_id, data in load_queue(queue_path):
+            (done if entry_id in submitted else remaining).append(data)
+        
+        with open(queue_path, 'w', encoding='utf-8') as f:
+            for data in remaining:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        with open(queue_path.with_suffix('.submitted.jsonl'), 'a', encoding='utf-8') as f:
+            for data in done:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+    else:
+        archive = queue_path / 'submitted'
+        os.makedirs(archive, exist_ok=True)
+        for entry_id in submitted:
+            shutil.move(str(queue_path / f"{entry_id}.json"), str(archive / f"{entry_id}.json"))
+    
+    os.makedirs(results_file.parent, exist_ok=True)
+    with open(results_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def run_batch(args) -> bool:
+    """Submit every queued reflection in one browser session."""
+    queue_path = Path(args.queue) if args.queue else QUEUE_PATH
+    entries = [(entry_id, data) for entry_id, data in load_queue(queue_path)
+               if data.get('success', True) and data.get('reflection')]
+    
+    if not entries:
+        print(f"\n📭 Queue is empty: {queue_path}")
+        return True
+    
+    print(f"\n📬 {len(entries)} reflections queued in {queue_path}")
+    
+    if not args.auto:
+        confirm = input(f"\n⚠️  Submit all {len(entries)} to ManageBac? (yes/no): ")
+        if confirm.lower() != 'yes':
+            print("  ❌ Submission cancelled")
+            return False
+    
+    automation = ManageBacAutomation(
+        headless=args.headless,
+        reuse_session=not args.fresh_login,
+        lean=True if args.lean else None
+    )
+    results = automation.submit_batch(entries)
+    finish_queue(queue_path, results)
+    print(f"  💾 Results saved: {BATCH_RESULTS_FILE}")
+    
+    return all(r["success"] for r in results)
 
 
 def main():
@@ -318,12 +699,21 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--auto', action='store_true', help='Run in auto mode without confirmation')
     parser.add_argument('--headless', action='store_true', help='Run browser in headless mode')
+    parser.add_argument('--fresh-login', action='store_true', help='Ignore the saved session and log in again')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics (headless/CI)')
+    parser.add_argument('--batch', action='store_true', help='Submit every queued reflection in one session')
+    parser.add_argument('--enqueue', action='store_true', help='Add the generated reflection to the queue instead of submitting')
+    parser.add_argument('--queue', help=f'Queue directory or .jsonl file (default: {QUEUE_PATH})')
     args = parser.parse_args()
 
     print("=" * 60)
     print("MANAGEBAC CAS REFLECTION SUBMITTER")
     print("=" * 60)
     
+    if args.batch:
+        ok = run_batch(args)
+        sys.exit(0 if ok else 1)
+    
     # Check for generated reflection
     reflection_file = Path(".tmp/generated_reflection.json")
     
@@ -345,6 +735,13 @@ def main():
     print(reflection_data['reflection'][:200] + "...")
     print("-" * 60)
     
+    if args.enqueue:
+        queue_path = Path(args.queue) if args.queue else QUEUE_PATH
+        entry_id = enqueue_reflection(reflection_data, queue_path)
+        print(f"\n📬 Queued as {entry_id} in {queue_path}")
+        print("  Run with --batch to submit the queue")
+        return
+    
     # Confirm submission
     if not args.auto:
         confirm = input("\n⚠️  Ready to submit to ManageBac? (yes/no): ")
@@ -355,7 +752,11 @@ def main():
         print("\n🤖 AUTO MODE: Submitting automatically...")
     
     # Run automation
-    automation = ManageBacAutomation(headless=args.headless)
+    automation = ManageBacAutomation(
+        headless=args.headless,
+        reuse_session=not args.fresh_login,
+        lean=True if args.lean else None
+    )
     automation.submit_reflection(reflection_data)
 
 
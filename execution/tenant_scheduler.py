@@ -0,0 +1,367 @@
+"""
+Multi-student scheduler.
+Every student in the roster has their own schedule (interval, catch-up policy,
+quiet hours). All of them are kept in one min-heap keyed on next-due time
+(.tmp/tenant_heap.json), so each tick only looks at the top of the heap,
+however many students there are. Due runs go to a worker pool with a
+fair-share limit per group (by default the student's ManageBac school), and
+groups take turns for free workers.
+
+Roster entries take an optional "schedule" object:
+    {"interval_days": 4, "catch_up": "once", "quiet_hours": "22-07",
+     "group": "school-a", "photos_dir": "photos/student_one"}
+
+catch_up: "once" runs an overdue student once and restarts the interval
+(default), "all" runs every missed interval back to back, "skip" drops
+missed intervals and keeps the original cadence.
+
+Usage:
+    python execution/tenant_scheduler.py [--roster roster.json] [--workers 4] [--group-limit 2] [--once]
+    python execution/tenant_scheduler.py --status
+"""
+
+import os
+import sys
+import time
+import queue
+import signal
+import datetime
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Add execution directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from run_if_due import INTERVAL_DAYS, get_last_run
+from scheduler_daemon import MAX_SLEEP_SECONDS, RETRY_MINUTES, JobHeap, _format_time
+
+# Configuration
+TENANT_HEAP_FILE = Path(os.getenv('TENANT_HEAP_FILE', '.tmp/tenant_heap.json'))
+TENANT_WORKERS = int(os.getenv('TENANT_WORKERS', '4'))
+TENANT_GROUP_LIMIT = int(os.getenv('TENANT_GROUP_LIMIT', '2'))
+
+CATCH_UP_POLICIES = ('once', 'all', 'skip')
+
+
+def parse_quiet_hours(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse "22-07" or "22:30-06:45" into (start, end) minutes of the day.
+
+    Args:
+        value: Quiet hours in local time (may wrap past midnight)
+
+    Returns:
+        (start, end) minutes, or None if no quiet hours are set
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    if not value:
+        return None
+
+    def minutes(part: str) -> int:
+        hours, _, mins = part.strip().partition(':')
+        result = int(hours) * 60 + int(mins or 0)
+        if not 0 <= result < 24 * 60:
+            raise ValueError(f"Invalid quiet hours: {value}")
+        return result
+
+    start, sep, end = value.partition('-')
+    if not sep:
+        raise ValueError(f"Invalid quiet hours: {value}")
+    return minutes(start), minutes(end)
+
+
+def in_quiet_hours(timestamp: float, quiet: Optional[Tuple[int, int]]) -> bool:
+    """Whether a time falls inside the quiet window."""
+    if not quiet:
+        return False
+    moment = datetime.datetime.fromtimestamp(timestamp)
+    now = moment.hour * 60 + moment.minute
+    start, end = quiet
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+def quiet_hours_end(timestamp: float, quiet: Tuple[int, int]) -> float:
+    """First moment after a time when the quiet window is over."""
+    moment = datetime.datetime.fromtimestamp(timestamp)
+    end = moment.replace(hour=quiet[1] // 60, minute=quiet[1] % 60, second=0, microsecond=0)
+    if end.timestamp() <= timestamp:
+        end += datetime.timedelta(days=1)
+    return end.timestamp()
+
+
+def load_tenants(roster_path: Optional[Path] = None) -> Dict[str, Dict]:
+    """
+    Load every student's account and schedule from the roster.
+
+    Args:
+        roster_path: Roster file (default: CAS_ROSTER_FILE)
+
+    Returns:
+        {student name: {"account", "interval", "catch_up", "quiet", "group", "photos_dir"}}
+
+    Raises:
+        ValueError: On an incomplete account or invalid schedule
+    """
+    # Imported here so --status does not load Playwright
+    from multi_account_submitter import ROSTER_FILE, load_roster
+
+    tenants = {}
+    for account in load_roster(roster_path or ROSTER_FILE):
+        schedule = account.get('schedule') or {}
+        catch_up = schedule.get('catch_up', 'once')
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"Unknown catch_up policy for {account['name']}: {catch_up}")
+
+        tenants[account['name']] = {
+            'account': account,
+            'interval': float(schedule.get('interval_days', INTERVAL_DAYS)) * 86400,
+            'catch_up': catch_up,
+            'quiet': parse_quiet_hours(schedule.get('quiet_hours')),
+            'group': schedule.get('group') or urlparse(account['managebac_url']).netloc,
+            'photos_dir': schedule.get('photos_dir')
+        }
+    return tenants
+
+
+def next_slot(due: float, interval: float, now: float) -> float:
+    """First time after now on the cadence due, due + interval, ..."""
+    missed = int((now - due) // interval) + 1
+    return due + max(missed, 1) * interval
+
+
+class TenantScheduler:
+    """Dispatches due student runs to a fair-share worker pool."""
+
+    def __init__(self, tenants: Dict[str, Dict], workers: int = TENANT_WORKERS,
+                 group_limit: int = TENANT_GROUP_LIMIT, lean: Optional[bool] = None,
+                 heap: Optional[JobHeap] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            tenants: Students from load_tenants()
+            workers: Runs at the same time overall
+            group_limit: Runs at the same time per group
+            lean: Lean browser profile (None = MANAGEBAC_LEAN)
+            heap: Schedule heap (default: TENANT_HEAP_FILE)
+        """
+        self.tenants = tenants
+        self.workers = max(1, workers)
+        self.group_limit = max(1, group_limit)
+        self.lean = lean
+        self.heap = heap or JobHeap(TENANT_HEAP_FILE)
+        self.stop_event = threading.Event()
+
+        # Popped from the heap but waiting for a worker, per group (oldest first)
+        self.pending: Dict[str, Deque[Tuple[float, str]]] = {}
+        # Groups in the order they get the next free worker
+        self.rotation: Deque[str] = deque()
+        self.running: Dict[str, int] = {}
+        self.active = 0
+        self.results: queue.Queue = queue.Queue()
+
+    def seed(self):
+        """Add students that are not in the heap yet, due one interval after their last run."""
+        scheduled = set(self.heap.jobs())
+        now = time.time()
+        for name, tenant in self.tenants.items():
+            if name not in scheduled:
+                last_run = get_last_run(name)
+                self.heap.push(last_run + tenant['interval'] if last_run else now, name, replace=False)
+
+    def run_student(self, name: str) -> bool:
+        """
+        Run the pipeline for one student (in a worker thread).
+
+        Args:
+            name: Student name
+
+        Returns:
+            True if the reflection was submitted
+        """
+        from pipeline import photo_files, run_pipeline
+        tenant = self.tenants[name]
+        photos = photo_files(tenant['photos_dir']) if tenant['photos_dir'] else []
+        try:
+            return run_pipeline(headless=True, lean=self.lean, student=name,
+                                account=tenant['account'], photos=photos)
+        except Exception as e:
+            print(f"❌ {name}: run crashed: {e}")
+            return False
+
+    def next_due(self, name: str, due: float, ok: bool, now: float) -> float:
+        """When a student is due again after a run that was due at `due`."""
+        if not ok:
+            return now + RETRY_MINUTES * 60
+        tenant = self.tenants[name]
+        if tenant['catch_up'] == 'all':
+            return due + tenant['interval']
+        if tenant['catch_up'] == 'skip':
+            return next_slot(due, tenant['interval'], now)
+        return now + tenant['interval']
+
+    def release_due(self, now: float) -> int:
+        """Move due students from the heap to their group's pending queue; returns how many."""
+        released = 0
+        while True:
+            item = self.heap.peek()
+            if item is None or item[0] > now:
+                return released
+            due, name = self.heap.pop()
+            tenant = self.tenants.get(name)
+            if tenant is None:
+                print(f"⚠️  {name} is no longer in the roster, dropping")
+                continue
+
+            if tenant['catch_up'] == 'skip' and now - due > tenant['interval']:
+                slot = next_slot(due, tenant['interval'], now)
+                print(f"⏭️  {name}: skipping missed runs, next at {_format_time(slot)}")
+                self.heap.push(slot, name, replace=False)
+                continue
+            if in_quiet_hours(now, tenant['quiet']):
+                self.heap.push(quiet_hours_end(now, tenant['quiet']), name, replace=False)
+                continue
+
+            group = tenant['group']
+            if group not in self.pending:
+                self.pending[group] = deque()
+                self.rotation.append(group)
+            self.pending[group].append((due, name))
+            released += 1
+
+    def dispatch(self, pool: ThreadPoolExecutor):
+        """Hand pending runs to free workers, one group at a time in turn."""
+        skipped = 0
+        while self.active < self.workers and self.rotation and skipped < len(self.rotation):
+            group = self.rotation[0]
+            self.rotation.rotate(-1)
+            if self.running.get(group, 0) >= self.group_limit:
+                skipped += 1
+                continue
+
+            due, name = self.pending[group].popleft()
+            if not self.pending[group]:
+                del self.pending[group]
+                self.rotation.remove(group)
+            self.running[group] = self.running.get(group, 0) + 1
+            self.active += 1
+            skipped = 0
+
+            print(f"▶️  {_format_time(time.time())}: running {name} ({group})")
+            future = pool.submit(self.run_student, name)
+            future.add_done_callback(
+                lambda f, name=name, due=due, group=group: self.results.put(
+                    (name, due, group, not f.cancelled() and f.exception() is None and bool(f.result()))
+                )
+            )
+
+    def finish(self, name: str, due: float, group: str, ok: bool):
+        """Free the worker and put the student back in the heap."""
+        self.active -= 1
+        self.running[group] -= 1
+        next_due = self.next_due(name, due, ok, time.time())
+        self.heap.push(next_due, name, replace=False)
+        status = "✅" if ok else "❌ failed,"
+        print(f"{status} {name}: next run at {_format_time(next_due)}")
+
+    def requeue_pending(self):
+        """Put runs that never got a worker back in the heap (on shutdown)."""
+        for runs in self.pending.values():
+            for due, name in runs:
+                self.heap.push(due, name, replace=False)
+        self.pending.clear()
+        self.rotation.clear()
+
+    def run(self, once: bool = False):
+        """
+        Dispatch due runs until stopped.
+
+        Args:
+            once: Run the students that are due now and return
+        """
+        self.seed()
+        print(f"👥 {len(self.tenants)} students, {self.workers} workers, "
+              f"{self.group_limit} per group")
+
+        released_once = False
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='tenant') as pool:
+            while True:
+                stopping = self.stop_event.is_set()
+                if not stopping and not (once and released_once):
+                    self.release_due(time.time())
+                    released_once = True
+                    self.dispatch(pool)
+
+                if stopping or (once and not self.pending):
+                    if self.active == 0:
+                        break
+                    timeout = None
+                else:
+                    item = self.heap.peek()
+                    timeout = MAX_SLEEP_SECONDS if item is None or once else item[0] - time.time()
+                    timeout = min(max(timeout, 0.0), MAX_SLEEP_SECONDS)
+
+                try:
+                    result = self.results.get(timeout=timeout)
+                except queue.Empty:
+                    continue
+                if result is not None:
+                    self.finish(*result)
+                    if once:
+                        self.dispatch(pool)
+
+        self.requeue_pending()
+
+    def stop(self, *_):
+        """Stop dispatching and wait for running students (signal handler)."""
+        print("\n🛑 Stopping after the running students finish...")
+        self.stop_event.set()
+        self.results.put(None)
+
+
+def main():
+    """Run the multi-student scheduler from the command line."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Per-student CAS scheduler')
+    parser.add_argument('--roster', type=Path, help='Roster file (default: CAS_ROSTER_FILE)')
+    parser.add_argument('--workers', type=int, default=TENANT_WORKERS, help='Runs at the same time')
+    parser.add_argument('--group-limit', type=int, default=TENANT_GROUP_LIMIT, help='Runs at the same time per group')
+    parser.add_argument('--lean', action='store_true', help='Skip images, fonts, styles and analytics')
+    parser.add_argument('--once', action='store_true', help='Run the students due now and exit')
+    parser.add_argument('--status', action='store_true', help='Show the schedule and exit')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CAS MULTI-STUDENT SCHEDULER")
+    print("=" * 60)
+
+    if args.status:
+        heap = JobHeap(TENANT_HEAP_FILE)
+        if not heap.heap:
+            print("📭 Nothing scheduled")
+        for due, name in sorted(heap.heap):
+            print(f"  {_format_time(due)}  {name}")
+        return
+
+    try:
+        tenants = load_tenants(args.roster)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load roster: {e}")
+        sys.exit(1)
+
+    scheduler = TenantScheduler(tenants, args.workers, args.group_limit, lean=True if args.lean else None)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
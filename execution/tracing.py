@@ -0,0 +1,298 @@
+"""
+Lightweight timing spans for the CAS workflow.
+Wrap a step in `with span('stage.name', key=value):` (or decorate a function
+with @traced('name')) and its wall time, status and attributes are appended
+to a JSONL trace in .tmp/traces/ (one file per process). Spans nest, so each
+record carries its trace, span and parent ids. Traces can be converted to
+OpenTelemetry OTLP/JSON (TRACE_OTLP=true does it at exit) for any collector.
+
+Usage:
+    python execution/tracing.py summary [--runs 20] [--name gemini]
+    python execution/tracing.py otlp .tmp/traces/<trace>.jsonl
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import atexit
+import datetime
+import functools
+import threading
+import contextvars
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Configuration
+TRACE_DIR = Path(os.getenv('TRACE_DIR', '.tmp/traces'))
+TRACING = os.getenv('TRACING', 'true').lower() == 'true'
+TRACE_OTLP = os.getenv('TRACE_OTLP', 'false').lower() == 'true'
+SERVICE_NAME = 'cas-automation'
+
+_current: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+_lock = threading.Lock()
+_trace_id: Optional[str] = None
+_trace_file: Optional[Path] = None
+
+
+def trace_id() -> str:
+    """Id of this process's trace (created on first use)."""
+    global _trace_id
+    if _trace_id is None:
+        _trace_id = uuid.uuid4().hex
+    return _trace_id
+
+
+def trace_file() -> Path:
+    """JSONL file this process's spans are written to."""
+    global _trace_file
+    if _trace_file is None:
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        _trace_file = TRACE_DIR / f"{stamp}-{trace_id()[:8]}.jsonl"
+        if TRACE_OTLP:
+            atexit.register(_export_at_exit)
+    return _trace_file
+
+
+def _export_at_exit():
+    if _trace_file is not None and _trace_file.exists():
+        export_otlp(_trace_file)
+
+
+def _write(record: Dict):
+    with _lock:
+        path = trace_file()
+        os.makedirs(path.parent, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+class Span:
+    """A timed step; use as a context manager."""
+
+    def __init__(self, name: str, attributes: Optional[Dict] = None):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.span_id = os.urandom(8).hex()
+        self.parent_id: Optional[str] = None
+        self.start = 0.0
+        self._start_perf = 0.0
+        self._token = None
+
+    def set(self, **attributes):
+        """Add attributes (e.g. a result or token counts) before the span ends."""
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent else None
+        self._token = _current.set(self)
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        duration_ms = (time.perf_counter() - self._start_perf) * 1000
+        _current.reset(self._token)
+        if TRACING:
+            record = {
+                'trace_id': trace_id(),
+                'span_id': self.span_id,
+                'parent_id': self.parent_id,
+                'name': self.name,
+                'start': self.start,
+                'duration_ms': round(duration_ms, 3),
+                'status': 'ok' if exc_type is None else 'error',
+                'thread': threading.current_thread().name,
+                'attributes': self.attributes
+            }
+            if exc_type is not None:
+                record['error'] = f"{exc_type.__name__}: {exc}"
+            try:
+                _write(record)
+            except OSError:
+                pass
+        return False
+
+
+def span(name: str, **attributes) -> Span:
+    """
+    Time a block of code.
+
+    Args:
+        name: Step name, dotted by area (e.g. "gemini.request", "managebac.login")
+        **attributes: Extra fields stored with the span
+
+    Returns:
+        Span context manager
+    """
+    return Span(name, attributes)
+
+
+def traced(name: str):
+    """Decorator form of span() for a whole function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Reading traces
+
+def load_spans(runs: Optional[int] = None, trace_dir: Path = TRACE_DIR) -> List[Dict]:
+    """
+    Read spans from the saved traces.
+
+    Args:
+        runs: Only the most recent N trace files (None = all)
+        trace_dir: Folder with the .jsonl traces
+
+    Returns:
+        Span records
+    """
+    files = sorted(Path(trace_dir).glob('*.jsonl'))
+    if runs:
+        files = files[-runs:]
+
+    spans = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue
+    return spans
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(spans: List[Dict]) -> List[Dict]:
+    """
+    Per-step timing statistics.
+
+    Args:
+        spans: Span records
+
+    Returns:
+        One dict per span name (slowest total first): name, count, errors,
+        p50_ms, p95_ms, max_ms, total_ms
+    """
+    by_name: Dict[str, List[Dict]] = {}
+    for record in spans:
+        by_name.setdefault(record['name'], []).append(record)
+
+    rows = []
+    for name, records in by_name.items():
+        durations = [r['duration_ms'] for r in records]
+        rows.append({
+            'name': name,
+            'count': len(records),
+            'errors': sum(1 for r in records if r.get('status') == 'error'),
+            'p50_ms': percentile(durations, 50),
+            'p95_ms': percentile(durations, 95),
+            'max_ms': max(durations),
+            'total_ms': sum(durations)
+        })
+    return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def export_otlp(path: Path, out_path: Optional[Path] = None) -> Path:
+    """
+    Convert a JSONL trace to OTLP/JSON (POST it to a collector's /v1/traces).
+
+    Args:
+        path: JSONL trace file
+        out_path: Output file (default: same name with .otlp.json)
+
+    Returns:
+        Path written
+    """
+    path = Path(path)
+    out_path = Path(out_path) if out_path else path.with_suffix('.otlp.json')
+
+    otlp_spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            start_ns = int(record['start'] * 1e9)
+            otlp_span = {
+                'traceId': record['trace_id'],
+                'spanId': record['span_id'],
+                'name': record['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(start_ns),
+                'endTimeUnixNano': str(start_ns + int(record['duration_ms'] * 1e6)),
+                'attributes': [{'key': k, 'value': _otlp_value(v)}
+                               for k, v in (record.get('attributes') or {}).items() if v is not None],
+                'status': {'code': 2, 'message': record.get('error', '')}
+                          if record.get('status') == 'error' else {'code': 1}
+            }
+            if record.get('parent_id'):
+                otlp_span['parentSpanId'] = record['parent_id']
+            otlp_spans.append(otlp_span)
+
+    document = {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+        'scopeSpans': [{'scope': {'name': SERVICE_NAME}, 'spans': otlp_spans}]
+    }]}
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+    return out_path
+
+
+def main():
+    """Summarize traces or export one as OTLP/JSON."""
+    import argparse
+    parser = argparse.ArgumentParser(description='CAS workflow timing traces')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    summary = subparsers.add_parser('summary', help='p50/p95 per step across runs')
+    summary.add_argument('--runs', type=int, help='Only the most recent N traces')
+    summary.add_argument('--name', help='Only steps whose name starts with this')
+    otlp = subparsers.add_parser('otlp', help='Convert a trace to OTLP/JSON')
+    otlp.add_argument('trace', type=Path)
+    otlp.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    if args.command == 'otlp':
+        print(f"💾 {export_otlp(args.trace, args.output)}")
+        return
+
+    spans = load_spans(args.runs)
+    if args.name:
+        spans = [s for s in spans if s['name'].startswith(args.name)]
+    if not spans:
+        print(f"📭 No spans in {TRACE_DIR}")
+        return
+
+    traces = len({s['trace_id'] for s in spans})
+    print(f"📊 {len(spans)} spans from {traces} run(s)\n")
+    print(f"  {'step':<28} {'count':>6} {'err':>4} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10} {'total s':>9}")
+    for row in summarize(spans):
+        print(f"  {row['name']:<28} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>10.1f} "
+              f"{row['p95_ms']:>10.1f} {row['max_ms']:>10.1f} {row['total_ms'] / 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
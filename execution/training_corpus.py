@@ -0,0 +1,166 @@
+"""
+Indexed, memoized loader for the text training corpus.
+Discovers training files by glob, records mtime/size/hash in a manifest
+and re-reads only the files that changed since the last load.
+"""
+
+import os
+import re
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_FILE = Path(".tmp/training_manifest.json")
+
+# "Reflection 1.txt", "reflection 12.txt", "Reflection_3.txt", ...
+REFLECTION_PATTERN = re.compile(r'^reflection[\s_-]*(\d+)\.txt$', re.IGNORECASE)
+DESCRIPTION_PATTERN = re.compile(r'^description', re.IGNORECASE)
+OUTCOMES_PATTERN = re.compile(r'^learning[\s_-]*outcomes?\.txt$', re.IGNORECASE)
+
+
+class TrainingCorpus:
+    """Index of the training files in one folder."""
+
+    def __init__(self, text_path: Path, manifest_file: Path = MANIFEST_FILE):
+        """
+        Initialize the index.
+
+        Args:
+            text_path: Folder with the text training files
+            manifest_file: Where the mtime/size/hash manifest is saved
+        """
+        self.text_path = Path(text_path)
+        self.manifest_file = Path(manifest_file)
+        # name -> {"mtime_ns", "size", "sha256"}
+        self.manifest: Dict[str, Dict] = self._read_manifest()
+        # name -> file content (only for files read by this process)
+        self.contents: Dict[str, str] = {}
+
+    def _read_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('text_path') == str(self.text_path):
+                return data.get('files', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.manifest_file.parent, exist_ok=True)
+        with open(self.manifest_file, 'w', encoding='utf-8') as f:
+            json.dump({'text_path': str(self.text_path), 'files': self.manifest}, f, indent=2)
+
+    def refresh(self, read_contents: bool = True) -> bool:
+        """
+        Bring the index up to date with the folder.
+
+        Files are matched by stat (mtime + size); only new or changed files
+        are read and hashed.
+
+        Args:
+            read_contents: Also make sure every file's content is in memory
+
+        Returns:
+            True if any file was added, removed or changed
+        """
+        changed = False
+        seen = set()
+
+        files = sorted(self.text_path.glob('*.txt')) if self.text_path.exists() else []
+        for file in files:
+            name = file.name
+            seen.add(name)
+            stat = file.stat()
+            entry = self.manifest.get(name)
+            unchanged = entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+
+            if unchanged and (name in self.contents or not read_contents):
+                continue
+
+            with open(file, 'r', encoding='utf-8') as f:
+                content = f.read()
+            self.contents[name] = content
+
+            if not unchanged:
+                self.manifest[name] = {
+                    'mtime_ns': stat.st_mtime_ns,
+                    'size': stat.st_size,
+                    'sha256': hashlib.sha256(content.encode('utf-8')).hexdigest()
+                }
+                changed = True
+
+        for name in set(self.manifest) - seen:
+            del self.manifest[name]
+            self.contents.pop(name, None)
+            changed = True
+
+        if changed:
+            self._write_manifest()
+        return changed
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the corpus contents (file names + content hashes).
+
+        Unchanged files are not re-read, so this is cheap on warm runs.
+        """
+        self.refresh(read_contents=False)
+        digest = hashlib.sha256()
+        for name in sorted(self.manifest):
+            digest.update(f"{name}:{self.manifest[name]['sha256']}\n".encode('utf-8'))
+        return digest.hexdigest()
+
+    def reflection_files(self) -> List[str]:
+        """Example reflection file names, in numeric order (1, 2, ..., 10, 11)."""
+        numbered = []
+        for name in self.manifest:
+            match = REFLECTION_PATTERN.match(name)
+            if match:
+                numbered.append((int(match.group(1)), name))
+        return [name for _, name in sorted(numbered)]
+
+    def _find(self, pattern: re.Pattern) -> Optional[str]:
+        for name in sorted(self.manifest):
+            if pattern.match(name):
+                return name
+        return None
+
+    def load(self) -> Dict:
+        """
+        Load the training data.
+
+        Returns:
+            {"description": str, "reflections": [str], "learning_outcomes": str}
+        """
+        self.refresh()
+
+        description = self._find(DESCRIPTION_PATTERN)
+        outcomes = self._find(OUTCOMES_PATTERN)
+
+        return {
+            'description': self.contents.get(description, '') if description else '',
+            'reflections': [self.contents[name] for name in self.reflection_files()],
+            'learning_outcomes': self.contents.get(outcomes, '') if outcomes else ''
+        }
+
+
+# One index per folder, kept for the life of the process
+_corpora: Dict[str, TrainingCorpus] = {}
+
+
+def get_corpus(text_path: Path) -> TrainingCorpus:
+    """
+    Get the (memoized) index for a training folder.
+
+    Args:
+        text_path: Folder with the text training files
+
+    Returns:
+        TrainingCorpus for that folder
+    """
+    key = str(Path(text_path).resolve())
+    if key not in _corpora:
+        _corpora[key] = TrainingCorpus(text_path)
+    return _corpora[key]
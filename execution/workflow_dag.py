@@ -0,0 +1,168 @@
+"""
+Minimal checkpointed DAG runner for the CAS workflow.
+Each stage's output is saved under .tmp/checkpoints together with a hash of
+its inputs (the outputs of the stages it depends on), so a rerun skips the
+stages that already completed with the same inputs and resumes at the first
+one that failed.
+"""
+
+import os
+import json
+import hashlib
+import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tracing import span
+
+CHECKPOINT_DIR = Path(os.getenv('WORKFLOW_CHECKPOINT_DIR', '.tmp/checkpoints'))
+
+
+class Stage:
+    """One step of the workflow."""
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Dict]], Optional[Dict]],
+                 deps: Sequence[str] = (), salt: str = ''):
+        """
+        Define a stage.
+
+        Args:
+            name: Stage name (also the checkpoint file name)
+            func: Called with {dependency name: output}; returns a JSON-serializable
+                  output dict, or None if the stage failed
+            deps: Names of the stages whose outputs this stage needs
+            salt: Extra input that is not a stage output (e.g. a digest of the photos)
+        """
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.salt = salt
+
+
+def input_hash(stage: Stage, inputs: Dict[str, Dict]) -> str:
+    """Content hash of everything a stage's output depends on."""
+    payload = json.dumps({'stage': stage.name, 'salt': stage.salt, 'inputs': inputs},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """
+    Order stages so every stage comes after its dependencies.
+
+    Raises:
+        ValueError: On an unknown dependency or a cycle
+    """
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            if dep not in by_name:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+    ordered, done, visiting = [], set(), set()
+
+    def visit(stage: Stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"Cycle in workflow at stage '{stage.name}'")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return ordered
+
+
+class CheckpointStore:
+    """Stage outputs saved as JSON files, keyed by the stage's input hash."""
+
+    def __init__(self, checkpoint_dir: Path = CHECKPOINT_DIR):
+        self.checkpoint_dir = Path(checkpoint_dir)
+
+    def _path(self, name: str) -> Path:
+        return self.checkpoint_dir / f"{name}.json"
+
+    def get(self, name: str, key: str) -> Optional[Dict]:
+        """Saved output of a stage, or None if missing or made from different inputs."""
+        try:
+            with open(self._path(name), 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return record.get('output') if record.get('input_hash') == key else None
+
+    def put(self, name: str, key: str, output: Dict):
+        """Save a stage's output (written atomically)."""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        path = self._path(name)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stage': name,
+                'input_hash': key,
+                'completed_at': datetime.datetime.now().isoformat(timespec='seconds'),
+                'output': output
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def clear(self):
+        """Remove every checkpoint (after a complete run, or to start over)."""
+        if self.checkpoint_dir.exists():
+            for path in self.checkpoint_dir.glob('*.json'):
+                path.unlink(missing_ok=True)
+
+
+def run_dag(stages: List[Stage], store: Optional[CheckpointStore] = None,
+            on_complete: Optional[Callable[[str, Dict], None]] = None) -> Tuple[bool, Dict[str, Dict]]:
+    """
+    Run the stages in dependency order, reusing checkpointed outputs.
+
+    Stops at the first stage that fails (returns None or raises); its
+    checkpoint and those of later stages are not written, so the next run
+    resumes there. Checkpoints are cleared once every stage has succeeded.
+
+    Args:
+        stages: Workflow stages
+        store: Checkpoint store (default: CHECKPOINT_DIR)
+        on_complete: Called with (stage name, output) when a stage actually ran
+                     (not when its checkpoint was reused)
+
+    Returns:
+        (all stages succeeded, {stage name: output} for the completed stages)
+    """
+    store = store or CheckpointStore()
+    outputs: Dict[str, Dict] = {}
+
+    for stage in topological_order(stages):
+        inputs = {dep: outputs[dep] for dep in stage.deps}
+        key = input_hash(stage, inputs)
+
+        output = store.get(stage.name, key)
+        if output is not None:
+            print(f"⏭️  {stage.name}: reusing checkpoint")
+            outputs[stage.name] = output
+            continue
+
+        try:
+            with span(f'stage.{stage.name}'):
+                output = stage.func(inputs)
+        except Exception as e:
+            print(f"❌ {stage.name} failed: {e}")
+            output = None
+
+        if output is None:
+            print(f"💾 Completed stages are checkpointed; the next run resumes at '{stage.name}'")
+            return False, outputs
+
+        store.put(stage.name, key, output)
+        outputs[stage.name] = output
+        if on_complete:
+            on_complete(stage.name, output)
+
+    store.clear()
+    return True, outputs
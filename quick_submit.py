@@ -3,10 +3,14 @@ Direct CAS submission - simplified version.
 """
 
 import os
-import time
+import sys
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 
+sys.path.insert(0, 'execution')
+
+from page_readiness import wait_for_editor
+
 load_dotenv()
 
 with open('.tmp/generated_reflection.txt', 'r', encoding='utf-8') as f:
@@ -30,17 +34,16 @@ with sync_playwright() as p:
     
     # Go to reflections page
     print("📍 Navigating to CAS reflections...")
-    page.goto("https://eiszayed.managebac.com/student/ib/activity/cas/26158447/reflections")
-    time.sleep(3)
+    page.goto("https://eiszayed.managebac.com/student/ib/activity/cas/26158447/reflections",
+              wait_until='domcontentloaded')
     
     # Click Journal
     print("✍️ Clicking Journal...")
     page.locator('text=Journal').click()
-    time.sleep(2)
     
     # Fill reflection
     print("📝 Filling in reflection...")
-    editor = page.locator('div[contenteditable="true"]').first
+    editor = wait_for_editor(page)
     editor.click()
     editor.fill(reflection)
     